@@ -0,0 +1,22 @@
+import os
+
+APP_NAME = "PythonEXE_Maker"
+
+
+def data_dir(*parts) -> str:
+    """
+    返回（并确保存在）应用的持久化数据目录：
+    - 优先使用环境变量 PYEXE_MAKER_HOME
+    - Windows 下为 %LOCALAPPDATA%\\PythonEXE_Maker
+    - 其他系统为 ~/.cache/PythonEXE_Maker
+    """
+    base = os.environ.get("PYEXE_MAKER_HOME")
+    if not base:
+        if os.name == 'nt':
+            root = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+        else:
+            root = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+        base = os.path.join(root, APP_NAME)
+    path = os.path.join(base, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
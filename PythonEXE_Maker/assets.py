@@ -0,0 +1,182 @@
+import os
+import logging
+import hashlib
+
+from app_paths import data_dir
+
+# 若要转换图标，需要尝试导入 Pillow
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+ICO_SIZES = [(256, 256), (128, 128), (64, 64), (48, 48), (32, 32), (16, 16)]
+
+
+def normalize_version(file_version: str) -> list:
+    """把版本号拆分为 4 段数字，格式不正确时使用 1.0.0.0"""
+    version_numbers = file_version.split('.') if file_version else ['1', '0', '0', '0']
+    if len(version_numbers) != 4 or not all(num.isdigit() for num in version_numbers):
+        version_numbers = ['1', '0', '0', '0']
+    return version_numbers
+
+
+def renderer_version() -> str:
+    """本进程中用于渲染版本信息文件的 PyInstaller 版本（未安装时为 None）"""
+    try:
+        import PyInstaller
+    except ImportError:
+        return None
+    return getattr(PyInstaller, '__version__', None)
+
+
+def render_version_info(exe_name: str, file_version: str, copyright_info: str) -> str:
+    """渲染 PyInstaller 版本信息文件内容（导入失败时抛出 ImportError）"""
+    from PyInstaller.utils.win32.versioninfo import (
+        VSVersionInfo, FixedFileInfo, StringFileInfo, StringTable, StringStruct,
+        VarFileInfo, VarStruct
+    )
+
+    version_numbers = normalize_version(file_version)
+
+    # 构造版本信息
+    version_info = VSVersionInfo(
+        ffi=FixedFileInfo(
+            filevers=tuple(map(int, version_numbers)),
+            prodvers=tuple(map(int, version_numbers)),
+            mask=0x3f,
+            flags=0x0,
+            OS=0x40004,
+            fileType=0x1,
+            subtype=0x0,
+            date=(0, 0)
+        ),
+        kids=[
+            StringFileInfo(
+                [
+                    StringTable(
+                        '040904E4',
+                        [
+                            StringStruct('CompanyName', ''),
+                            StringStruct('FileDescription', exe_name),
+                            StringStruct('FileVersion', '.'.join(version_numbers)),
+                            StringStruct('InternalName', f'{exe_name}.exe'),
+                            StringStruct('LegalCopyright', copyright_info or ''),
+                            StringStruct('OriginalFilename', f'{exe_name}.exe'),
+                            StringStruct('ProductName', exe_name),
+                            StringStruct('ProductVersion', '.'.join(version_numbers))
+                        ]
+                    )
+                ]
+            ),
+            VarFileInfo([VarStruct('Translation', [0x0409, 0x04B0])])
+        ]
+    )
+    return str(version_info)
+
+
+class BatchAssets:
+    """一个批次共享的、已准备好的图标与版本信息文件"""
+
+    def __init__(self, icon_file: str = '', version_files: dict = None):
+        self.icon_file = icon_file
+        self.version_files = version_files or {}
+
+    def version_file_for(self, exe_name: str) -> str:
+        return self.version_files.get(exe_name, '')
+
+
+class AssetCache:
+    """
+    转换后图标与版本信息文件的内容寻址缓存（跨会话持久化）：
+    同样的 PNG 只转换一次，同样的版本信息只渲染一次。版本信息文件的键包含渲染所用的 PyInstaller 版本
+    与工具链标识（与构建缓存一致），升级 PyInstaller 后重新渲染。
+    """
+
+    def __init__(self, cache_dir: str = None):
+        self.cache_dir = cache_dir or data_dir('assets')
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def icon(self, icon_path: str, report=logging.info) -> str:
+        """返回可直接交给 --icon 的 ICO 路径，失败时返回空字符串"""
+        lower_icon = icon_path.lower()
+        if lower_icon.endswith('.ico'):
+            return icon_path
+        if not lower_icon.endswith('.png'):
+            report("不支持的图标格式，仅支持 .png 和 .ico 格式。")
+            return ""
+
+        try:
+            h = hashlib.sha256(repr(ICO_SIZES).encode('utf-8'))
+            with open(icon_path, 'rb') as f:
+                h.update(f.read())
+        except OSError as e:
+            report(f"无法读取图标文件: {e}")
+            return ""
+        ico_path = os.path.join(self.cache_dir, f"icon-{h.hexdigest()[:32]}.ico")
+        if os.path.exists(ico_path):
+            report("复用已转换的 ICO 图标。")
+            return ico_path
+
+        if not Image:
+            report("Pillow 库未安装，无法转换 PNG 图标。请安装 Pillow 或使用 ICO 图标。")
+            return ""
+        report("检测到 PNG 图标，正在转换为 ICO 格式...")
+        try:
+            img = Image.open(icon_path)
+            tmp_path = f"{ico_path}.{os.getpid()}.tmp"
+            img.save(tmp_path, format='ICO', sizes=ICO_SIZES)
+            os.replace(tmp_path, ico_path)
+            report("图标转换成功。")
+            return ico_path
+        except Exception as e:
+            report(f"PNG 转 ICO 失败: {e}")
+            return ""
+
+    def version_file(self, exe_name: str, file_version: str, copyright_info: str,
+                     report=logging.info, toolchain_id: str = '') -> str:
+        """返回可直接交给 --version-file 的版本信息文件路径，失败时返回空字符串"""
+        key = hashlib.sha256(
+            repr((exe_name, normalize_version(file_version), copyright_info or '',
+                  renderer_version(), toolchain_id)).encode('utf-8')
+        ).hexdigest()[:32]
+        version_file_path = os.path.join(self.cache_dir, f"version-{key}.txt")
+        if os.path.exists(version_file_path):
+            return version_file_path
+
+        try:
+            content = render_version_info(exe_name, file_version, copyright_info)
+        except ImportError as e:
+            report(f"导入PyInstaller版本信息类失败: {e}")
+            return ""
+        try:
+            tmp_path = f"{version_file_path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as vf:
+                vf.write(content)
+            os.replace(tmp_path, version_file_path)
+            report("生成版本信息文件。")
+            return version_file_path
+        except Exception as e:
+            report(f"版本信息文件生成失败: {e}")
+            return ""
+
+    def prepare_batch(self, exe_names, icon_path: str = None, file_version: str = None,
+                      copyright_info: str = None, versioninfo_supported: bool = True,
+                      report=logging.info, toolchain_id: str = '') -> BatchAssets:
+        """
+        在任务分发前为整个批次准备图标和（按 EXE 名称去重的）版本信息文件；
+        toolchain_id 为工具链标识（Toolchain.fingerprint()），计入版本信息文件的缓存键
+        """
+        icon_file = self.icon(icon_path, report) if icon_path else ''
+        version_files = {}
+        if file_version or copyright_info:
+            if not versioninfo_supported:
+                report("当前 PyInstaller 不支持版本信息资源，已跳过版本信息文件。")
+            else:
+                for exe_name in dict.fromkeys(exe_names):
+                    version_file_path = self.version_file(exe_name, file_version, copyright_info, report,
+                                                          toolchain_id)
+                    if not version_file_path:
+                        break
+                    version_files[exe_name] = version_file_path
+        return BatchAssets(icon_file, version_files)
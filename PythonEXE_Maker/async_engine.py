@@ -0,0 +1,287 @@
+"""
+异步构建引擎：在一个后台线程的 asyncio 事件循环中驱动所有 PyInstaller 子进程。
+
+- 子进程由 asyncio.create_subprocess_exec 启动，标准输出按大块读取二进制数据、增量切分为行，
+  不为每个构建占用一个阻塞在 readline 上的线程；
+- 取消立即生效：正在等待输出的读取协程被取消后马上结束子进程所在的整个进程组，不必等到下一行输出；
+- 总时限与无输出时限在事件循环中计时，超时同样结束整个进程组；
+- 构建结束后的收尾工作（检查产物、写缓存、测量启动耗时、清理工作区）可能较慢，
+  交给收尾线程池执行，事件循环线程只处理子进程 I/O。收尾线程数不少于并行构建数
+  （ensure_finish_workers 随并行度调整），收尾较慢时各任务的收尾仍能同时进行，不会排队。
+
+无论同时运行多少个构建，引擎只使用 1 个事件循环线程加与并行度相当的收尾线程。
+"""
+import os
+import sys
+import locale
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from supervisor import (
+    ProcessResult, EXITED, CANCELLED, WALL_TIMEOUT, IDLE_TIMEOUT, SPAWN_FAILED, FAILED, TERMINATE_GRACE_S,
+    new_session_kwargs, signal_group, kill_group, reap_group
+)
+
+# 每次从子进程标准输出读取的最大字节数
+CHUNK_SIZE = 64 * 1024
+# 检查主进程是否已退出（以便结束残留进程）的间隔（秒）
+REAP_POLL_S = 0.2
+# 收尾线程数的下限（未指定时按 CPU 核数，与默认并行度一致）
+DEFAULT_FINISH_WORKERS = 2
+
+
+def _install_child_watcher(loop):
+    """
+    Python 3.8–3.11 在 POSIX 上默认用 ThreadedChildWatcher 等待子进程退出，每个子进程占用一个线程；
+    内核支持 pidfd 时改用 PidfdChildWatcher，由事件循环本身监听子进程退出（3.12 起已是默认行为）。
+    """
+    if sys.version_info >= (3, 12) or not hasattr(os, 'pidfd_open') or not hasattr(asyncio, 'PidfdChildWatcher'):
+        return
+    try:
+        os.close(os.pidfd_open(os.getpid()))
+    except OSError:
+        return
+    watcher = asyncio.PidfdChildWatcher()
+    watcher.attach_loop(loop)
+    asyncio.set_child_watcher(watcher)
+
+
+class BuildHandle:
+    """一个已提交子进程的句柄，可在任意线程中取消"""
+
+    def __init__(self, engine):
+        self._engine = engine
+        self._task = None
+        self._timer = None
+        self._args = None
+        self._reported = False
+        self.cancelled = False
+        self.pid = None
+
+    def cancel(self):
+        """请求取消：事件循环中的读取协程被取消后立即结束子进程"""
+        self.cancelled = True
+        self._engine.call_soon(self._engine._cancel, self)
+
+
+class AsyncBuildEngine:
+    """单线程事件循环驱动的子进程引擎（事件循环线程在第一次提交时启动）"""
+
+    def __init__(self, finish_workers: int = None, chunk_size: int = CHUNK_SIZE):
+        self.chunk_size = chunk_size
+        # PyInstaller 按本机首选编码输出（与原先文本模式读取一致）
+        self.encoding = locale.getpreferredencoding(False) or 'utf-8'
+        self.finish_workers = max(DEFAULT_FINISH_WORKERS, finish_workers or os.cpu_count() or 1)
+        self._finish_pool = ThreadPoolExecutor(max_workers=self.finish_workers, thread_name_prefix='build-finish')
+        # 扩容时换下的线程池（关闭引擎时等待其中的收尾回调执行完）
+        self._retired_pools = []
+        self._loop = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._handles = set()
+
+    @property
+    def running_count(self) -> int:
+        return len(self._handles)
+
+    def ensure_finish_workers(self, count: int):
+        """保证收尾线程数不少于 count（并行构建数）；已提交的收尾回调在原线程池中继续执行"""
+        with self._lock:
+            if count <= self.finish_workers:
+                return
+            self.finish_workers = count
+            retired = self._finish_pool
+            self._finish_pool = ThreadPoolExecutor(max_workers=count, thread_name_prefix='build-finish')
+            self._retired_pools.append(retired)
+        retired.shutdown(wait=False)
+
+    def _ensure_loop(self):
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._run_loop, args=(self._loop,),
+                                                name='build-engine', daemon=True)
+                self._thread.start()
+
+    @staticmethod
+    def _run_loop(loop):
+        asyncio.set_event_loop(loop)
+        _install_child_watcher(loop)
+        loop.run_forever()
+        loop.close()
+
+    def call_soon(self, callback, *args):
+        """在事件循环线程中执行 callback（引擎未启动时忽略）"""
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(callback, *args)
+
+    def submit(self, cmd: list, on_line, on_exit, on_start=None, cwd: str = None,
+               wall_timeout: float = None, idle_timeout: float = None, delay: float = 0.0) -> BuildHandle:
+        """
+        在 delay 秒后启动子进程（位于新的进程组中），立即返回句柄：
+        on_line(行文本) 在事件循环线程中逐行调用；on_start(pid) 在子进程启动后调用；
+        on_exit(ProcessResult) 在收尾线程中调用一次。
+        wall_timeout / idle_timeout 为总时限与无输出时限（秒，None 或 0 表示不限制）。
+        """
+        self._ensure_loop()
+        handle = BuildHandle(self)
+        handle._args = (cmd, on_line, on_exit, on_start, cwd, wall_timeout, idle_timeout)
+        self._handles.add(handle)
+        self._loop.call_soon_threadsafe(self._schedule, handle, max(0.0, delay))
+        return handle
+
+    def _schedule(self, handle: BuildHandle, delay: float):
+        if delay and not handle.cancelled:
+            handle._timer = self._loop.call_later(delay, self._start, handle)
+        else:
+            self._start(handle)
+
+    def _start(self, handle: BuildHandle):
+        handle._timer = None
+        if handle.cancelled:
+            # 尚未启动即被取消
+            self._report(handle, ProcessResult(CANCELLED))
+            return
+        handle._task = self._loop.create_task(self._drive(handle, *handle._args))
+        # 任务在第一次执行前被取消时协程体不会运行，由此补报结果
+        handle._task.add_done_callback(lambda task: self._report(handle, ProcessResult(CANCELLED)))
+
+    def _report(self, handle: BuildHandle, result: ProcessResult):
+        """每个句柄只报告一次结果"""
+        if handle._reported:
+            return
+        handle._reported = True
+        self._handles.discard(handle)
+        with self._lock:
+            self._finish_pool.submit(self._call_exit, handle._args[2], result)
+
+    def _cancel(self, handle: BuildHandle):
+        if handle._task is not None:
+            handle._task.cancel()
+        elif handle._timer is not None:
+            handle._timer.cancel()
+            self._start(handle)
+
+    async def _drive(self, handle: BuildHandle, cmd, on_line, on_exit, on_start, cwd, wall_timeout, idle_timeout):
+        loop = asyncio.get_running_loop()
+        result = ProcessResult(CANCELLED)
+        process = None
+        reaper = None
+        try:
+            try:
+                process = await asyncio.create_subprocess_exec(
+                    *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT, cwd=cwd,
+                    **new_session_kwargs()
+                )
+            except OSError as e:
+                result = ProcessResult(SPAWN_FAILED, error=e)
+                return
+            handle.pid = process.pid
+            if on_start:
+                on_start(process.pid)
+            reaper = loop.create_task(self._reap_after_exit(process))
+            deadline = loop.time() + wall_timeout if wall_timeout else None
+            pending = b''
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(process.stdout.read(self.chunk_size),
+                                                   self._read_timeout(loop, deadline, idle_timeout))
+                except asyncio.TimeoutError:
+                    if deadline is not None and loop.time() >= deadline:
+                        result = ProcessResult(WALL_TIMEOUT, timeout=wall_timeout)
+                    else:
+                        result = ProcessResult(IDLE_TIMEOUT, timeout=idle_timeout)
+                    return
+                if not chunk:
+                    break
+                lines = (pending + chunk).split(b'\n')
+                pending = lines.pop()
+                for line in lines:
+                    on_line(line.decode(self.encoding, 'replace'))
+            if pending:
+                on_line(pending.decode(self.encoding, 'replace'))
+            # 标准输出已关闭但进程仍在运行时，总时限仍然有效
+            try:
+                returncode = await asyncio.wait_for(process.wait(), self._read_timeout(loop, deadline, None))
+            except asyncio.TimeoutError:
+                result = ProcessResult(WALL_TIMEOUT, timeout=wall_timeout)
+                return
+            result = ProcessResult(EXITED, returncode)
+        except asyncio.CancelledError:
+            result = ProcessResult(CANCELLED)
+        except Exception as e:
+            result = ProcessResult(FAILED, error=e)
+        finally:
+            reaped = reaper is not None and reaper.done() and not reaper.cancelled()
+            if reaper is not None:
+                reaper.cancel()
+            if process is not None:
+                if process.returncode is None:
+                    await self._terminate(process)
+                    result.returncode = process.returncode
+                if not reaped:
+                    reap_group(process.pid)
+            self._report(handle, result)
+
+    @staticmethod
+    def _read_timeout(loop, deadline, idle_timeout):
+        """下一次读取最多等待的秒数（取无输出时限与剩余总时限中较小者）"""
+        timeouts = [t for t in (idle_timeout, deadline - loop.time() if deadline is not None else None)
+                    if t is not None and t]
+        return max(0.0, min(timeouts)) if timeouts else None
+
+    @staticmethod
+    async def _reap_after_exit(process):
+        """
+        主进程退出后立即结束组内残留的进程：它们继承了标准输出，不结束就读不到 EOF。
+        asyncio 在所有管道关闭后才唤醒 wait()，这里轮询 returncode（子进程退出时即被设置）。
+        """
+        while process.returncode is None:
+            await asyncio.sleep(REAP_POLL_S)
+        reap_group(process.pid)
+
+    @staticmethod
+    async def _terminate(process):
+        """结束子进程所在的整个进程组：先请求退出，宽限期后仍未退出则强制结束"""
+        signal_group(process.pid)
+        try:
+            await asyncio.wait_for(process.wait(), TERMINATE_GRACE_S)
+        except asyncio.TimeoutError:
+            kill_group(process.pid)
+            await process.wait()
+
+    @staticmethod
+    def _call_exit(on_exit, result):
+        try:
+            on_exit(result)
+        except Exception:
+            logging.exception("构建收尾回调出错")
+
+    def shutdown(self):
+        """取消所有子进程并停止事件循环（关闭程序时调用）"""
+        loop = self._loop
+        if loop is None:
+            self._finish_pool.shutdown(wait=False)
+            return
+        for handle in list(self._handles):
+            handle.cancel()
+
+        async def drain():
+            tasks = [handle._task for handle in list(self._handles) if handle._task]
+            if tasks:
+                await asyncio.wait(tasks, timeout=TERMINATE_GRACE_S + 1)
+
+        try:
+            asyncio.run_coroutine_threadsafe(drain(), loop).result(TERMINATE_GRACE_S + 2)
+        except Exception as e:
+            logging.warning(f"停止构建引擎时出错: {e}")
+        loop.call_soon_threadsafe(loop.stop)
+        self._thread.join(timeout=5)
+        # 等待已取消构建的收尾回调（清理工作区、写入历史）执行完
+        for pool in self._retired_pools + [self._finish_pool]:
+            pool.shutdown(wait=True)
+        self._retired_pools = []
+        self._loop = None
@@ -0,0 +1,224 @@
+"""
+批次编排：跟踪一批转换任务的状态，在最后一个任务结束时可靠地判定批次完成。
+
+- 每个任务有明确的状态：排队 → 运行 → 成功 / 失败 / 取消 / 命中缓存；状态转换在锁内完成，
+  每个任务只进入一次终态，完成计数随之加一，批次是否完成是 O(1) 的计数比较，不再遍历所有任务；
+- 状态来自构建事件：批次订阅事件总线，任务的第一个事件把它标为运行，结果事件（metrics 中的 state）
+  把它标为终态。结果事件在任务清理完毕之后才发布，批次完成时不会还有任务在运行；
+- 每个任务与整个批次各有一个 Future：任务的 Future 结果为终态，批次的 Future 结果为各状态的计数；
+- 任务可以依赖其他任务：when_ready() 在依赖全部成功（或命中缓存）后才提交任务，
+  有依赖未成功时任务不运行，直接以“取消”结束并发布结果事件。
+"""
+import os
+import threading
+from concurrent.futures import Future
+
+from build_events import BuildEvent, event_bus, RESULT, LEVEL_WARNING
+
+# 任务状态
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+CACHED = 'cached'
+TERMINAL_STATES = (SUCCEEDED, FAILED, CANCELLED, CACHED)
+# 依赖处于这些状态时视为已满足
+SATISFIED_STATES = (SUCCEEDED, CACHED)
+
+
+class DependencyError(ValueError):
+    """依赖关系无效（依赖不在批次中或存在循环）"""
+
+
+class BuildBatch:
+    """一批任务的状态、计数与完成通知（任务以脚本路径为键）"""
+
+    def __init__(self, keys=(), events=None):
+        self.events = events or event_bus()
+        self.states = {}
+        self.dependencies = {}
+        self.reasons = {}
+        self.counts = {state: 0 for state in (QUEUED, RUNNING) + TERMINAL_STATES}
+        self.finished_count = 0
+        self.done = Future()
+        self._futures = {}
+        self._lock = threading.Lock()
+        self._attached = False
+        self._completed = False
+        for key in keys:
+            self.add(key)
+
+    # ---------- 组建 ----------
+
+    def add(self, key: str, depends_on=()):
+        """加入一个排队中的任务；depends_on 为它依赖的任务键"""
+        with self._lock:
+            if key not in self.states:
+                self.states[key] = QUEUED
+                self.counts[QUEUED] += 1
+                self._futures[key] = Future()
+            self.dependencies[key] = [dep for dep in depends_on if dep != key]
+
+    def check_dependencies(self):
+        """检查依赖都在批次中且没有循环，否则抛出 DependencyError"""
+        for key, deps in self.dependencies.items():
+            for dep in deps:
+                if dep not in self.states:
+                    raise DependencyError(f"{os.path.basename(key)} 依赖的 {os.path.basename(dep)} 不在本批次中")
+        visiting, visited = set(), set()
+
+        def visit(key, path):
+            if key in visited:
+                return
+            if key in visiting:
+                cycle = path[path.index(key):] + [key]
+                raise DependencyError(f"存在循环依赖: {' -> '.join(os.path.basename(k) for k in cycle)}")
+            visiting.add(key)
+            for dep in self.dependencies.get(key, ()):
+                visit(dep, path + [key])
+            visiting.discard(key)
+            visited.add(key)
+
+        for key in self.states:
+            visit(key, [])
+
+    def has_dependencies(self, key: str) -> bool:
+        """任务是否依赖其他任务或被其他任务依赖"""
+        return bool(self.dependencies.get(key)) or any(key in deps for deps in self.dependencies.values())
+
+    def attach(self):
+        """开始接收构建事件；批次完成后自动停止"""
+        if not self._attached:
+            self._attached = True
+            self.events.subscribe(self)
+            with self._lock:
+                complete = self._claim_completion()
+            if complete:
+                self._complete()
+
+    def detach(self):
+        if self._attached:
+            self._attached = False
+            self.events.unsubscribe(self)
+
+    # ---------- 状态 ----------
+
+    def __call__(self, event: BuildEvent):
+        """事件订阅者：任务的第一个事件标记为运行，结果事件标记终态（不属于本批次的事件忽略）"""
+        state = self.states.get(event.task)
+        if state is None or state in TERMINAL_STATES:
+            return
+        if event.kind == RESULT:
+            metrics = event.metrics or {}
+            self.finish(event.task, metrics.get('state') or (SUCCEEDED if metrics.get('success') else FAILED))
+        elif state == QUEUED:
+            self._transition(event.task, RUNNING)
+
+    def finish(self, key: str, state: str, reason: str = None) -> bool:
+        """把任务标为终态；只有第一次生效，返回是否生效"""
+        if not self._transition(key, state):
+            return False
+        if reason:
+            self.reasons[key] = reason
+        self._settle(key, state)
+        return True
+
+    def _settle(self, key: str, state: str):
+        """（状态已转为终态后调用）完成任务的 Future，全部结束时报告批次完成"""
+        self._futures[key].set_result(state)
+        with self._lock:
+            complete = self._claim_completion()
+        if complete:
+            self._complete()
+
+    def _claim_completion(self) -> bool:
+        """（持有锁时调用）所有任务都已结束且尚未报告完成时返回 True，保证只报告一次"""
+        if self._completed or self.finished_count != len(self.states):
+            return False
+        self._completed = True
+        return True
+
+    def _transition(self, key: str, state: str, expected: str = None) -> bool:
+        """在锁内转换状态；给出 expected 时只在当前状态等于它时转换"""
+        with self._lock:
+            current = self.states.get(key)
+            if current is None or current in TERMINAL_STATES or current == state:
+                return False
+            if expected is not None and current != expected:
+                return False
+            self.states[key] = state
+            self.counts[current] -= 1
+            self.counts[state] += 1
+            if state in TERMINAL_STATES:
+                self.finished_count += 1
+            return True
+
+    def _complete(self):
+        self.detach()
+        self.done.set_result(dict(self.counts))
+
+    @property
+    def complete(self) -> bool:
+        return self.done.done()
+
+    @property
+    def total(self) -> int:
+        return len(self.states)
+
+    def future(self, key: str) -> Future:
+        """任务的 Future，结果为任务的终态"""
+        return self._futures[key]
+
+    def wait(self, timeout: float = None) -> dict:
+        """等待批次完成，返回各状态的计数"""
+        return self.done.result(timeout)
+
+    def summary_text(self) -> str:
+        counts = self.counts
+        text = f"成功 {counts[SUCCEEDED] + counts[CACHED]}/{self.total}"
+        if counts[CACHED]:
+            text += f"（缓存 {counts[CACHED]}）"
+        if counts[FAILED]:
+            text += f"，失败 {counts[FAILED]}"
+        if counts[CANCELLED]:
+            text += f"，取消 {counts[CANCELLED]}"
+        return text
+
+    # ---------- 依赖 ----------
+
+    def when_ready(self, key: str, submit):
+        """
+        依赖全部满足后调用 submit()（没有依赖时立即调用）；有依赖未成功时不调用，
+        任务以“取消”结束并发布结果事件。submit 可能在完成最后一个依赖的线程中被调用。
+        """
+        deps = self.dependencies.get(key, [])
+        if not deps:
+            submit()
+            return
+        pending = [len(deps)]
+        lock = threading.Lock()
+
+        def dep_done(future, dep):
+            if future.result() not in SATISFIED_STATES:
+                self.skip(key, f"依赖 {os.path.basename(dep)} 未成功构建，已跳过。")
+                return
+            with lock:
+                pending[0] -= 1
+                ready = pending[0] == 0
+            if ready and self.states.get(key) == QUEUED:
+                submit()
+
+        for dep in deps:
+            self._futures[dep].add_done_callback(lambda future, dep=dep: dep_done(future, dep))
+
+    def skip(self, key: str, reason: str):
+        """不运行任务，直接以“取消”结束（依赖未满足）"""
+        # 先在锁内认领 QUEUED→CANCELLED，只有认领成功的一方发布结果事件：
+        # 两个依赖在不同线程中同时失败时不会重复发布
+        if not self._transition(key, CANCELLED, expected=QUEUED):
+            return
+        self.reasons[key] = reason
+        self.events.publish(BuildEvent(key, RESULT, f"取消  0.0s  {reason}", LEVEL_WARNING,
+                                       metrics={'success': False, 'state': CANCELLED, 'duration_s': 0.0}))
+        self._settle(key, CANCELLED)
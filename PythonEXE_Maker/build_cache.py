@@ -0,0 +1,327 @@
+import os
+import ast
+import json
+import time
+import shutil
+import hashlib
+import logging
+import tempfile
+import threading
+
+from app_paths import data_dir
+
+# 缓存默认上限（MB），可通过环境变量 PYEXE_MAKER_CACHE_MAX_MB 调整
+DEFAULT_CACHE_MAX_MB = 2048
+
+
+def _hash_file(h, path: str):
+    """把文件内容分块写入哈希对象"""
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            h.update(chunk)
+
+
+def _hash_tree(h, path: str):
+    """把目录树（相对路径 + 内容）写入哈希对象"""
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for name in sorted(files):
+            file_path = os.path.join(root, name)
+            h.update(os.path.relpath(file_path, path).encode('utf-8') + b'\0')
+            _hash_file(h, file_path)
+
+
+def artifact_size(path: str) -> int:
+    """构建产物的大小（字节）：onefile 为单个文件，onedir 为整个目录"""
+    if not os.path.isdir(path):
+        return os.path.getsize(path)
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def _remove_path(path: str):
+    if os.path.isdir(path) and not os.path.islink(path):
+        shutil.rmtree(path, ignore_errors=True)
+    elif os.path.lexists(path):
+        os.remove(path)
+
+
+def _copy_artifact(src: str, dest: str):
+    """
+    复制构建产物（文件或目录）：先复制到目标旁的临时位置，完成后再替换目标，
+    目标不会出现复制到一半的内容；复制失败时目标保持原样。
+    """
+    parent = os.path.dirname(dest) or '.'
+    tmp_dir = tempfile.mkdtemp(prefix='.' + os.path.basename(dest) + '.tmp-', dir=parent)
+    try:
+        tmp_path = os.path.join(tmp_dir, os.path.basename(dest))
+        if os.path.isdir(src):
+            shutil.copytree(src, tmp_path, symlinks=True)
+        else:
+            shutil.copy2(src, tmp_path)
+        if os.path.isdir(tmp_path) or os.path.isdir(dest):
+            # 目录无法直接替换非空目录：旧内容先移开再删除
+            if os.path.lexists(dest):
+                old_path = os.path.join(tmp_dir, 'old')
+                os.replace(dest, old_path)
+        os.replace(tmp_path, dest)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def resolve_local_module(root_dir: str, base_dir: str, level: int, name: str) -> list:
+    """将 import 语句解析为 root_dir 下真实存在的本地 .py 文件"""
+    if level:
+        search_dir = base_dir
+        for _ in range(level - 1):
+            search_dir = os.path.dirname(search_dir)
+    else:
+        search_dir = root_dir
+
+    found = []
+    parts = [p for p in name.split('.') if p]
+    current = search_dir
+    for part in parts:
+        package_init = os.path.join(current, part, '__init__.py')
+        module_file = os.path.join(current, part + '.py')
+        if os.path.isfile(package_init):
+            found.append(package_init)
+            current = os.path.join(current, part)
+        elif os.path.isfile(module_file):
+            found.append(module_file)
+            break
+        else:
+            break
+    return found
+
+
+def find_local_imports(script_path: str) -> list:
+    """递归查找脚本依赖的本地模块（位于脚本所在目录树内），返回排序后的绝对路径列表"""
+    script_path = os.path.abspath(script_path)
+    root_dir = os.path.dirname(script_path)
+    seen = set()
+    stack = [script_path]
+
+    while stack:
+        path = stack.pop()
+        if path in seen:
+            continue
+        seen.add(path)
+        try:
+            with open(path, 'rb') as f:
+                tree = ast.parse(f.read(), filename=path)
+        except (OSError, SyntaxError, ValueError):
+            continue
+
+        base_dir = os.path.dirname(path)
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                names = [(0, alias.name) for alias in node.names]
+            elif isinstance(node, ast.ImportFrom):
+                module = node.module or ''
+                names = [(node.level, module)]
+                names += [(node.level, f"{module}.{alias.name}" if module else alias.name)
+                          for alias in node.names]
+            else:
+                continue
+            for level, name in names:
+                for candidate in resolve_local_module(root_dir, base_dir, level, name):
+                    if candidate not in seen:
+                        stack.append(candidate)
+
+    seen.discard(script_path)
+    return sorted(seen)
+
+
+class BuildCache:
+    """
+    按内容寻址的构建缓存：
+    键 = 脚本及其本地依赖、PyInstaller 参数、图标、版本信息、解释器/PyInstaller 版本 的哈希；
+    值 = 构建产物。超出容量上限时按最近最少使用（LRU）淘汰。
+    存储时先复制到临时目录再整体换入；正在恢复的条目被固定（引用计数），淘汰与清空会跳过它。
+    """
+
+    INDEX_FILE = 'index.json'
+
+    def __init__(self, cache_dir: str = None, max_bytes: int = None):
+        self.cache_dir = cache_dir or data_dir('build_cache')
+        os.makedirs(self.cache_dir, exist_ok=True)
+        if max_bytes is None:
+            max_mb = int(os.environ.get('PYEXE_MAKER_CACHE_MAX_MB', DEFAULT_CACHE_MAX_MB))
+            max_bytes = max_mb * 1024 * 1024
+        self.max_bytes = max_bytes
+
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = self._load_index()
+        # 正在恢复的条目：键 -> 引用计数
+        self._pins = {}
+
+    # ---------- 索引 ----------
+    def _index_path(self) -> str:
+        return os.path.join(self.cache_dir, self.INDEX_FILE)
+
+    def _load_index(self) -> dict:
+        try:
+            with open(self._index_path(), 'r', encoding='utf-8') as f:
+                return json.load(f).get('entries', {})
+        except (OSError, ValueError):
+            return {}
+
+    def _save_index(self):
+        tmp_path = self._index_path() + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'entries': self._entries}, f)
+        os.replace(tmp_path, self._index_path())
+
+    def _entry_dir(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    # ---------- 缓存键 ----------
+    def compute_key(self, script_path: str, options: list, icon_path: str = None,
+                    version_info: tuple = (), toolchain_id: str = '') -> str:
+        """计算一次构建的缓存键（toolchain_id 标识解释器与 PyInstaller 版本）"""
+        h = hashlib.sha256()
+        h.update(toolchain_id.encode('utf-8') + b'\0')
+
+        # 参数列表（--distpath 只影响产物位置，不影响产物内容）
+        skip_next = False
+        for opt in options:
+            if skip_next:
+                skip_next = False
+                continue
+            if opt == '--distpath':
+                skip_next = True
+                continue
+            h.update(opt.encode('utf-8') + b'\0')
+            self._hash_data_option(h, opt)
+
+        # 脚本及其本地依赖
+        script_dir = os.path.dirname(os.path.abspath(script_path))
+        for path in [os.path.abspath(script_path)] + find_local_imports(script_path):
+            h.update(os.path.relpath(path, script_dir).encode('utf-8') + b'\0')
+            _hash_file(h, path)
+
+        # 图标与版本信息
+        if icon_path and os.path.isfile(icon_path):
+            h.update(b'icon\0')
+            _hash_file(h, icon_path)
+        h.update(repr(tuple(version_info)).encode('utf-8'))
+        return h.hexdigest()
+
+    @staticmethod
+    def _hash_data_option(h, opt: str):
+        """--add-data/--add-binary 的源文件内容也计入缓存键"""
+        for prefix in ('--add-data=', '--add-binary='):
+            if opt.startswith(prefix):
+                value = opt[len(prefix):]
+                sep = ';' if ';' in value else ':'
+                src = value.rsplit(sep, 1)[0]
+                if os.path.isfile(src):
+                    _hash_file(h, src)
+                elif os.path.isdir(src):
+                    _hash_tree(h, src)
+
+    # ---------- 查询 / 存储 ----------
+    def restore(self, key: str, dest_path: str) -> bool:
+        """命中时把缓存产物（文件或目录）恢复到 dest_path，返回是否命中"""
+        with self._lock:
+            entry = self._entries.get(key)
+            cached_file = os.path.join(self._entry_dir(key), entry['file']) if entry else None
+            if not cached_file or not os.path.exists(cached_file):
+                if entry:
+                    self._entries.pop(key, None)
+                self.misses += 1
+                return False
+            entry['last_used'] = time.time()
+            self._pins[key] = self._pins.get(key, 0) + 1
+            self._save_index()
+
+        try:
+            os.makedirs(os.path.dirname(dest_path) or '.', exist_ok=True)
+            _copy_artifact(cached_file, dest_path)
+        except OSError as e:
+            logging.warning(f"恢复缓存产物失败: {e}")
+            with self._lock:
+                self.misses += 1
+            return False
+        finally:
+            with self._lock:
+                self._pins[key] -= 1
+                if not self._pins[key]:
+                    del self._pins[key]
+        with self._lock:
+            self.hits += 1
+        return True
+
+    def store(self, key: str, artifact_path: str):
+        """保存构建产物（onefile 的 EXE 或 onedir 的整个目录），并在超出容量时执行 LRU 淘汰"""
+        entry_dir = self._entry_dir(key)
+        file_name = os.path.basename(artifact_path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry['file'] == file_name and os.path.exists(os.path.join(entry_dir, file_name)):
+                # 同一个键的内容相同（并发任务已存入）：只更新使用时间
+                entry['last_used'] = time.time()
+                self._save_index()
+                return
+
+        # 复制到临时目录，完成后在锁内整体换入，恢复方不会看到复制到一半的条目
+        os.makedirs(os.path.dirname(entry_dir), exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(prefix=key + '.tmp-', dir=os.path.dirname(entry_dir))
+        try:
+            if os.path.isdir(artifact_path):
+                shutil.copytree(artifact_path, os.path.join(tmp_dir, file_name), symlinks=True)
+            else:
+                shutil.copy2(artifact_path, os.path.join(tmp_dir, file_name))
+            size = artifact_size(artifact_path)
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry and os.path.exists(os.path.join(entry_dir, entry['file'])):
+                    entry['last_used'] = time.time()
+                else:
+                    # 目录中可能残留索引之外的旧内容（未被固定，可以直接替换）
+                    _remove_path(entry_dir)
+                    os.replace(tmp_dir, entry_dir)
+                    self._entries[key] = {'file': file_name, 'size': size, 'last_used': time.time()}
+                    self._evict()
+                self._save_index()
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    def _evict(self):
+        """按 last_used 从旧到新淘汰（跳过正在恢复的条目），直到总大小不超过上限"""
+        total = sum(entry['size'] for entry in self._entries.values())
+        for key, entry in sorted(self._entries.items(), key=lambda kv: kv[1]['last_used']):
+            if total <= self.max_bytes:
+                break
+            if key in self._pins:
+                continue
+            shutil.rmtree(self._entry_dir(key), ignore_errors=True)
+            del self._entries[key]
+            total -= entry['size']
+            logging.info(f"构建缓存已淘汰: {entry['file']} ({entry['size'] // 1024} KB)")
+
+    def clear(self):
+        """清空全部缓存（正在恢复的条目保留）"""
+        with self._lock:
+            for key in list(self._entries):
+                if key in self._pins:
+                    continue
+                shutil.rmtree(self._entry_dir(key), ignore_errors=True)
+                del self._entries[key]
+            self._save_index()
+
+    def stats_text(self) -> str:
+        """命中/未命中统计文本"""
+        with self._lock:
+            total = sum(entry['size'] for entry in self._entries.values())
+        return (f"命中 {self.hits} 次，未命中 {self.misses} 次，"
+                f"占用 {total // (1024 * 1024)} MB / {self.max_bytes // (1024 * 1024)} MB")
@@ -0,0 +1,195 @@
+"""
+结构化构建事件：转换引擎发出的每条状态、PyInstaller 输出、阶段切换、进度与结果都是一个 BuildEvent，
+经 EventBus 分发给各订阅者（界面日志通道、日志文件与 NDJSON 导出、批次指标、无界面模式的结果）。
+
+- 每个事件只创建一个对象（__slots__，无 __dict__），所有订阅者收到的是同一个对象，不复制；
+  事件创建后不应再修改；
+- 订阅者列表为不可变元组，增删订阅者时整体替换，发布事件不需要加锁；
+- 订阅者在发布事件的线程（工作线程、构建引擎或收尾线程）中被调用，应只做入队或计数这类轻量操作。
+
+事件可用 to_json() 逐行写成 NDJSON（日志后端为每个批次写入 events.ndjson），离线分析时用 load_events() 读回。
+"""
+import json
+import time
+import logging
+import threading
+
+# 事件类型
+STATUS = 'status'        # 转换引擎自身的状态信息
+OUTPUT = 'output'        # PyInstaller 输出的一行
+PHASE = 'phase'          # 进入新阶段（metrics 中有已分析模块数）
+PROGRESS = 'progress'    # 估计进度变化（metrics 中有 percent）
+RESULT = 'result'        # 任务结束（metrics 中有成功与否、耗时、重试次数、产物大小等）
+
+# 日志级别
+LEVEL_INFO = 0
+LEVEL_WARNING = 1
+LEVEL_ERROR = 2
+LEVEL_NAMES = {LEVEL_INFO: "INFO", LEVEL_WARNING: "WARNING", LEVEL_ERROR: "ERROR"}
+# 与 logging 模块级别的对应
+LOGGING_LEVELS = {LEVEL_INFO: logging.INFO, LEVEL_WARNING: logging.WARNING, LEVEL_ERROR: logging.ERROR}
+
+# monotonic 时间戳与墙钟时间的差（导出与写日志时换算）
+_EPOCH_OFFSET = time.time() - time.monotonic()
+
+
+def detect_level(message: str) -> int:
+    """根据 PyInstaller 输出格式粗略判断日志级别"""
+    if ' ERROR: ' in message or message.startswith('ERROR'):
+        return LEVEL_ERROR
+    if ' WARNING: ' in message or message.startswith('WARNING'):
+        return LEVEL_WARNING
+    return LEVEL_INFO
+
+
+class BuildEvent:
+    """一个构建事件：任务键（脚本路径）、monotonic 时间戳、类型、阶段、级别、文本与指标"""
+
+    __slots__ = ('task', 'ts', 'kind', 'phase', 'level', 'message', 'metrics')
+
+    def __init__(self, task: str, kind: str, message: str = None, level: int = LEVEL_INFO,
+                 phase: str = None, metrics: dict = None, ts: float = None):
+        self.task = task
+        self.ts = time.monotonic() if ts is None else ts
+        self.kind = kind
+        self.phase = phase
+        self.level = level
+        self.message = message
+        self.metrics = metrics
+
+    @property
+    def wall_time(self) -> float:
+        """事件发生时的墙钟时间（time.time() 的刻度）"""
+        return self.ts + _EPOCH_OFFSET
+
+    def to_dict(self) -> dict:
+        data = {'task': self.task, 'ts': round(self.ts, 6), 'time': round(self.wall_time, 3),
+                'kind': self.kind, 'level': LEVEL_NAMES[self.level]}
+        if self.phase is not None:
+            data['phase'] = self.phase
+        if self.message is not None:
+            data['message'] = self.message
+        if self.metrics:
+            data['metrics'] = self.metrics
+        return data
+
+    def to_json(self) -> str:
+        """一行 NDJSON"""
+        return json.dumps(self.to_dict(), ensure_ascii=False, separators=(',', ':'))
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'BuildEvent':
+        levels = {name: level for level, name in LEVEL_NAMES.items()}
+        return cls(data['task'], data['kind'], data.get('message'), levels.get(data.get('level'), LEVEL_INFO),
+                   data.get('phase'), data.get('metrics'), data['ts'])
+
+    def __repr__(self):
+        return f"BuildEvent({self.kind}, {self.task!r}, {self.message!r})"
+
+
+def load_events(path: str) -> list:
+    """读回 NDJSON 文件中的事件（跳过无法解析的行）"""
+    events = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                events.append(BuildEvent.from_dict(json.loads(line)))
+            except (ValueError, KeyError, TypeError):
+                continue
+    return events
+
+
+class EventBus:
+    """事件的扇出分发：publish(event) 依次以同一个事件对象调用每个订阅者"""
+
+    def __init__(self):
+        self._subscribers = ()
+        self._lock = threading.Lock()
+
+    def subscribe(self, subscriber):
+        with self._lock:
+            if subscriber not in self._subscribers:
+                self._subscribers = self._subscribers + (subscriber,)
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers = tuple(s for s in self._subscribers if s != subscriber)
+
+    def publish(self, event: BuildEvent):
+        for subscriber in self._subscribers:
+            try:
+                subscriber(event)
+            except Exception:
+                logging.exception("构建事件订阅者出错")
+
+
+class TaskMetrics:
+    """一个任务的事件统计"""
+
+    __slots__ = ('output_lines', 'warnings', 'errors', 'modules', 'phase', 'percent', 'result')
+
+    def __init__(self):
+        self.output_lines = 0
+        self.warnings = 0
+        self.errors = 0
+        self.modules = 0
+        self.phase = None
+        self.percent = 0
+        self.result = None
+
+    def to_dict(self) -> dict:
+        return {'output_lines': self.output_lines, 'warnings': self.warnings, 'errors': self.errors,
+                'modules': self.modules}
+
+
+class EventMetrics:
+    """
+    订阅者：按任务统计输出行数、警告与错误数、已分析模块数、当前阶段与进度。
+    同一任务的事件在任一时刻只由一个线程发布，不同任务各自的计数互不干扰，无需加锁。
+    """
+
+    def __init__(self):
+        self.tasks = {}
+
+    def __call__(self, event: BuildEvent):
+        metrics = self.tasks.get(event.task)
+        if metrics is None:
+            metrics = self.tasks.setdefault(event.task, TaskMetrics())
+        kind = event.kind
+        if kind == OUTPUT or kind == STATUS:
+            if kind == OUTPUT:
+                metrics.output_lines += 1
+            if event.level == LEVEL_WARNING:
+                metrics.warnings += 1
+            elif event.level == LEVEL_ERROR:
+                metrics.errors += 1
+        elif kind == PHASE:
+            metrics.phase = event.phase
+            metrics.modules = event.metrics['modules']
+        elif kind == PROGRESS:
+            metrics.percent = event.metrics['percent']
+        elif kind == RESULT:
+            metrics.result = event.metrics
+            metrics.modules = event.metrics.get('modules') or metrics.modules
+
+    def get(self, task: str) -> TaskMetrics:
+        return self.tasks.get(task) or TaskMetrics()
+
+    def totals(self) -> dict:
+        """所有任务的合计"""
+        return {
+            'output_lines': sum(m.output_lines for m in self.tasks.values()),
+            'warnings': sum(m.warnings for m in self.tasks.values()),
+            'errors': sum(m.errors for m in self.tasks.values()),
+        }
+
+    def clear(self):
+        self.tasks = {}
+
+
+_shared_bus = EventBus()
+
+
+def event_bus() -> EventBus:
+    """进程内共享的事件总线（转换任务默认发布到这里，日志后端在安装时订阅）"""
+    return _shared_bus
@@ -0,0 +1,278 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from statistics import median
+
+from app_paths import data_dir
+
+# 可选依赖：非 Linux 系统上读取子进程峰值内存与 CPU 时间
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# PyInstaller 在进入每个构建目标时输出 "checking <目标>"，以此作为阶段边界
+PHASE_MARKER = re.compile(r'\bchecking (Analysis|PYZ|PKG|EXE|COLLECT|MERGE)\b')
+
+# 图表与明细中阶段的显示顺序
+PHASE_ORDER = ['toolchain', 'scan', 'cache', 'assets', 'startup', 'Analysis', 'PYZ', 'PKG', 'EXE',
+               'COLLECT', 'MERGE', 'profile', 'cleanup']
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS builds (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started_at REAL NOT NULL,
+    script_path TEXT NOT NULL,
+    script_hash TEXT,
+    exe_name TEXT,
+    options TEXT,
+    toolchain TEXT,
+    success INTEGER NOT NULL,
+    cached INTEGER NOT NULL DEFAULT 0,
+    duration_s REAL,
+    artifact_size_kb INTEGER,
+    peak_rss_kb INTEGER,
+    phases TEXT,
+    modules INTEGER,
+    cpu_s REAL
+);
+CREATE INDEX IF NOT EXISTS builds_by_script ON builds(script_path, started_at);
+"""
+
+# 旧版本数据库缺少的列：(列名, 类型)
+MIGRATIONS = [('modules', 'INTEGER'), ('cpu_s', 'REAL')]
+
+
+def hash_script(script_path: str) -> str:
+    """脚本内容的 SHA-256（读取失败时返回空字符串）"""
+    h = hashlib.sha256()
+    try:
+        with open(script_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                h.update(chunk)
+    except OSError:
+        return ''
+    return h.hexdigest()
+
+
+def read_peak_rss_kb(pid: int):
+    """读取进程迄今为止的峰值常驻内存（KB），无法读取时返回 None"""
+    try:
+        with open(f'/proc/{pid}/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except (OSError, ValueError, IndexError):
+        pass
+    if psutil:
+        try:
+            info = psutil.Process(pid).memory_info()
+            return getattr(info, 'peak_wset', info.rss) // 1024
+        except Exception:
+            pass
+    return None
+
+
+def read_cpu_seconds(pid: int):
+    """读取进程（含已回收子进程）累计消耗的 CPU 时间（秒），无法读取时返回 None"""
+    try:
+        with open(f'/proc/{pid}/stat', 'r') as f:
+            # comm 字段可能包含空格，从最后一个 ')' 之后开始解析
+            fields = f.read().rsplit(')', 1)[1].split()
+        ticks = sum(int(value) for value in fields[11:15])
+        return ticks / os.sysconf('SC_CLK_TCK')
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    if psutil:
+        try:
+            times = psutil.Process(pid).cpu_times()
+            return times.user + times.system + times.children_user + times.children_system
+        except Exception:
+            pass
+    return None
+
+
+class PhaseTimer:
+    """记录一次构建中各阶段的耗时（同名阶段多次出现时累加）"""
+
+    def __init__(self):
+        self.started_at = time.time()
+        self._t0 = time.perf_counter()
+        self._current = None
+        self._current_start = 0.0
+        self.durations = {}
+
+    @property
+    def current(self):
+        return self._current
+
+    def begin(self, name: str):
+        """结束当前阶段并开始新阶段"""
+        now = time.perf_counter()
+        self._close(now)
+        self._current = name
+        self._current_start = now
+
+    def end(self):
+        """结束当前阶段"""
+        self._close(time.perf_counter())
+        self._current = None
+
+    def feed(self, line: str):
+        """根据 PyInstaller 的日志标记切换阶段"""
+        match = PHASE_MARKER.search(line)
+        if match and match.group(1) != self._current:
+            self.begin(match.group(1))
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._t0
+
+    def current_elapsed(self) -> float:
+        """当前阶段已进行的时间（秒）"""
+        if self._current is None:
+            return 0.0
+        return time.perf_counter() - self._current_start
+
+    def _close(self, now: float):
+        if self._current is not None:
+            self.durations[self._current] = (
+                self.durations.get(self._current, 0.0) + now - self._current_start
+            )
+
+
+class ProcessSampler:
+    """在输出处理过程中节流采样子进程的峰值内存与累计 CPU 时间"""
+
+    def __init__(self, interval_s: float = 0.2):
+        self.interval_s = interval_s
+        self.pid = None
+        self.peak_kb = None
+        self.cpu_s = None
+        self._next_sample = 0.0
+
+    def attach(self, pid: int):
+        self.pid = pid
+        self._next_sample = 0.0
+
+    def sample(self, force: bool = False):
+        if self.pid is None:
+            return
+        now = time.perf_counter()
+        if not force and now < self._next_sample:
+            return
+        self._next_sample = now + self.interval_s
+        value = read_peak_rss_kb(self.pid)
+        if value is not None and (self.peak_kb is None or value > self.peak_kb):
+            self.peak_kb = value
+        cpu = read_cpu_seconds(self.pid)
+        if cpu is not None and (self.cpu_s is None or cpu > self.cpu_s):
+            self.cpu_s = cpu
+
+
+def find_regressions(durations: list, window: int = 5, threshold: float = 1.3) -> set:
+    """返回耗时超过前 window 次构建中位数 threshold 倍的构建下标"""
+    regressions = set()
+    for i in range(1, len(durations)):
+        previous = [d for d in durations[max(0, i - window):i] if d]
+        if previous and durations[i] and durations[i] > median(previous) * threshold:
+            regressions.add(i)
+    return regressions
+
+
+class BuildHistory:
+    """构建历史数据库（SQLite，跨会话持久化），工作线程写入、GUI 线程读取"""
+
+    def __init__(self, db_path: str = None):
+        self.db_path = db_path or os.path.join(data_dir(), 'history.sqlite3')
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock:
+            try:
+                self._conn.execute('PRAGMA journal_mode=WAL')
+            except sqlite3.DatabaseError:
+                pass
+            self._conn.executescript(SCHEMA)
+            columns = {row[1] for row in self._conn.execute('PRAGMA table_info(builds)')}
+            for name, column_type in MIGRATIONS:
+                if name not in columns:
+                    self._conn.execute(f'ALTER TABLE builds ADD COLUMN {name} {column_type}')
+            self._conn.commit()
+
+    def record(self, script_path: str, exe_name: str, success: bool, duration_s: float, phases: dict,
+               started_at: float = None, script_hash: str = '', options: list = None, toolchain: str = '',
+               cached: bool = False, artifact_size_kb: int = None, peak_rss_kb: int = None,
+               modules: int = None, cpu_s: float = None):
+        """写入一次构建记录"""
+        row = (
+            started_at or time.time(), script_path, script_hash, exe_name,
+            json.dumps(options or []), toolchain, int(success), int(cached),
+            round(duration_s, 3), artifact_size_kb, peak_rss_kb,
+            json.dumps({name: round(value, 3) for name, value in phases.items()}),
+            modules, round(cpu_s, 2) if cpu_s is not None else None
+        )
+        with self._lock:
+            self._conn.execute(
+                'INSERT INTO builds (started_at, script_path, script_hash, exe_name, options, toolchain, '
+                'success, cached, duration_s, artifact_size_kb, peak_rss_kb, phases, modules, cpu_s) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', row
+            )
+            self._conn.commit()
+
+    def scripts(self) -> list:
+        """返回有历史记录的脚本：[(脚本路径, 构建次数, 最近构建时间)]，最近构建的在前"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT script_path, COUNT(*), MAX(started_at) FROM builds '
+                'GROUP BY script_path ORDER BY MAX(started_at) DESC'
+            ).fetchall()
+        return [tuple(row) for row in rows]
+
+    def builds(self, script_path: str, limit: int = 200) -> list:
+        """返回某脚本最近 limit 次构建（按时间先后排列），phases 与 options 已解析"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT * FROM builds WHERE script_path = ? ORDER BY started_at DESC LIMIT ?',
+                (script_path, limit)
+            ).fetchall()
+        builds = []
+        for row in reversed(rows):
+            build = dict(row)
+            build['phases'] = json.loads(build['phases'] or '{}')
+            build['options'] = json.loads(build['options'] or '[]')
+            builds.append(build)
+        return builds
+
+    def phase_profile(self, script_path: str, samples: int = 5):
+        """
+        最近 samples 次成功（非缓存命中）构建中各阶段耗时的中位数，以及分析模块数的中位数；
+        没有可用记录时返回 ({}, None)
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT phases, modules FROM builds WHERE script_path = ? AND success = 1 AND cached = 0 '
+                'ORDER BY started_at DESC LIMIT ?', (script_path, samples)
+            ).fetchall()
+        if not rows:
+            return {}, None
+        values = {}
+        for row in rows:
+            for name, seconds in json.loads(row['phases'] or '{}').items():
+                values.setdefault(name, []).append(seconds)
+        modules = [row['modules'] for row in rows if row['modules']]
+        profile = {name: median(seconds) for name, seconds in values.items()}
+        return profile, (int(median(modules)) if modules else None)
+
+    def clear(self):
+        """删除全部历史记录"""
+        with self._lock:
+            self._conn.execute('DELETE FROM builds')
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
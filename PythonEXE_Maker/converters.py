@@ -1,30 +1,71 @@
 import os
-import sys
+import time
 import subprocess
 import logging
+from collections import deque
 
 from PyQt5.QtCore import QRunnable, pyqtSignal, QObject
 
-# 若要转换图标，需要尝试导入 Pillow
-try:
-    from PIL import Image
-except ImportError:
-    Image = None
+from toolchain import shared_toolchain_service
+from workspace import TaskWorkspace
+from assets import AssetCache
+from build_history import PhaseTimer, ProcessSampler, hash_script
+from build_cache import artifact_size
+from progress import ProgressEstimator
+from startup_profiler import profile_startup, summary_lines
+from build_events import (
+    BuildEvent, event_bus, detect_level, STATUS, OUTPUT, PHASE, PROGRESS, RESULT,
+    LEVEL_INFO, LEVEL_WARNING, LEVEL_ERROR
+)
+from batch import SUCCEEDED, CACHED, FAILED as STATE_FAILED, CANCELLED as STATE_CANCELLED
+from supervisor import (
+    ProcessResult, EXITED, CANCELLED, SPAWN_FAILED, FAILED, DEFAULT_WALL_TIMEOUT_S, DEFAULT_IDLE_TIMEOUT_S,
+    DEFAULT_MAX_RETRIES, RETRY_BACKOFF_S, new_session_kwargs, kill_group, shared_watchdog, is_transient
+)
+
+# 输出形式：onefile 为单个 EXE（每次启动解包到临时目录），onedir 为 EXE 加依赖目录（启动更快）
+OUTPUT_LAYOUTS = ('onefile', 'onedir')
+# 判断失败是否为暂时性故障时检查的 PyInstaller 最后输出行数
+OUTPUT_TAIL_LINES = 50
 
 
 class WorkerSignals(QObject):
-    """定义 Worker 线程的信号"""
-    status_updated = pyqtSignal(str)               # 用于传递状态信息字符串
-    progress_updated = pyqtSignal(int)             # 用于更新进度条
+    """定义 Worker 线程的信号（状态、输出与进度以 BuildEvent 发布到事件总线）"""
     conversion_finished = pyqtSignal(str, int)     # (exe_path, exe_size)
     conversion_failed = pyqtSignal(str)            # 传递错误信息
+    finished = pyqtSignal()                        # 任务结束（无论成功、失败或取消）
+
+
+class BuildContext:
+    """一次构建在启动 PyInstaller 之前与之后两个阶段间传递的状态"""
+
+    def __init__(self):
+        self.exe_name = None
+        self.exe_path = None
+        self.artifact_path = None
+        self.history_options = []
+        self.cache_key = None
+        self.workspace = None
+        self.work_stamp = None
+        # PyInstaller 的目标（为 None 时为任务脚本）
+        self.target = None
+        self.build_ok = False
+        self.succeeded = False
+        self.exe_size = None
+        self.error_message = "转换失败，请查看上面的错误信息。"
+        # PyInstaller 未成功结束的原因（写入批次摘要）
+        self.outcome = None
 
 
 class ConvertRunnable(QRunnable):
     """执行转换任务的 Runnable 类（配合 QThreadPool 使用）"""
 
     def __init__(self, script_path, convert_mode, output_dir, exe_name, icon_path,
-                 file_version, copyright_info, extra_library, additional_options):
+                 file_version, copyright_info, extra_library, additional_options,
+                 build_cache=None, work_dirs=None, toolchain=None, warm_pool=None, assets=None,
+                 events=None, history=None, import_scanner=None, output_layout='onefile',
+                 startup_runs=0, engine=None, wall_timeout=DEFAULT_WALL_TIMEOUT_S,
+                 idle_timeout=DEFAULT_IDLE_TIMEOUT_S, max_retries=DEFAULT_MAX_RETRIES, retry_budget=None):
         super().__init__()
         self.script_path = script_path
         self.convert_mode = convert_mode
@@ -35,99 +76,394 @@ class ConvertRunnable(QRunnable):
         self.copyright_info = copyright_info
         self.extra_library = extra_library
         self.additional_options = additional_options
+        # 构建缓存（为 None 时表示绕过缓存）
+        self.build_cache = build_cache
+        # 增量构建工作目录管理（为 None 时每次 --clean 完整构建）
+        self.work_dirs = work_dirs
+        # 会话级共享的工具链探测服务
+        self.toolchain = toolchain or shared_toolchain_service()
+        self.toolchain_info = None
+        # 预热的 PyInstaller 进程池（为 None 时每次启动新进程）
+        self.warm_pool = warm_pool
+        # 异步构建引擎（为 None 时在线程池线程中同步读取 PyInstaller 输出）与当前子进程的句柄
+        self.engine = engine
+        self._handle = None
+        # 子进程监管：总时限与无输出时限（秒，0 表示不限制）、暂时性故障的最大重试次数、
+        # 会话/批次共享的重试预算（为 None 时不限制总数）与同步执行时的看门狗监视
+        self.wall_timeout = wall_timeout
+        self.idle_timeout = idle_timeout
+        self.max_retries = max_retries
+        self.retry_budget = retry_budget
+        self.retries = 0
+        self._watch = None
+        self._output_tail = deque(maxlen=OUTPUT_TAIL_LINES)
+        # 批次级预先准备好的图标/版本信息文件（为 None 时由任务自行准备）
+        self.assets = assets
+        # 构建事件的发布目标（默认为进程内共享的事件总线）
+        self.events = events or event_bus()
+        # 构建历史数据库（为 None 时不记录）
+        self.history = history
+        # 导入预扫描服务（为 None 时不扫描）与本任务脚本的扫描结论
+        self.import_scanner = import_scanner
+        self.import_scan = None
+        # 输出形式（onefile / onedir）
+        self.output_layout = output_layout
+        # 构建成功后测量启动耗时的启动次数（0 表示不测量）与测量结果
+        self.startup_runs = startup_runs
+        self.startup_profile = None
+        # 分阶段计时、进度估计（任务开始执行时创建）与子进程资源采样
+        self.timer = None
+        self.estimator = None
+        self.sampler = ProcessSampler()
+        self._last_percent = -1
 
         self.signals = WorkerSignals()
         self._is_running = True
+        # 是否被用户取消（结果事件中的状态据此区分“取消”与“失败”）
+        self.cancelled = False
+        # 本次结果是否来自构建缓存
+        self.cache_hit = False
+        # 所属的共享运行时打包任务（为 None 时单独构建）
+        self.bundle = None
 
     def run(self):
-        """线程池执行入口"""
-        version_file_path = None
+        """
+        线程池执行入口：准备参数并启动 PyInstaller。使用异步构建引擎时启动子进程后立即返回（不占用线程），
+        由引擎在子进程结束后调用 pyinstaller_exited；否则在当前线程中同步执行。
+        """
+        context = BuildContext()
+        self.timer = PhaseTimer()
+        self.estimator = self.create_estimator()
+        if not self._is_running:
+            # 排队期间已被取消：不做任何准备，直接报告
+            context.error_message = context.outcome = ProcessResult(CANCELLED).describe()
+            self.update_status(context.outcome, LEVEL_WARNING)
+            self.signals.conversion_failed.emit(context.outcome)
+            self.finish_build(context)
+            return
         try:
-            script_dir = os.path.dirname(self.script_path)
-            exe_name = self.exe_name or os.path.splitext(os.path.basename(self.script_path))[0]
-            output_dir = self.output_dir or script_dir
-
-            if not self.ensure_pyinstaller():
+            options = self.prepare_build(context)
+            if options is None:
+                self.finish_build(context)
                 return
+            if self.retry_budget:
+                self.retry_budget.record_build()
+            self.launch_pyinstaller(context, options)
+        except Exception as e:
+            self.report_exception(context, e)
+            self.finish_build(context)
+
+    def launch_pyinstaller(self, context, options: list, delay: float = 0.0):
+        """（在 delay 秒后）运行一次 PyInstaller，结束后交给 pyinstaller_exited"""
+        # PyInstaller 输出第一个阶段标记之前的时间计入 startup
+        self.begin_phase('startup')
+        if self.start_pyinstaller(options, lambda result: self.pyinstaller_exited(context, options, result),
+                                  context.target, delay):
+            return
+        if delay:
+            time.sleep(delay)
+        self.pyinstaller_exited(context, options, self.run_pyinstaller(options, context.target))
+
+    def pyinstaller_exited(self, context, options: list, result: ProcessResult):
+        """PyInstaller 结束：暂时性故障在重试次数与预算内重新运行，否则进入收尾"""
+        if not result.ok:
+            if not self._is_running and result.reason != CANCELLED:
+                result = ProcessResult(CANCELLED, result.returncode)
+            context.outcome = result.describe()
+            self.update_status(context.outcome, LEVEL_WARNING if result.reason == CANCELLED else LEVEL_ERROR)
+            if self.should_retry(result):
+                self.retries += 1
+                delay = RETRY_BACKOFF_S * 2 ** (self.retries - 1)
+                self.update_status(f"判定为暂时性故障，{delay:g} 秒后第 {self.retries} 次重试"
+                                   f"（最多 {self.max_retries} 次）。", LEVEL_WARNING)
+                # 被中断的构建可能留下不完整的工作目录，重试时完整构建
+                if '--clean' not in options:
+                    options = options + ['--clean']
+                self._output_tail.clear()
+                self._last_percent = -1
+                self.estimator = self.create_estimator()
+                try:
+                    self.launch_pyinstaller(context, options, delay)
+                except Exception as e:
+                    self.report_exception(context, e)
+                    self.finish_build(context)
+                return
+        self.complete_build(context, result.ok)
 
-            # 准备 PyInstaller 命令参数
-            options = self.prepare_pyinstaller_options(exe_name, output_dir)
-
-            # 处理图标（如是PNG则自动转ICO）
-            if self.icon_path:
-                icon_file = self.handle_icon(script_dir)
-                if icon_file:
-                    options.append(f'--icon={icon_file}')
+    def should_retry(self, result: ProcessResult) -> bool:
+        if not self._is_running or self.retries >= self.max_retries:
+            return False
+        if not is_transient(result, self._output_tail):
+            return False
+        if self.retry_budget and not self.retry_budget.try_acquire():
+            self.update_status("本次会话的重试预算已用完，不再重试。", LEVEL_WARNING)
+            return False
+        return True
 
-            # 生成版本信息文件
-            if self.file_version or self.copyright_info:
-                version_file_path = self.create_version_file(exe_name, script_dir)
-                if version_file_path:
-                    options.append(f'--version-file={version_file_path}')
+    def prepare_build(self, context) -> list:
+        """PyInstaller 之前的各阶段；返回完整的命令参数，无需（或无法）构建时返回 None"""
+        script_dir = os.path.dirname(self.script_path)
+        context.exe_name = exe_name = self.exe_name or os.path.splitext(os.path.basename(self.script_path))[0]
+        output_dir = self.output_dir or script_dir
+
+        self.begin_phase('toolchain')
+        if not self.ensure_pyinstaller():
+            return None
+
+        # 导入预扫描：推断隐藏导入、提前标出无法解析的模块（结果影响 PyInstaller 参数，需在计算缓存键之前）
+        if self.import_scanner:
+            self.begin_phase('scan')
+            self.scan_imports()
+
+        # 准备 PyInstaller 命令参数
+        options = self.prepare_pyinstaller_options(exe_name, output_dir)
+        context.history_options = list(options)
+        context.exe_path = exe_path = self.exe_path_for(output_dir, exe_name)
+        # onedir 的产物是包含 EXE 的整个目录
+        artifact_path = exe_path if self.output_layout != 'onedir' else os.path.dirname(exe_path)
+        context.artifact_path = artifact_path
+
+        # 查询构建缓存，命中则直接恢复产物
+        if self.build_cache:
+            self.begin_phase('cache')
+            context.cache_key = self.build_cache.compute_key(
+                self.script_path, options, self.icon_path,
+                (self.file_version, self.copyright_info),
+                self.toolchain_info.fingerprint()
+            )
+            if self.build_cache.restore(context.cache_key, artifact_path):
+                self.cache_hit = True
+                context.exe_size = artifact_size(artifact_path) // 1024
+                self.update_status(f"命中构建缓存，已恢复 EXE 文件（{self.build_cache.stats_text()}）")
+                if self.startup_runs:
+                    self.begin_phase('profile')
+                    self.measure_startup(exe_path)
+                self.report_progress(100)
+                context.succeeded = True
+                self.signals.conversion_finished.emit(exe_path, context.exe_size)
+                self.update_status(f"转换成功! EXE 文件位于: {exe_path} (大小: {context.exe_size} KB)")
+                return None
+            self.update_status(f"未命中构建缓存（{self.build_cache.stats_text()}）")
+
+        # 任务私有的临时工作区（spec、workpath）
+        self.begin_phase('assets')
+        context.workspace = workspace = TaskWorkspace(exe_name)
+
+        # 图标与版本信息文件（通常已在批次开始前准备好）
+        options += self.asset_options(exe_name)
+
+        # 增量构建：使用脚本专属的持久化工作目录
+        if self.work_dirs:
+            workpath, specpath, context.work_stamp, needs_clean = self.work_dirs.acquire(
+                self.script_path, exe_name, options
+            )
+            options += ['--workpath', workpath, '--specpath', specpath]
+            if needs_clean:
+                options.append('--clean')
+                self.update_status("脚本或参数已变化，执行完整构建。")
+            else:
+                self.update_status("复用增量构建工作目录。")
+        else:
+            options += ['--workpath', workspace.subdir('build'), '--specpath', workspace.subdir('spec')]
 
-            self.update_status("开始转换...")
-            success = self.run_pyinstaller(options)
+        self.update_status("开始转换...")
+        return options
 
+    def complete_build(self, context, success: bool):
+        """PyInstaller 结束后的处理：检查产物、写入缓存并报告结果"""
+        try:
+            context.build_ok = success
+            self.timer.end()
+            exe_path = context.exe_path
             if success:
                 # 检查生成的exe文件
-                exe_path = os.path.join(output_dir, exe_name + '.exe')
                 if os.path.exists(exe_path):
-                    exe_size = os.path.getsize(exe_path) // 1024
-                    self.signals.conversion_finished.emit(exe_path, exe_size)
-                    self.update_status(f"转换成功! EXE 文件位于: {exe_path} (大小: {exe_size} KB)")
+                    context.exe_size = artifact_size(context.artifact_path) // 1024
+                    if context.cache_key:
+                        self.begin_phase('cache')
+                        self.store_in_cache(context.cache_key, context.artifact_path)
+                    if self.startup_runs:
+                        self.begin_phase('profile')
+                        self.measure_startup(exe_path)
+                    context.succeeded = True
+                    self.report_progress(100)
+                    self.signals.conversion_finished.emit(exe_path, context.exe_size)
+                    self.update_status(f"转换成功! EXE 文件位于: {exe_path} (大小: {context.exe_size} KB)")
                 else:
-                    error_message = "转换完成，但未找到生成的 EXE 文件。"
-                    self.update_status(error_message)
-                    self.signals.conversion_failed.emit(error_message)
+                    context.error_message = "转换完成，但未找到生成的 EXE 文件。"
+                    self.update_status(context.error_message, LEVEL_ERROR)
+                    self.signals.conversion_failed.emit(context.error_message)
             else:
-                error_message = "转换失败，请查看上面的错误信息。"
-                self.update_status(error_message)
-                self.signals.conversion_failed.emit(error_message)
+                self.update_status(context.error_message, LEVEL_ERROR)
+                self.signals.conversion_failed.emit(context.error_message)
+        except Exception as e:
+            self.report_exception(context, e)
+        finally:
+            self.finish_build(context)
+
+    def report_exception(self, context, e: Exception):
+        context.error_message = f"转换过程中出现异常: {e}"
+        self.update_status(context.error_message, LEVEL_ERROR)
+        self.signals.conversion_failed.emit(context.error_message)
 
+    def finish_build(self, context):
+        """任务结束（无论成功、失败或取消）：释放工作目录、清理工作区、记录历史"""
+        self._is_running = False
+        self.begin_phase('cleanup')
+        if context.work_stamp:
+            self.work_dirs.release(self.script_path, context.exe_name, context.work_stamp, context.build_ok)
+        self.cleanup_files(context.workspace)
+        self.timer.end()
+        self.record_history(context.exe_name, context.history_options, context.succeeded, context.exe_size)
+        if context.succeeded:
+            self.publish_result(True, f"{context.exe_path} ({context.exe_size} KB)", exe_size=context.exe_size)
+        else:
+            self.publish_result(False, context.outcome or context.error_message)
+        self.signals.finished.emit()
+
+    def publish_result(self, success: bool, detail: str, retries: int = None, exe_size: int = None):
+        """发布本任务的结果事件（日志后端据此写批次摘要）"""
+        retries = self.retries if retries is None else retries
+        flags = ('  [缓存]' if self.cache_hit else '') + (f'  [重试 {retries} 次]' if retries else '')
+        elapsed = self.timer.elapsed() if self.timer else 0.0
+        if success:
+            state = CACHED if self.cache_hit else SUCCEEDED
+        else:
+            state = STATE_CANCELLED if self.cancelled else STATE_FAILED
+        metrics = {
+            'state': state, 'success': success, 'duration_s': round(elapsed, 3), 'cached': self.cache_hit,
+            'retries': retries,
+            'exe_size_kb': exe_size, 'modules': self.estimator.modules if self.estimator else None,
+            'peak_rss_kb': self.sampler.peak_kb, 'cpu_s': self.sampler.cpu_s,
+            'phases': {name: round(seconds, 3) for name, seconds in self.timer.durations.items()} if self.timer else {},
+        }
+        label = '成功' if success else ('取消' if state == STATE_CANCELLED else '失败')
+        level = LEVEL_INFO if success else (LEVEL_WARNING if state == STATE_CANCELLED else LEVEL_ERROR)
+        self.events.publish(BuildEvent(
+            self.script_path, RESULT, f"{label}  {elapsed:.1f}s{flags}  {detail}", level, metrics=metrics
+        ))
+
+    def record_history(self, exe_name: str, options: list, success: bool, exe_size: int):
+        """把本次构建的分阶段耗时、产物大小与峰值内存写入历史数据库"""
+        if not self.history or exe_name is None:
+            return
+        phases = self.timer.durations
+        try:
+            self.history.record(
+                self.script_path, exe_name, success, self.timer.elapsed(), phases,
+                started_at=self.timer.started_at,
+                script_hash=hash_script(self.script_path),
+                options=options,
+                toolchain=self.toolchain_info.fingerprint() if self.toolchain_info else '',
+                cached=self.cache_hit,
+                artifact_size_kb=exe_size,
+                peak_rss_kb=self.sampler.peak_kb,
+                modules=self.estimator.modules,
+                cpu_s=self.sampler.cpu_s
+            )
         except Exception as e:
-            error_message = f"转换过程中出现异常: {e}"
-            self.update_status(error_message)
-            self.signals.conversion_failed.emit(error_message)
+            logging.warning(f"写入构建历史失败: {e}")
+        summary = '，'.join(f"{name} {seconds:.1f}s" for name, seconds in phases.items())
+        self.update_status(f"阶段耗时：{summary}")
 
-        finally:
-            # 任务结束
-            self._is_running = False
-            self.cleanup_files(version_file_path)
+    def store_in_cache(self, cache_key: str, artifact_path: str):
+        """把构建产物写入构建缓存（失败不影响本次转换结果）"""
+        try:
+            self.build_cache.store(cache_key, artifact_path)
+            self.update_status("构建产物已写入缓存。")
+        except Exception as e:
+            self.update_status(f"写入构建缓存失败: {e}", LEVEL_WARNING)
+
+    def exe_path_for(self, output_dir: str, exe_name: str) -> str:
+        """生成的 EXE 路径（onedir 时位于与 EXE 同名的目录中）"""
+        if self.output_layout == 'onedir':
+            return os.path.join(output_dir, exe_name, exe_name + '.exe')
+        return os.path.join(output_dir, exe_name + '.exe')
+
+    def measure_startup(self, exe_path: str):
+        """多次启动生成的 EXE，报告冷/热启动、解包与模块导入耗时（失败不影响转换结果）"""
+        self.update_status(f"正在测量启动耗时（启动 {self.startup_runs} 次）...")
+        try:
+            self.startup_profile = profile_startup(
+                exe_path, self.startup_runs, layout=self.output_layout, script_path=self.script_path,
+                interpreter=self.toolchain_info.interpreter
+            )
+        except Exception as e:
+            self.update_status(f"测量启动耗时失败: {e}", LEVEL_WARNING)
+            return
+        for line in summary_lines(self.startup_profile):
+            self.update_status(line)
 
     def stop(self):
-        """停止转换任务"""
+        """停止转换任务：立即结束 PyInstaller 所在的整个进程组（已加入共享运行时打包时同时停止整组构建）"""
         self._is_running = False
-
-    def update_status(self, message: str):
-        """更新转换状态（日志 + UI）"""
-        logging.info(message)
-        self.signals.status_updated.emit(message)
+        self.cancelled = True
+        handle = self._handle
+        if handle:
+            handle.cancel()
+        watch = self._watch
+        if watch:
+            watch.cancel()
+        if self.bundle:
+            self.bundle.stop()
+
+    def update_status(self, message: str, level: int = None):
+        """发布一条状态事件（界面、日志文件等订阅者各自处理）；未指定级别时按文本判断"""
+        self.events.publish(BuildEvent(
+            self.script_path, STATUS, message, detect_level(message) if level is None else level,
+            self.timer.current if self.timer else None
+        ))
+
+    def begin_phase(self, name: str):
+        """结束当前阶段并开始新阶段，发布阶段事件"""
+        self.timer.begin(name)
+        self.publish_phase()
+
+    def publish_phase(self):
+        self.events.publish(BuildEvent(self.script_path, PHASE, phase=self.timer.current,
+                                       metrics={'modules': self.estimator.modules if self.estimator else 0}))
+
+    def report_progress(self, percent: int):
+        self.events.publish(BuildEvent(self.script_path, PROGRESS, phase=self.timer.current,
+                                       metrics={'percent': percent}))
 
     def ensure_pyinstaller(self) -> bool:
-        """确保本机已安装 PyInstaller，如未安装则尝试安装"""
+        """确保本机已安装 PyInstaller（探测结果由 ToolchainService 在会话内共享，只探测一次）"""
+        self.toolchain_info = self.toolchain.get(self.update_status)
+        if not self.toolchain_info.has_pyinstaller:
+            self.update_status("未检测到可用的 PyInstaller，无法转换。", LEVEL_ERROR)
+            return False
+        self.update_status(f"已检测到 PyInstaller {self.toolchain_info.pyinstaller_version}。")
+        return True
+
+    def scan_imports(self):
+        """对脚本及其本地模块做导入预扫描（失败不影响转换）"""
         try:
-            subprocess.run([sys.executable, '-m', 'PyInstaller', '--version'],
-                           check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-            self.update_status("已检测到 PyInstaller。")
-            return True
-        except subprocess.CalledProcessError:
-            self.update_status("未检测到 PyInstaller，正在尝试安装...")
-            try:
-                subprocess.check_call([sys.executable, "-m", "pip", "install", "pyinstaller"])
-                self.update_status("PyInstaller 安装成功。")
-                return True
-            except subprocess.CalledProcessError as e:
-                self.update_status(f"安装 PyInstaller 失败: {e}")
-                return False
+            self.import_scan = self.import_scanner.scan(
+                [self.script_path], self.toolchain_info.interpreter
+            )[self.script_path]
+        except Exception as e:
+            self.update_status(f"导入预扫描失败: {e}", LEVEL_WARNING)
+            return
+        for line in self.import_scan.report_lines():
+            self.update_status(line)
 
     def prepare_pyinstaller_options(self, exe_name: str, output_dir: str) -> list:
         """准备 PyInstaller 命令行参数"""
-        options = ['--onefile', '--clean']
+        # onedir 输出目录已存在时需要 --noconfirm，否则 PyInstaller 会等待确认
+        options = ['--onedir', '--noconfirm'] if self.output_layout == 'onedir' else ['--onefile']
+        # 增量模式下由工作目录指纹决定是否需要 --clean
+        if not self.work_dirs:
+            options.append('--clean')
         options.append('--console' if self.convert_mode == "命令行模式" else '--windowed')
 
+        hidden_imports = []
         if self.extra_library:
             hidden_imports = [lib.strip() for lib in self.extra_library.split(',') if lib.strip()]
-            options += [f'--hidden-import={lib}' for lib in hidden_imports]
+        # 预扫描推断出的动态导入
+        if self.import_scan:
+            hidden_imports += [name for name in self.import_scan.hidden_imports if name not in hidden_imports]
+        options += [f'--hidden-import={lib}' for lib in hidden_imports]
 
         if self.additional_options:
             options += self.additional_options.strip().split()
@@ -135,142 +471,152 @@ class ConvertRunnable(QRunnable):
         options += ['--distpath', output_dir, '-n', exe_name]
         return options
 
-    def handle_icon(self, script_dir: str) -> str:
-        """处理图标：.png -> .ico 转换"""
-        if not Image:
-            self.update_status("Pillow 库未安装，无法转换 PNG 图标。请安装 Pillow 或使用 ICO 图标。")
-            return ""
+    def asset_options(self, exe_name: str) -> list:
+        """图标与版本信息参数（批次未预先准备时由任务自行准备）"""
+        assets = self.assets
+        if assets is None and (self.icon_path or self.file_version or self.copyright_info):
+            assets = AssetCache().prepare_batch(
+                [exe_name], self.icon_path, self.file_version, self.copyright_info,
+                self.toolchain_info.versioninfo, self.update_status, self.toolchain_info.fingerprint()
+            )
+        options = []
+        if assets and assets.icon_file:
+            options.append(f'--icon={assets.icon_file}')
+        if assets and assets.version_file_for(exe_name):
+            options.append(f'--version-file={assets.version_file_for(exe_name)}')
+        return options
 
-        lower_icon = self.icon_path.lower()
-        if lower_icon.endswith('.png'):
-            self.update_status("检测到 PNG 图标，正在转换为 ICO 格式...")
-            try:
-                img = Image.open(self.icon_path)
-                ico_path = os.path.join(script_dir, 'icon_converted.ico')
-                img.save(ico_path, format='ICO',
-                         sizes=[(256, 256), (128, 128), (64, 64), (48, 48), (32, 32), (16, 16)])
-                self.update_status("图标转换成功。")
-                return ico_path
-            except Exception as e:
-                self.update_status(f"PNG 转 ICO 失败: {e}")
-                return ""
-        elif lower_icon.endswith('.ico'):
-            return self.icon_path
-        else:
-            self.update_status("不支持的图标格式，仅支持 .png 和 .ico 格式。")
-            return ""
+    def uses_warm_pool(self) -> bool:
+        # 预热进程只能执行本机的 PyInstaller，自定义命令时总是启动新进程
+        return bool(self.warm_pool and self.warm_pool.available and not self.toolchain_info.command)
+
+    def start_pyinstaller(self, options: list, on_done, target: str = None, delay: float = 0.0) -> bool:
+        """
+        把 PyInstaller 交给异步构建引擎执行（delay 秒后启动），返回是否已交出；
+        结束后在引擎的收尾线程中调用 on_done(ProcessResult)。
+        没有引擎或使用预热进程时返回 False，由调用方同步执行 run_pyinstaller。
+        """
+        if self.engine is None or self.uses_warm_pool():
+            return False
+        cmd = self.toolchain_info.pyinstaller_cmd + options + [target or self.script_path]
+        self.update_status(f"执行命令: {' '.join(cmd)}")
 
-    def create_version_file(self, exe_name: str, script_dir: str) -> str:
-        """生成版本信息文件"""
-        try:
-            from PyInstaller.utils.win32.versioninfo import (
-                VSVersionInfo, FixedFileInfo, StringFileInfo, StringTable, StringStruct,
-                VarFileInfo, VarStruct
-            )
-        except ImportError as e:
-            self.update_status(f"导入PyInstaller版本信息类失败: {e}")
-            return ""
-
-        version_numbers = self.file_version.split('.') if self.file_version else ['1', '0', '0', '0']
-        if len(version_numbers) != 4 or not all(num.isdigit() for num in version_numbers):
-            version_numbers = ['1', '0', '0', '0']
-
-        # 构造版本信息
-        version_info = VSVersionInfo(
-            ffi=FixedFileInfo(
-                filevers=tuple(map(int, version_numbers)),
-                prodvers=tuple(map(int, version_numbers)),
-                mask=0x3f,
-                flags=0x0,
-                OS=0x40004,
-                fileType=0x1,
-                subtype=0x0,
-                date=(0, 0)
-            ),
-            kids=[
-                StringFileInfo(
-                    [
-                        StringTable(
-                            '040904E4',
-                            [
-                                StringStruct('CompanyName', ''),
-                                StringStruct('FileDescription', exe_name),
-                                StringStruct('FileVersion', '.'.join(version_numbers)),
-                                StringStruct('InternalName', f'{exe_name}.exe'),
-                                StringStruct('LegalCopyright', self.copyright_info),
-                                StringStruct('OriginalFilename', f'{exe_name}.exe'),
-                                StringStruct('ProductName', exe_name),
-                                StringStruct('ProductVersion', '.'.join(version_numbers))
-                            ]
-                        )
-                    ]
-                ),
-                VarFileInfo([VarStruct('Translation', [0x0409, 0x04B0])])
-            ]
-        )
-
-        version_file_path = os.path.join(script_dir, 'version_info.txt')
-        try:
-            with open(version_file_path, 'w', encoding='utf-8') as vf:
-                vf.write(version_info.__str__())
-            self.update_status("生成版本信息文件。")
-            return version_file_path
-        except Exception as e:
-            self.update_status(f"版本信息文件生成失败: {e}")
-            return ""
+        def exited(result):
+            self._handle = None
+            on_done(result)
+
+        self._handle = self.engine.submit(cmd, self.handle_output_line, exited, on_start=self.sampler.attach,
+                                          wall_timeout=self.wall_timeout, idle_timeout=self.idle_timeout,
+                                          delay=delay)
+        # 提交前后已被取消
+        if not self._is_running:
+            self._handle.cancel()
+        return True
+
+    def run_pyinstaller(self, options: list, target: str = None) -> ProcessResult:
+        """
+        在当前线程中调用 PyInstaller 执行转换（优先使用预热进程池，不可用时启动新的子进程）；
+        target 默认为本任务脚本。超时与取消由共享的看门狗结束整个进程组。
+        """
+        target = target or self.script_path
+        if self.uses_warm_pool():
+            self.update_status(f"在预热进程中执行: PyInstaller {' '.join(options + [target])}")
+
+            def started(pid):
+                self.sampler.attach(pid)
+                self._watch = shared_watchdog().watch(pid, self.wall_timeout, self.idle_timeout)
+                if not self._is_running:
+                    self._watch.cancel()
 
-    def run_pyinstaller(self, options: list) -> bool:
-        """调用 PyInstaller 执行转换"""
-        cmd = [sys.executable, '-m', 'PyInstaller'] + options + [self.script_path]
+            try:
+                returncode = self.warm_pool.run(
+                    options + [target], os.getcwd(),
+                    self.handle_output_line, lambda: self._is_running,
+                    on_start=started
+                )
+            except Exception as e:
+                return ProcessResult(FAILED, error=e)
+            finally:
+                watch, self._watch = self._watch, None
+                if watch:
+                    watch.close()
+            if returncode is not None:
+                return watch.result(returncode) if watch else ProcessResult(EXITED, returncode)
+            self.update_status("预热进程不可用，改为启动新的 PyInstaller 进程。", LEVEL_WARNING)
+
+        cmd = self.toolchain_info.pyinstaller_cmd + options + [target]
         self.update_status(f"执行命令: {' '.join(cmd)}")
         try:
             process = subprocess.Popen(
-                cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, universal_newlines=True
+                cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, universal_newlines=True,
+                **new_session_kwargs()
             )
-
+        except OSError as e:
+            return ProcessResult(SPAWN_FAILED, error=e)
+        self.sampler.attach(process.pid)
+        self._watch = watch = shared_watchdog().watch(process.pid, self.wall_timeout, self.idle_timeout,
+                                                      exited=process.poll)
+        # 启动前后已被取消
+        if not self._is_running:
+            watch.cancel()
+        try:
             for line in process.stdout:
-                if not self._is_running:
-                    process.terminate()
-                    self.update_status("转换已被用户取消。")
-                    return False
-                line = line.strip()
-                self.update_status(line)
-                # 简易进度估计
-                if "Analyzing" in line:
-                    self.signals.progress_updated.emit(30)
-                elif "Collecting" in line:
-                    self.signals.progress_updated.emit(50)
-                elif "Building" in line:
-                    self.signals.progress_updated.emit(70)
-                elif "completed successfully" in line.lower():
-                    self.signals.progress_updated.emit(100)
-
+                self.handle_output_line(line)
             process.stdout.close()
             process.wait()
-
-            return process.returncode == 0
+            return watch.result(process.returncode)
         except Exception as e:
-            self.update_status(f"转换过程中出现异常: {e}")
-            return False
-
-    def cleanup_files(self, version_file_path: str):
-        """清理临时文件（版本信息、转换后的ico等）"""
-        script_dir = os.path.dirname(self.script_path)
-
-        # 删除版本信息文件
-        if version_file_path and os.path.exists(version_file_path):
+            kill_group(process.pid)
+            process.wait()
+            return ProcessResult(FAILED, process.returncode, error=e)
+        finally:
+            self._watch = None
+            watch.close()
+
+    def handle_output_line(self, line: str):
+        """处理 PyInstaller 的一行输出：发布输出事件，切换阶段并估计进度"""
+        line = line.strip()
+        watch = self._watch
+        if watch:
+            watch.touch()
+        self._output_tail.append(line)
+        timer = self.timer
+        phase = timer.current
+        self.events.publish(BuildEvent(self.script_path, OUTPUT, line, detect_level(line), phase))
+        timer.feed(line)
+        self.estimator.feed(line)
+        self.sampler.sample()
+        if timer.current != phase:
+            self.publish_phase()
+        # 进度按历史阶段耗时估计，只在百分比变化时发布
+        percent = self.estimator.percent()
+        if percent != self._last_percent:
+            self._last_percent = percent
+            self.report_progress(percent)
+
+    def create_estimator(self) -> ProgressEstimator:
+        """用该脚本历次构建的阶段耗时创建进度估计器（没有历史时使用典型比重）"""
+        profile, expected_modules = {}, None
+        if self.history:
             try:
-                os.remove(version_file_path)
-                self.update_status("删除版本信息文件。")
+                profile, expected_modules = self.history.phase_profile(self.script_path)
             except Exception as e:
-                self.update_status(f"无法删除版本信息文件: {e}")
-
-        # 若原图标是 png，则删除临时生成的 ico
-        if self.icon_path and self.icon_path.lower().endswith('.png'):
-            ico_path = os.path.join(script_dir, 'icon_converted.ico')
-            if os.path.exists(ico_path):
-                try:
-                    os.remove(ico_path)
-                    self.update_status("删除临时 ICO 文件。")
-                except Exception as e:
-                    self.update_status(f"无法删除临时 ICO 文件: {e}")
\ No newline at end of file
+                logging.warning(f"读取构建历史失败: {e}")
+        return ProgressEstimator(self.timer, profile, expected_modules)
+
+    def progress_state(self):
+        """供界面轮询：(进度 0~1, 预计剩余秒数, 预计总耗时)；任务尚未开始时返回 None"""
+        estimator = self.estimator
+        if estimator is None:
+            return None
+        return estimator.fraction(), estimator.remaining_seconds(), estimator.expected_total
+
+    def cleanup_files(self, workspace: TaskWorkspace):
+        """清理任务的临时工作区（spec、workpath 等）"""
+        if workspace is None:
+            return
+        try:
+            workspace.cleanup()
+            self.update_status("已清理临时工作区。")
+        except Exception as e:
+            self.update_status(f"无法清理临时工作区: {e}", LEVEL_WARNING)
@@ -1,10 +1,16 @@
 import os
 import webbrowser
+import time
 from PyQt5.QtWidgets import (
-    QDialog, QVBoxLayout, QTextBrowser, QTextEdit
+    QDialog, QVBoxLayout, QHBoxLayout, QTextBrowser, QLineEdit, QPushButton,
+    QCheckBox, QLabel, QWidget, QListWidget, QListWidgetItem, QTableWidget, QTableWidgetItem,
+    QSplitter, QAbstractItemView, QHeaderView, QMessageBox
 )
-from PyQt5.QtGui import QFont, QIcon
-from PyQt5.QtCore import QSize
+from PyQt5.QtGui import QFont, QIcon, QPainter, QColor, QPen
+from PyQt5.QtCore import Qt, QSize, QTimer, QRectF
+
+from log_views import MappedLogModel, LogListView
+from build_history import PHASE_ORDER, find_regressions
 
 
 class ManualDialog(QDialog):
@@ -112,7 +118,7 @@ class AboutDialog(QDialog):
 
 
 class LogViewerDialog(QDialog):
-    """查看日志文件的对话框"""
+    """查看日志文件的对话框（内存映射 + 后台建立行索引，只渲染可见行，可跟随末尾）"""
     def __init__(self, parent=None, log_path="app.log"):
         super().__init__(parent)
         self.setWindowTitle("查看日志文件")
@@ -122,7 +128,7 @@ class LogViewerDialog(QDialog):
             QDialog {
                 background-color: #FFFFFF;
             }
-            QTextEdit {
+            QListView {
                 border: 1px solid #CCC;
                 border-radius: 4px;
                 padding: 8px;
@@ -131,20 +137,260 @@ class LogViewerDialog(QDialog):
         """)
 
         layout = QVBoxLayout()
-        self.text_edit = QTextEdit()
-        self.text_edit.setReadOnly(True)
-        self.text_edit.setFont(QFont("Courier New", 10))
-        layout.addWidget(self.text_edit)
+
+        # 搜索栏
+        search_layout = QHBoxLayout()
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("查找内容（回车查找下一个）")
+        self.search_edit.returnPressed.connect(self.find_next)
+        search_layout.addWidget(self.search_edit)
+        find_button = QPushButton("查找下一个")
+        find_button.clicked.connect(self.find_next)
+        search_layout.addWidget(find_button)
+        self.follow_checkbox = QCheckBox("跟随末尾")
+        self.follow_checkbox.setChecked(True)
+        search_layout.addWidget(self.follow_checkbox)
+        layout.addLayout(search_layout)
+
+        self.log_view = LogListView()
+        layout.addWidget(self.log_view)
+
+        self.info_label = QLabel()
+        layout.addWidget(self.info_label)
         self.setLayout(layout)
+
+        self.model = None
         self.load_log(log_path)
 
+        # 定期检查文件增长，只为新增部分建立索引
+        self.tail_timer = QTimer(self)
+        self.tail_timer.setInterval(1000)
+        self.tail_timer.timeout.connect(self.refresh_tail)
+        self.tail_timer.start()
+
     def load_log(self, log_path):
-        """加载并显示日志文件内容"""
-        if os.path.exists(log_path):
-            try:
-                with open(log_path, 'r', encoding='utf-8') as f:
-                    self.text_edit.setPlainText(f.read())
-            except Exception as e:
-                self.text_edit.setPlainText(f"无法读取日志文件: {e}")
+        """映射日志文件并在后台建立行索引"""
+        if not os.path.exists(log_path):
+            self.info_label.setText("日志文件不存在。")
+            return
+        try:
+            self.model = MappedLogModel(log_path, self)
+        except Exception as e:
+            self.info_label.setText(f"无法读取日志文件: {e}")
+            return
+        self.model.index_progress.connect(self.update_info)
+        self.log_view.setModel(self.model)
+
+    def update_info(self, lines: int, size: int):
+        """显示索引进度"""
+        state = "正在建立索引..." if self.model.indexing else "索引完成"
+        self.info_label.setText(f"{state}  共 {lines} 行，{size / (1024 * 1024):.1f} MB")
+
+    def refresh_tail(self):
+        """文件增长时追加索引，并在勾选“跟随末尾”时滚动到最后"""
+        if self.model is None:
+            return
+        self.model.refresh()
+        if self.follow_checkbox.isChecked():
+            self.log_view.scrollToBottom()
+
+    def find_next(self):
+        """从当前行之后开始在映射内存中查找"""
+        if self.model is None:
+            return
+        current = self.log_view.currentIndex()
+        start_row = current.row() + 1 if current.isValid() else 0
+        row = self.model.find(self.search_edit.text(), start_row)
+        if row < 0:
+            self.info_label.setText(f"未找到: {self.search_edit.text()}")
+            return
+        self.follow_checkbox.setChecked(False)
+        index = self.model.index(row)
+        self.log_view.setCurrentIndex(index)
+        self.log_view.scrollTo(index)
+
+    def done(self, result):
+        """关闭对话框时停止索引线程并解除映射"""
+        self.tail_timer.stop()
+        if self.model is not None:
+            self.model.close()
+        super().done(result)
+
+
+# 构建历史图表中各阶段的颜色
+PHASE_COLORS = {
+    'toolchain': '#9E9E9E', 'scan': '#FFD54F', 'cache': '#BDBDBD', 'assets': '#8D6E63', 'startup': '#FFB74D',
+    'Analysis': '#42A5F5', 'PYZ': '#26A69A', 'PKG': '#AB47BC', 'EXE': '#66BB6A',
+    'COLLECT': '#5C6BC0', 'MERGE': '#EC407A', 'profile': '#26C6DA', 'cleanup': '#78909C',
+}
+
+
+class BuildTimeChart(QWidget):
+    """按时间顺序绘制某脚本每次构建的分阶段耗时堆叠柱状图，耗时突增的构建以红色标出"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.builds = []
+        self.regressions = set()
+        self.setMinimumHeight(260)
+
+    def set_builds(self, builds: list):
+        self.builds = builds
+        self.regressions = find_regressions(
+            [b['duration_s'] if b['success'] and not b['cached'] else None for b in builds]
+        )
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.fillRect(self.rect(), QColor('#FFFFFF'))
+        if not self.builds:
+            painter.drawText(self.rect(), Qt.AlignCenter, "暂无构建记录")
+            return
+
+        # 图例（放不下时换行）
+        metrics = painter.fontMetrics()
+        shown = [name for name in PHASE_ORDER if any(name in b['phases'] for b in self.builds)]
+        x, y = 50, 4
+        for name in shown + ["耗时突增"]:
+            width = metrics.width(name) + 8
+            if x + 13 + width > self.width() - 10:
+                x, y = 50, y + 18
+            painter.fillRect(QRectF(x, y + 4, 10, 10), QColor(PHASE_COLORS.get(name, 'red')))
+            painter.setPen(QPen(QColor('#333333')))
+            painter.drawText(QRectF(x + 13, y, width, 18), Qt.AlignLeft | Qt.AlignVCenter, name)
+            x += 13 + width + 6
+
+        left, top, right, bottom = 50, y + 28, 10, 24
+        plot = QRectF(left, top, self.width() - left - right, self.height() - top - bottom)
+        max_duration = max(b['duration_s'] or 0 for b in self.builds) or 1.0
+        decimals = 0 if max_duration >= 10 else 1
+
+        # 坐标轴与刻度
+        painter.setPen(QPen(QColor('#999999')))
+        painter.drawLine(plot.bottomLeft(), plot.bottomRight())
+        painter.drawLine(plot.bottomLeft(), plot.topLeft())
+        for i in range(5):
+            value = max_duration * i / 4
+            y = plot.bottom() - plot.height() * i / 4
+            painter.drawText(QRectF(0, y - 8, left - 6, 16), Qt.AlignRight | Qt.AlignVCenter, f"{value:.{decimals}f}s")
+
+        # 堆叠柱
+        slot = plot.width() / len(self.builds)
+        bar_width = min(40.0, max(2.0, slot * 0.7))
+        for i, build in enumerate(self.builds):
+            x = plot.left() + slot * i + (slot - bar_width) / 2
+            y = plot.bottom()
+            phases = build['phases']
+            for name in PHASE_ORDER + [n for n in phases if n not in PHASE_ORDER]:
+                seconds = phases.get(name)
+                if not seconds:
+                    continue
+                height = plot.height() * seconds / max_duration
+                painter.fillRect(QRectF(x, y - height, bar_width, height), QColor(PHASE_COLORS.get(name, '#607D8B')))
+                y -= height
+            if not build['success']:
+                painter.setPen(QPen(QColor('#555555'), 1, Qt.DashLine))
+                painter.drawRect(QRectF(x, y, bar_width, plot.bottom() - y))
+            if i in self.regressions:
+                painter.setPen(QPen(QColor('red'), 2))
+                painter.drawRect(QRectF(x, y, bar_width, plot.bottom() - y))
+
+        # 首末日期
+        painter.setPen(QPen(QColor('#666666')))
+        first = time.strftime('%m-%d %H:%M', time.localtime(self.builds[0]['started_at']))
+        last = time.strftime('%m-%d %H:%M', time.localtime(self.builds[-1]['started_at']))
+        painter.drawText(QRectF(plot.left(), plot.bottom() + 4, 120, 18), Qt.AlignLeft, first)
+        painter.drawText(QRectF(plot.right() - 120, plot.bottom() + 4, 120, 18), Qt.AlignRight, last)
+
+
+class BuildHistoryDialog(QDialog):
+    """构建历史：按脚本查看历次构建耗时（分阶段）、产物大小与峰值内存"""
+
+    COLUMNS = ["时间", "结果", "总耗时", "各阶段", "产物大小", "峰值内存", "CPU 时间"]
+
+    def __init__(self, history, parent=None):
+        super().__init__(parent)
+        self.history = history
+        self.setWindowTitle("构建历史")
+        self.resize(1000, 650)
+
+        layout = QVBoxLayout()
+        splitter = QSplitter(Qt.Horizontal)
+
+        self.script_list = QListWidget()
+        self.script_list.currentItemChanged.connect(self.show_script)
+        splitter.addWidget(self.script_list)
+
+        right = QWidget()
+        right_layout = QVBoxLayout(right)
+        right_layout.setContentsMargins(0, 0, 0, 0)
+        self.chart = BuildTimeChart()
+        right_layout.addWidget(self.chart)
+        self.build_table = QTableWidget(0, len(self.COLUMNS))
+        self.build_table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.build_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.build_table.verticalHeader().hide()
+        self.build_table.horizontalHeader().setSectionResizeMode(3, QHeaderView.Stretch)
+        right_layout.addWidget(self.build_table)
+        splitter.addWidget(right)
+        splitter.setSizes([280, 720])
+        layout.addWidget(splitter)
+
+        button_layout = QHBoxLayout()
+        button_layout.addStretch()
+        clear_button = QPushButton("清空历史")
+        clear_button.clicked.connect(self.clear_history)
+        button_layout.addWidget(clear_button)
+        layout.addLayout(button_layout)
+        self.setLayout(layout)
+
+        self.load_scripts()
+
+    def load_scripts(self):
+        self.script_list.clear()
+        for script_path, count, _ in self.history.scripts():
+            item = QListWidgetItem(f"{os.path.basename(script_path)} ({count})")
+            item.setData(Qt.UserRole, script_path)
+            item.setToolTip(script_path)
+            self.script_list.addItem(item)
+        if self.script_list.count():
+            self.script_list.setCurrentRow(0)
         else:
-            self.text_edit.setPlainText("日志文件不存在。")
\ No newline at end of file
+            self.chart.set_builds([])
+            self.build_table.setRowCount(0)
+
+    def show_script(self, current, previous=None):
+        if current is None:
+            return
+        builds = self.history.builds(current.data(Qt.UserRole))
+        self.chart.set_builds(builds)
+
+        # 明细表按最近构建在前排列
+        self.build_table.setRowCount(len(builds))
+        for row, build in enumerate(reversed(builds)):
+            result = "缓存命中" if build['cached'] else ("成功" if build['success'] else "失败")
+            phases = "  ".join(f"{name} {seconds:.1f}s" for name, seconds in build['phases'].items())
+            values = [
+                time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(build['started_at'])),
+                result,
+                f"{build['duration_s']:.1f}s",
+                phases,
+                f"{build['artifact_size_kb']} KB" if build['artifact_size_kb'] is not None else "-",
+                f"{build['peak_rss_kb'] // 1024} MB" if build['peak_rss_kb'] is not None else "-",
+                f"{build['cpu_s']:.1f}s" if build['cpu_s'] is not None else "-",
+            ]
+            for column, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                if column == 3:
+                    item.setToolTip(phases)
+                self.build_table.setItem(row, column, item)
+            if len(builds) - 1 - row in self.chart.regressions:
+                self.build_table.item(row, 2).setForeground(QColor('red'))
+        self.build_table.resizeColumnsToContents()
+
+    def clear_history(self):
+        if QMessageBox.question(self, "确认", "确定要清空全部构建历史吗？") == QMessageBox.Yes:
+            self.history.clear()
+            self.load_scripts()
@@ -0,0 +1,405 @@
+"""
+无界面批量转换：命令行入口与可导入的 Python API。
+
+与图形界面使用同一个转换引擎（ConvertRunnable），但不创建 QApplication：
+任务直接在线程池中调用 run()，信号以 DirectConnection 方式在工作线程内回调。
+默认由异步构建引擎驱动 PyInstaller 子进程，少量线程即可同时运行大量构建。
+
+清单（manifest）格式示例：
+{
+    "defaults": {"convert_mode": "console", "output_dir": "dist", "file_version": "1.0.0.0"},
+    "scripts": ["tools/a.py", {"path": "tools/b.py", "exe_name": "b_tool", "convert_mode": "windowed"},
+                {"path": "tools/c.py", "depends_on": ["tools/a.py"]}]
+}
+depends_on 中的脚本成功构建（或命中缓存）后才构建该脚本；依赖失败时该脚本不构建，记为取消。
+
+用法：python headless.py manifest.json -j 4 > results.json
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from PyQt5.QtCore import Qt
+
+from converters import ConvertRunnable, OUTPUT_LAYOUTS
+from build_cache import BuildCache
+from workdirs import WorkDirManager
+from toolchain import ToolchainService
+from warm_pool import WarmWorkerPool
+from assets import AssetCache
+from build_history import BuildHistory
+from import_scan import ImportScanner
+from preflight import PreflightChecker
+from shared_bundle import SharedBundleRunnable, plan_bundles
+from async_engine import AsyncBuildEngine
+from supervisor import RetryBudget, DEFAULT_WALL_TIMEOUT_S, DEFAULT_IDLE_TIMEOUT_S, DEFAULT_MAX_RETRIES
+from log_backend import install_backend, shared_backend, begin_batch, end_batch, task_log_path
+from build_events import BuildEvent, EventMetrics, event_bus, STATUS, RESULT, LEVEL_ERROR
+from batch import BuildBatch, DependencyError, FAILED as STATE_FAILED, CANCELLED as STATE_CANCELLED
+
+# 清单中可为每个脚本覆盖的设置项
+SETTING_KEYS = (
+    'convert_mode', 'output_dir', 'exe_name', 'icon_path', 'file_version',
+    'copyright_info', 'extra_library', 'additional_options', 'output_layout'
+)
+CONVERT_MODES = {'console': "命令行模式", 'windowed': "GUI 模式"}
+
+
+class ManifestError(ValueError):
+    """清单格式错误"""
+
+
+def load_manifest(manifest) -> list:
+    """
+    解析清单（文件路径或已加载的 dict），返回任务列表，每项为包含 script_path、depends_on 与各项设置的 dict。
+    相对路径以清单文件所在目录为基准；依赖必须是清单中的脚本且不能形成循环。
+    """
+    base_dir = os.getcwd()
+    if isinstance(manifest, str):
+        base_dir = os.path.dirname(os.path.abspath(manifest))
+        try:
+            with open(manifest, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError) as e:
+            raise ManifestError(f"无法读取清单: {e}")
+    if not isinstance(manifest, dict) or not isinstance(manifest.get('scripts'), list):
+        raise ManifestError("清单必须是包含 scripts 列表的 JSON 对象。")
+
+    defaults = manifest.get('defaults', {})
+    jobs = []
+    seen = set()
+    for entry in manifest['scripts']:
+        overrides = {'path': entry} if isinstance(entry, str) else dict(entry)
+        if 'path' not in overrides:
+            raise ManifestError(f"清单条目缺少 path: {entry!r}")
+        job = {key: defaults.get(key) for key in SETTING_KEYS}
+        job.update({key: overrides[key] for key in SETTING_KEYS if key in overrides})
+        job['convert_mode'] = CONVERT_MODES.get(job['convert_mode'], job['convert_mode'] or "GUI 模式")
+        job['output_layout'] = job['output_layout'] or 'onefile'
+        if job['output_layout'] not in OUTPUT_LAYOUTS:
+            raise ManifestError(f"output_layout 只能是 {' 或 '.join(OUTPUT_LAYOUTS)}: {entry!r}")
+        job['script_path'] = os.path.normpath(os.path.join(base_dir, overrides['path']))
+        if job['script_path'] in seen:
+            raise ManifestError(f"清单中的脚本重复: {overrides['path']}")
+        seen.add(job['script_path'])
+        for key in ('output_dir', 'icon_path'):
+            if job[key]:
+                job[key] = os.path.normpath(os.path.join(base_dir, job[key]))
+        depends_on = overrides.get('depends_on') or []
+        if isinstance(depends_on, str):
+            depends_on = [depends_on]
+        job['depends_on'] = [os.path.normpath(os.path.join(base_dir, path)) for path in depends_on]
+        jobs.append(job)
+
+    try:
+        _plan_batch(jobs).check_dependencies()
+    except DependencyError as e:
+        raise ManifestError(str(e))
+    return jobs
+
+
+def _plan_batch(jobs: list, events=None) -> BuildBatch:
+    batch = BuildBatch(events=events)
+    for job in jobs:
+        batch.add(job['script_path'], job.get('depends_on') or ())
+    return batch
+
+
+def _exe_name(job: dict) -> str:
+    return job['exe_name'] or os.path.splitext(os.path.basename(job['script_path']))[0]
+
+
+def run_batch(jobs: list, parallelism: int = None, use_cache: bool = True, incremental: bool = True,
+              warm: bool = False, toolchain: ToolchainService = None, history: BuildHistory = None,
+              scan: bool = True, preflight: bool = True, shared_bundle: bool = False,
+              startup_runs: int = 0, async_engine: bool = True, wall_timeout: float = DEFAULT_WALL_TIMEOUT_S,
+              idle_timeout: float = DEFAULT_IDLE_TIMEOUT_S, max_retries: int = DEFAULT_MAX_RETRIES) -> list:
+    """
+    执行一批转换任务（不需要 QApplication），返回每个任务的结果 dict：
+    script, exe_name, success, exe_path, exe_size_kb, error, cached, duration_s, bundled, import_scan,
+    preflight_errors, startup, retries, log_file, metrics, state
+    预检未通过的脚本不会启动 PyInstaller。shared_bundle 为 True 时同一输出目录的脚本以 MERGE 合并打包
+    （有依赖关系的脚本单独构建），合并打包的脚本 duration_s 为整组构建的耗时。
+    startup_runs 大于 0 时构建成功后测量启动耗时（结果在 startup 中）。
+    async_engine 为 True 时 PyInstaller 子进程由一个事件循环线程统一驱动，工作线程只负责构建前的准备；
+    否则（或使用预热进程时）每个构建占用一个线程直到结束。
+    每次 PyInstaller 运行有总时限与无输出时限（秒，0 表示不限制），超时或取消时结束整个进程组；
+    暂时性故障最多重试 max_retries 次，整个批次的重试总数另有上限。
+    已安装日志后端（install_backend）时整个批次记为一个日志批次，log_file 为该任务的完整日志，否则为 None。
+    metrics 为按构建事件统计的输出行数、警告与错误数和已分析模块数。
+    任务的 depends_on 中的脚本都成功后才开始构建，否则不构建（state 为 cancelled）；
+    state 为任务的终态（succeeded / failed / cancelled / cached）。依赖无效时抛出 DependencyError。
+    """
+    batch = _plan_batch(jobs, event_bus())
+    batch.check_dependencies()
+    parallelism = parallelism or os.cpu_count() or 1
+    toolchain = toolchain or ToolchainService()
+    build_cache = BuildCache() if use_cache else None
+    work_dirs = WorkDirManager() if incremental else None
+    warm_pool = WarmWorkerPool(toolchain.interpreter, max_size=parallelism,
+                               prewarm=min(parallelism, len(jobs))) if warm else None
+    # 预热进程使用阻塞的请求/应答协议，此时不使用异步引擎
+    engine = AsyncBuildEngine(finish_workers=parallelism) if async_engine and not warm else None
+    retry_budget = RetryBudget()
+
+    # 按 (图标, 版本, 版权) 分组，为每组一次性准备图标与版本信息文件（键包含工具链标识）
+    toolchain_id = toolchain.get().fingerprint() if any(job['file_version'] or job['copyright_info']
+                                                         for job in jobs) else ''
+    asset_cache = AssetCache()
+    asset_groups = {}
+    for job in jobs:
+        group = (job['icon_path'], job['file_version'], job['copyright_info'])
+        asset_groups.setdefault(group, []).append(_exe_name(job))
+    prepared = {group: asset_cache.prepare_batch(names, *group, toolchain_id=toolchain_id)
+                for group, names in asset_groups.items()}
+
+    # 先对整个批次做一次导入预扫描（文件多时使用进程池），各任务随后直接复用结果
+    import_scanner = None
+    if scan:
+        import_scanner = ImportScanner()
+        try:
+            import_scanner.scan([job['script_path'] for job in jobs], toolchain.interpreter)
+        except Exception as e:
+            logging.warning(f"导入预扫描失败: {e}")
+
+    # 构建前预检：编译失败或顶层导入缺失的脚本直接判定失败
+    preflight_errors = {}
+    if preflight:
+        checker = PreflightChecker(toolchain.interpreter, max_workers=parallelism, import_scanner=import_scanner)
+        preflight_errors = checker.check([job['script_path'] for job in jobs])
+
+    batch_started = time.perf_counter()
+    begin_batch(f"{len(jobs)} 个脚本")
+    events = event_bus()
+    event_metrics = EventMetrics()
+    events.subscribe(event_metrics)
+    # 批次跟踪各任务状态，最后一个任务发布结果事件时完成
+    batch.attach()
+    results = []
+    runnables = {}
+    for job in jobs:
+        result = {
+            'script': job['script_path'], 'exe_name': _exe_name(job), 'success': False,
+            'exe_path': None, 'exe_size_kb': None, 'error': None, 'cached': False, 'duration_s': None,
+            'bundled': False, 'import_scan': None, 'preflight_errors': preflight_errors.get(job['script_path'], []),
+            'startup': None, 'retries': 0, 'log_file': task_log_path(job['script_path']), 'metrics': None,
+            'state': None,
+        }
+        results.append(result)
+        if result['preflight_errors']:
+            result['error'] = f"预检未通过: {'；'.join(result['preflight_errors'])}"
+            result['duration_s'] = 0.0
+            events.publish(BuildEvent(job['script_path'], STATUS, result['error'], LEVEL_ERROR))
+            events.publish(BuildEvent(job['script_path'], RESULT, f"失败  0.0s  {result['error']}", LEVEL_ERROR,
+                                      metrics={'state': STATE_FAILED, 'success': False, 'duration_s': 0.0,
+                                               'preflight': True}))
+            continue
+        runnable = ConvertRunnable(
+            script_path=job['script_path'],
+            convert_mode=job['convert_mode'],
+            output_dir=job['output_dir'],
+            exe_name=job['exe_name'],
+            icon_path=job['icon_path'],
+            file_version=job['file_version'],
+            copyright_info=job['copyright_info'] or '',
+            extra_library=job['extra_library'],
+            additional_options=job['additional_options'],
+            build_cache=build_cache,
+            work_dirs=work_dirs,
+            toolchain=toolchain,
+            warm_pool=warm_pool,
+            assets=prepared[(job['icon_path'], job['file_version'], job['copyright_info'])],
+            history=history,
+            import_scanner=import_scanner,
+            output_layout=job['output_layout'],
+            startup_runs=startup_runs,
+            engine=engine,
+            wall_timeout=wall_timeout,
+            idle_timeout=idle_timeout,
+            max_retries=max_retries,
+            retry_budget=retry_budget
+        )
+
+        def finished(exe_path, exe_size, result=result):
+            result.update(success=True, exe_path=exe_path, exe_size_kb=exe_size)
+
+        def failed(error_message, result=result):
+            result.update(success=False, error=error_message)
+
+        # 没有事件循环：必须直接在工作线程内回调
+        runnable.signals.conversion_finished.connect(finished, Qt.DirectConnection)
+        runnable.signals.conversion_failed.connect(failed, Qt.DirectConnection)
+        runnables[runnable] = result
+
+    # 共享运行时模式下同一输出目录的脚本合并为一次构建，其余每个脚本（包括有依赖关系的脚本）单独构建
+    units = [[runnable] for runnable in runnables]
+    if shared_bundle:
+        independent = [runnable for runnable in runnables if not batch.has_dependencies(runnable.script_path)]
+        units = plan_bundles(independent) + [unit for unit in units if unit[0] not in independent]
+
+    # 同时进行的构建数由信号量限制：构建结束（finished 信号）时释放，而不是 run() 返回时——
+    # 使用异步引擎时 run() 在子进程启动后即返回，收尾在引擎的收尾线程中完成
+    slots = threading.Semaphore(parallelism)
+
+    def collect(unit: list, runnable: ConvertRunnable, started: float, release):
+        duration = round(time.perf_counter() - started, 3)
+        for member in unit:
+            result = runnables[member]
+            result['duration_s'] = duration
+            result['cached'] = member.cache_hit
+            result['bundled'] = len(unit) > 1
+            if member.import_scan:
+                result['import_scan'] = member.import_scan.to_dict()
+            result['startup'] = member.startup_profile
+            result['retries'] = runnable.retries
+            if not result['success'] and not result['error']:
+                result['error'] = "转换未完成。"
+        release()
+
+    def convert(unit: list):
+        slots.acquire()
+        released = threading.Lock()
+
+        def release():
+            # finished 信号与异常路径都可能释放名额，只释放一次
+            if released.acquire(blocking=False):
+                slots.release()
+
+        try:
+            runnable = SharedBundleRunnable(unit) if len(unit) > 1 else unit[0]
+            started = time.perf_counter()
+            runnable.signals.finished.connect(lambda: collect(unit, runnable, started, release),
+                                              Qt.DirectConnection)
+            runnable.run()
+        except BaseException:
+            # 异常时 finished 不会再发出，先归还名额再交给 crashed() 判定失败
+            release()
+            raise
+
+    def submit(unit: list):
+        future = executor.submit(convert, unit)
+        future.add_done_callback(lambda future: crashed(unit, future.exception()))
+
+    def crashed(unit: list, error):
+        # run() 之外的异常不会发布结果事件，直接判定失败，避免批次永远等不到完成
+        if error is not None:
+            logging.error(f"转换任务异常: {error!r}")
+            for member in unit:
+                runnables[member]['error'] = runnables[member]['error'] or f"转换过程中出现异常: {error}"
+                batch.finish(member.script_path, STATE_FAILED)
+
+    # 使用引擎时工作线程只做准备阶段（工具链、扫描、缓存查找），少量线程即可
+    workers = min(parallelism, 4) if engine else parallelism
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            # 有依赖的任务在依赖全部成功后才提交（提交可能发生在完成依赖的收尾线程中）
+            for unit in units:
+                batch.when_ready(unit[0].script_path, lambda unit=unit: submit(unit))
+            batch.wait()
+    finally:
+        if engine:
+            engine.shutdown()
+        if warm_pool:
+            warm_pool.shutdown()
+        if import_scanner:
+            import_scanner.close()
+        events.unsubscribe(event_metrics)
+        batch.detach()
+        for result in results:
+            result['metrics'] = event_metrics.get(result['script']).to_dict()
+            result['state'] = batch.states[result['script']]
+            if result['state'] == STATE_CANCELLED and not result['error']:
+                result['error'] = batch.reasons.get(result['script'])
+                result['duration_s'] = 0.0
+        end_batch(f"{batch.summary_text()}  耗时 {time.perf_counter() - batch_started:.1f}秒")
+    return results
+
+
+def main(argv=None) -> int:
+    """命令行入口：成功返回 0，有任务失败返回 1，清单错误返回 2"""
+    parser = argparse.ArgumentParser(description="PythonEXE Maker 无界面批量转换")
+    parser.add_argument('manifest', help="批量转换清单（JSON 文件）")
+    parser.add_argument('-j', '--jobs', type=int, default=None, help="并行任务数（默认 CPU 核数）")
+    parser.add_argument('-o', '--output', help="把 JSON 结果写入文件（默认输出到标准输出）")
+    parser.add_argument('--no-cache', action='store_true', help="绕过构建缓存")
+    parser.add_argument('--no-incremental', action='store_true', help="每次 --clean 完整构建")
+    parser.add_argument('--warm', action='store_true', help="使用预热的 PyInstaller 进程（仅 POSIX）")
+    parser.add_argument('--no-history', action='store_true', help="不写入构建历史数据库")
+    parser.add_argument('--no-scan', action='store_true', help="跳过导入预扫描")
+    parser.add_argument('--no-preflight', action='store_true', help="跳过构建前预检（语法与顶层导入）")
+    parser.add_argument('--shared-bundle', action='store_true',
+                        help="同一输出目录的脚本以 MERGE 合并打包（共享运行时）")
+    parser.add_argument('--profile-startup', type=int, default=0, metavar='N',
+                        help="构建成功后启动产物 N 次，测量冷/热启动、解包与模块导入耗时")
+    parser.add_argument('--timeout', type=float, default=DEFAULT_WALL_TIMEOUT_S, metavar='SECONDS',
+                        help="单次 PyInstaller 运行的总时限（秒，0 表示不限制）")
+    parser.add_argument('--idle-timeout', type=float, default=DEFAULT_IDLE_TIMEOUT_S, metavar='SECONDS',
+                        help="PyInstaller 无输出的时限（秒，0 表示不限制），超时视为暂时性故障")
+    parser.add_argument('--retries', type=int, default=DEFAULT_MAX_RETRIES,
+                        help="暂时性故障的最大重试次数（批次的重试总数另有上限）")
+    parser.add_argument('--threaded', action='store_true',
+                        help="不使用异步构建引擎，每个构建占用一个线程等待 PyInstaller 结束")
+    parser.add_argument('--log-dir', metavar='DIR', help="日志目录（默认为数据目录下的 logs）")
+    parser.add_argument('-v', '--verbose', action='store_true', help="把转换过程日志输出到标准错误")
+    args = parser.parse_args(argv)
+
+    # 完整日志总是写入日志目录；标准错误默认只输出警告与错误
+    backend = install_backend(args.log_dir, console=sys.stderr,
+                              console_level=logging.INFO if args.verbose else logging.WARNING,
+                              console_tasks=args.verbose)
+    try:
+        return _run(args)
+    finally:
+        backend.close()
+
+
+def _run(args) -> int:
+    """读取清单、执行批量转换并输出 JSON 报告，返回进程退出码"""
+    try:
+        jobs = load_manifest(args.manifest)
+    except ManifestError as e:
+        print(json.dumps({'error': str(e)}, ensure_ascii=False), file=sys.stderr)
+        return 2
+
+    started = time.perf_counter()
+    history = None if args.no_history else BuildHistory()
+    results = run_batch(jobs, parallelism=args.jobs, use_cache=not args.no_cache,
+                        incremental=not args.no_incremental, warm=args.warm, history=history,
+                        scan=not args.no_scan, preflight=not args.no_preflight,
+                        shared_bundle=args.shared_bundle, startup_runs=args.profile_startup,
+                        async_engine=not args.threaded, wall_timeout=args.timeout,
+                        idle_timeout=args.idle_timeout, max_retries=args.retries)
+    if history:
+        history.close()
+    succeeded = sum(1 for r in results if r['success'])
+    report = {
+        'results': results,
+        'summary': {
+            'total': len(results),
+            'succeeded': succeeded,
+            'failed': len(results) - succeeded,
+            'cached': sum(1 for r in results if r['cached']),
+            'rejected': sum(1 for r in results if r['preflight_errors']),
+            'cancelled': sum(1 for r in results if r['state'] == STATE_CANCELLED),
+            'wall_time_s': round(time.perf_counter() - started, 3),
+            # 本批次的任务日志、摘要与 events.ndjson 所在目录
+            'log_dir': shared_backend().batch_dir if shared_backend() else None,
+        },
+    }
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+    else:
+        print(text)
+    return 0 if succeeded == len(results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
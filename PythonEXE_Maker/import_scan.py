@@ -0,0 +1,543 @@
+"""
+导入预扫描：在运行 PyInstaller 之前，用 AST 静态分析脚本及其本地模块的导入关系。
+
+- 检测动态导入（importlib.import_module / __import__ 的常量参数、插件入口点），自动推断隐藏导入
+- 在目标解释器中检查外部模块能否解析，提前标出缺失的模块
+- 仅在类型检查时导入的模块给出排除建议
+- 单个文件的分析结果按 (mtime, 大小) 与内容哈希缓存在磁盘上；批次内共享的本地模块只分析一次
+- 需要分析的文件较多时在进程池中并行分析
+
+命令行：python import_scan.py 目录或脚本... [-j 8] [--python 解释器] [-o report.json]
+"""
+import os
+import sys
+import ast
+import json
+import time
+import hashlib
+import logging
+import argparse
+import threading
+import subprocess
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from app_paths import data_dir
+from build_cache import resolve_local_module
+
+# 分析结果格式变化时递增，旧的磁盘缓存自动失效
+SCAN_VERSION = 2
+# 待分析文件少于该数量时直接在当前进程中分析（启动进程池的开销更大）
+POOL_MIN_FILES = 16
+# 导入语句的类别：普通导入 > 可选导入（try/except ImportError 中，或平台、版本等条件分支中）> 仅类型检查时导入
+KIND_RANK = {'type_only': 0, 'optional': 1, 'static': 2}
+
+# 在目标解释器中检查模块能否找到，从标准输入读取模块名列表，输出一行 JSON
+RESOLVE_SCRIPT = r"""
+import json, sys, importlib.util
+found = {}
+for name in json.load(sys.stdin):
+    try:
+        found[name] = importlib.util.find_spec(name) is not None
+    except Exception:
+        found[name] = False
+print(json.dumps(found))
+"""
+
+
+def _dotted_name(node) -> str:
+    """把 a.b.c 形式的表达式还原为字符串，其他表达式返回空字符串"""
+    parts = []
+    while isinstance(node, ast.Attribute):
+        parts.append(node.attr)
+        node = node.value
+    if isinstance(node, ast.Name):
+        parts.append(node.id)
+        return '.'.join(reversed(parts))
+    return ''
+
+
+def _constant_str(node):
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return node.value
+    return None
+
+
+def _call_arg(node: ast.Call, position, keyword: str):
+    """取调用的第 position 个位置参数（为 None 时只看关键字）或同名关键字参数"""
+    if position is not None and len(node.args) > position:
+        return node.args[position]
+    for kw in node.keywords:
+        if kw.arg == keyword:
+            return kw.value
+    return None
+
+
+def _absolute_name(name: str, package: str) -> str:
+    """按 importlib.import_module 的规则把 '.x' / '..x' 换算为绝对模块名"""
+    level = len(name) - len(name.lstrip('.'))
+    if not level:
+        return name
+    if not package:
+        return None
+    base = package.rsplit('.', level - 1)[0] if level > 1 else package
+    return f"{base}.{name[level:]}" if name[level:] else base
+
+
+class _ImportVisitor(ast.NodeVisitor):
+    """收集单个文件中的 import 语句、常量参数的动态导入与插件入口点"""
+
+    def __init__(self, result: dict):
+        self.result = result
+        self.kind = 'static'
+
+    def _visit_block(self, nodes: list, kind: str):
+        previous, self.kind = self.kind, kind
+        for node in nodes:
+            self.visit(node)
+        self.kind = previous
+
+    def visit_Import(self, node):
+        for alias in node.names:
+            self.result['imports'].append([0, alias.name, [], self.kind, node.lineno])
+
+    def visit_ImportFrom(self, node):
+        names = [alias.name for alias in node.names if alias.name != '*']
+        self.result['imports'].append([node.level, node.module or '', names, self.kind, node.lineno])
+
+    def visit_Try(self, node):
+        catches_import_error = any(
+            handler.type is None or any(
+                _dotted_name(t).split('.')[-1] in ('ImportError', 'ModuleNotFoundError', 'Exception')
+                for t in (handler.type.elts if isinstance(handler.type, ast.Tuple) else [handler.type])
+            )
+            for handler in node.handlers
+        )
+        self._visit_block(node.body, 'optional' if catches_import_error else self.kind)
+        for handler in node.handlers:
+            self.visit(handler)
+        self._visit_block(node.orelse + node.finalbody, self.kind)
+
+    def visit_If(self, node):
+        if _dotted_name(node.test).split('.')[-1] == 'TYPE_CHECKING':
+            self._visit_block(node.body, 'type_only')
+            self._visit_block(node.orelse, self.kind)
+        else:
+            # 平台、版本等条件下的导入不一定执行（如 win32 上的 msvcrt 与其他平台的 termios），按可选导入处理
+            self.visit(node.test)
+            self._visit_block(node.body + node.orelse, 'optional' if self.kind == 'static' else self.kind)
+
+    def visit_Call(self, node):
+        func = _dotted_name(node.func)
+        last = node.func.attr if isinstance(node.func, ast.Attribute) else func
+        if last == 'import_module' or func == '__import__':
+            name = _constant_str(_call_arg(node, 0, 'name'))
+            if name and last == 'import_module':
+                name = _absolute_name(name, _constant_str(_call_arg(node, 1, 'package')))
+            if name:
+                self.result['dynamic'].append([node.lineno, name])
+            else:
+                self.result['dynamic_sites'].append(node.lineno)
+        elif last in ('entry_points', 'iter_entry_points') or (
+                # entry_points().select(group=...)
+                last == 'select' and isinstance(node.func, ast.Attribute)
+                and isinstance(node.func.value, ast.Call)
+                and _dotted_name(node.func.value.func).endswith('entry_points')):
+            group = _constant_str(_call_arg(node, 0 if last == 'iter_entry_points' else None, 'group'))
+            if group and group not in self.result['entry_points']:
+                self.result['entry_points'].append(group)
+        self.generic_visit(node)
+
+
+def scan_file(path: str) -> dict:
+    """分析单个文件（在进程池的子进程中执行，返回可 JSON 序列化的结果）"""
+    result = {'imports': [], 'dynamic': [], 'dynamic_sites': [], 'entry_points': [], 'error': None}
+    try:
+        with open(path, 'rb') as f:
+            tree = ast.parse(f.read(), filename=path)
+    except SyntaxError as e:
+        result['error'] = f"第 {e.lineno} 行语法错误: {e.msg}"
+        return result
+    except (OSError, ValueError) as e:
+        result['error'] = f"无法读取: {e}"
+        return result
+    _ImportVisitor(result).visit(tree)
+    return result
+
+
+def _file_digest(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class ScanResult:
+    """一个脚本（连同其本地模块）的预扫描结论"""
+
+    def __init__(self, script_path: str):
+        self.script_path = script_path
+        self.local_files = []
+        self.external = []
+        self.hidden_imports = []
+        self.excludes = []
+        self.unresolved = []
+        self.optional_missing = []
+        self.entry_point_groups = []
+        self.dynamic_sites = []
+        self.errors = []
+        # 每个外部模块最强的导入类别，以及动态导入的外部模块（用于检查结果的分类）
+        self._kinds = {}
+        self._dynamic_external = []
+
+    def to_dict(self) -> dict:
+        return {
+            'local_files': self.local_files,
+            'external': self.external,
+            'hidden_imports': self.hidden_imports,
+            'excludes': self.excludes,
+            'unresolved': self.unresolved,
+            'optional_missing': self.optional_missing,
+            'entry_point_groups': self.entry_point_groups,
+            'dynamic_sites': self.dynamic_sites,
+            'errors': self.errors,
+        }
+
+    def report_lines(self) -> list:
+        """转换日志中显示的结论（警告与错误使用 PyInstaller 的级别前缀）"""
+        lines = [f"导入预扫描：{len(self.local_files)} 个本地模块，{len(self.external)} 个外部模块。"]
+        if self.hidden_imports:
+            lines.append(f"自动添加隐藏导入: {', '.join(self.hidden_imports)}")
+        if self.excludes:
+            lines.append(f"建议排除（仅在类型检查时导入）: {', '.join(self.excludes)}")
+        if self.optional_missing:
+            lines.append(f"可选导入未安装（位于 try/except 或条件分支中）: {', '.join(self.optional_missing)}")
+        for group in self.entry_point_groups:
+            lines.append(f"WARNING: 使用了插件入口点 {group}，提供插件的包可能需要 --collect-all 或 --copy-metadata。")
+        for path, lineno in self.dynamic_sites:
+            lines.append(f"WARNING: {path}:{lineno} 的动态导入参数不是常量，无法自动推断隐藏导入。")
+        if self.unresolved:
+            lines.append(f"WARNING: 以下模块在目标解释器中无法解析，运行时可能出现 ModuleNotFoundError: "
+                         f"{', '.join(self.unresolved)}")
+        for path, error in self.errors:
+            lines.append(f"ERROR: {path}: {error}")
+        return lines
+
+
+class _LocalGraph:
+    """一次扫描内本地模块解析与文件依赖的记忆（批次中共享的模块与重复的 import 只解析一次）"""
+
+    def __init__(self, scanner):
+        self.scanner = scanner
+        self._modules = {}
+        self._deps = {}
+
+    def resolve(self, root: str, base_dir: str, level: int, name: str) -> list:
+        key = (root, base_dir if level else None, level, name)
+        if key not in self._modules:
+            self._modules[key] = resolve_local_module(root, base_dir, level, name)
+        return self._modules[key]
+
+    def deps(self, path: str, root: str) -> set:
+        """文件直接导入的本地模块（包括常量参数的动态导入）"""
+        key = (path, root)
+        if key not in self._deps:
+            result = self.scanner._file_result(path)
+            base_dir = os.path.dirname(path)
+            deps = set()
+            for level, module, names, _kind, _lineno in result['imports']:
+                candidates = [module] + [f"{module}.{name}" if module else name for name in names]
+                for name in candidates:
+                    deps.update(self.resolve(root, base_dir, level, name))
+            for _lineno, name in result['dynamic']:
+                deps.update(self.resolve(root, base_dir, 0, name))
+            deps.discard(path)
+            self._deps[key] = deps
+        return self._deps[key]
+
+
+class ImportScanner:
+    """
+    导入预扫描服务（线程安全，可被多个转换任务共享）：
+    单个文件的分析结果缓存在内存与磁盘上，外部模块的解析结果按解释器在会话内缓存。
+    """
+
+    INDEX_FILE = 'index.json'
+
+    def __init__(self, cache_dir: str = None, max_workers: int = None, use_disk_cache: bool = True):
+        self.cache_dir = cache_dir or data_dir('import_scan')
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.use_disk_cache = use_disk_cache
+        self._lock = threading.Lock()
+        self._entries = None
+        self._dirty = False
+        self._resolved = {}
+        self._executor = None
+        # 统计：实际分析的文件数、复用缓存的文件数
+        self.scanned = 0
+        self.reused = 0
+
+    # ---------- 对外接口 ----------
+    def scan(self, script_paths: list, interpreter: str = None) -> dict:
+        """扫描一批脚本，返回 {脚本路径: ScanResult}"""
+        interpreter = interpreter or sys.executable
+        roots = {path: os.path.dirname(os.path.abspath(path)) for path in script_paths}
+
+        # 按层遍历所有脚本的本地导入图：每一层的未缓存文件一起交给进程池
+        graph = _LocalGraph(self)
+        frontier = {(os.path.abspath(path), root) for path, root in roots.items()}
+        visited = set()
+        checked = set()
+        while frontier:
+            self._ensure_scanned({path for path, _ in frontier} - checked)
+            checked.update(path for path, _ in frontier)
+            visited |= frontier
+            next_frontier = set()
+            for path, root in frontier:
+                next_frontier.update((dep, root) for dep in graph.deps(path, root))
+            frontier = next_frontier - visited
+        self.save()
+
+        results = {path: self._assemble(graph, path, root) for path, root in roots.items()}
+        names = set()
+        for result in results.values():
+            names.update(result.external)
+            names.update(result.unresolved)
+        found = self._resolve(interpreter, sorted(names))
+        for result in results.values():
+            self._classify(result, found)
+        return results
+
+    def stats_text(self) -> str:
+        return f"分析 {self.scanned} 个文件，复用缓存 {self.reused} 个"
+
+    def save(self):
+        """把分析结果写回磁盘缓存"""
+        if not self.use_disk_cache:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            tmp_path = os.path.join(self.cache_dir, self.INDEX_FILE + '.tmp')
+            try:
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump({'version': SCAN_VERSION, 'entries': self._entries}, f)
+                os.replace(tmp_path, os.path.join(self.cache_dir, self.INDEX_FILE))
+                self._dirty = False
+            except OSError as e:
+                logging.warning(f"写入导入扫描缓存失败: {e}")
+
+    def clear(self):
+        with self._lock:
+            self._entries = {}
+            self._resolved = {}
+            self._dirty = True
+        self.save()
+
+    def close(self):
+        """关闭进程池"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=False)
+
+    # ---------- 单文件分析与缓存 ----------
+    def _load_index(self):
+        self._entries = {}
+        if not self.use_disk_cache:
+            return
+        try:
+            with open(os.path.join(self.cache_dir, self.INDEX_FILE), 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            if index.get('version') == SCAN_VERSION:
+                self._entries = index.get('entries', {})
+        except (OSError, ValueError):
+            pass
+
+    def _ensure_scanned(self, paths: set):
+        """保证 paths 中每个文件都有最新的分析结果：先比较 mtime/大小，再比较内容哈希，都不同才重新分析"""
+        with self._lock:
+            if self._entries is None:
+                self._load_index()
+            entries = dict(self._entries)
+
+        stale = []
+        updates = {}
+        for path in paths:
+            try:
+                st = os.stat(path)
+                entry = entries.get(path)
+                if entry and entry['mtime_ns'] == st.st_mtime_ns and entry['size'] == st.st_size:
+                    self.reused += 1
+                    continue
+                digest = _file_digest(path)
+            except OSError as e:
+                updates[path] = {'mtime_ns': None, 'size': None, 'sha256': None,
+                                 'result': {'imports': [], 'dynamic': [], 'dynamic_sites': [],
+                                            'entry_points': [], 'error': f"无法读取: {e}"}}
+                continue
+            if entry and entry['sha256'] == digest:
+                # 内容未变（例如只是被 touch 过），只更新 mtime
+                updates[path] = dict(entry, mtime_ns=st.st_mtime_ns, size=st.st_size)
+                self.reused += 1
+            else:
+                stale.append((path, st, digest))
+
+        for (path, st, digest), result in zip(stale, self._scan_files([path for path, _, _ in stale])):
+            updates[path] = {'mtime_ns': st.st_mtime_ns, 'size': st.st_size, 'sha256': digest, 'result': result}
+        self.scanned += len(stale)
+
+        if updates:
+            with self._lock:
+                self._entries.update(updates)
+                self._dirty = True
+
+    def _scan_files(self, paths: list) -> list:
+        if len(paths) < POOL_MIN_FILES or self.max_workers < 2:
+            return [scan_file(path) for path in paths]
+        try:
+            with self._lock:
+                if self._executor is None:
+                    # spawn：界面进程中有 Qt 线程，fork 出的子进程可能死锁
+                    self._executor = ProcessPoolExecutor(self.max_workers,
+                                                         mp_context=multiprocessing.get_context('spawn'))
+                executor = self._executor
+            chunksize = max(1, len(paths) // (self.max_workers * 4))
+            return list(executor.map(scan_file, paths, chunksize=chunksize))
+        except Exception as e:
+            logging.warning(f"导入扫描进程池不可用，改为在当前进程中分析: {e}")
+            self.close()
+            return [scan_file(path) for path in paths]
+
+    def _file_result(self, path: str) -> dict:
+        with self._lock:
+            return self._entries[path]['result']
+
+    # ---------- 导入图 ----------
+    def _assemble(self, graph, script_path: str, root: str) -> ScanResult:
+        """汇总脚本导入图中所有文件的分析结果"""
+        scan = ScanResult(script_path)
+        files = []
+        seen = set()
+        stack = [os.path.abspath(script_path)]
+        while stack:
+            path = stack.pop()
+            if path in seen:
+                continue
+            seen.add(path)
+            files.append(path)
+            stack.extend(sorted(graph.deps(path, root)))
+
+        external = {}
+        hidden = set()
+        unresolved = set()
+        for path in files:
+            result = self._file_result(path)
+            base_dir = os.path.dirname(path)
+            if result['error']:
+                scan.errors.append([path, result['error']])
+            for level, module, _names, kind, _lineno in result['imports']:
+                if level:
+                    # 相对导入必须对应本地文件（from . import x 的 x 可能是 __init__ 中的名字，不检查）
+                    if module and not graph.resolve(root, base_dir, level, module):
+                        unresolved.add('.' * level + module)
+                    continue
+                if graph.resolve(root, base_dir, 0, module):
+                    continue
+                top = module.split('.')[0]
+                if top and KIND_RANK[kind] >= KIND_RANK.get(external.get(top), -1):
+                    external[top] = kind
+            for _lineno, name in result['dynamic']:
+                hidden.add(name)
+            scan.dynamic_sites += [[path, lineno] for lineno in result['dynamic_sites']]
+            for group in result['entry_points']:
+                if group not in scan.entry_point_groups:
+                    scan.entry_point_groups.append(group)
+
+        scan.local_files = sorted(files[1:])
+        scan.external = sorted(external)
+        scan._kinds = external
+        # 动态导入的外部模块也需要在目标解释器中检查
+        scan._dynamic_external = sorted(name for name in hidden
+                                        if not graph.resolve(root, root, 0, name))
+        scan.hidden_imports = sorted(hidden)
+        scan.unresolved = sorted(unresolved) + scan._dynamic_external
+        return scan
+
+    def _classify(self, scan: ScanResult, found: dict):
+        kinds = scan._kinds
+        missing_static = [name for name in scan.external if kinds[name] == 'static' and not found.get(name, True)]
+        missing_dynamic = [name for name in scan._dynamic_external if not found.get(name, True)]
+        relative = [name for name in scan.unresolved if name.startswith('.')]
+        scan.unresolved = sorted(set(relative + missing_static + missing_dynamic))
+        scan.optional_missing = [name for name in scan.external
+                                 if kinds[name] == 'optional' and not found.get(name, True)]
+        scan.excludes = [name for name in scan.external if kinds[name] == 'type_only' and found.get(name, True)]
+        scan.hidden_imports = [name for name in scan.hidden_imports if name not in missing_dynamic]
+
+    # ---------- 外部模块解析 ----------
+    def _resolve(self, interpreter: str, names: list) -> dict:
+        """在目标解释器中检查模块能否找到（结果在会话内缓存；检查失败时视为可解析，避免误报）"""
+        with self._lock:
+            missing = [name for name in names if (interpreter, name) not in self._resolved]
+        if missing:
+            try:
+                completed = subprocess.run([interpreter, '-c', RESOLVE_SCRIPT], input=json.dumps(missing),
+                                           stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                           universal_newlines=True, timeout=60, check=True)
+                found = json.loads(completed.stdout.strip().splitlines()[-1])
+            except (OSError, subprocess.SubprocessError, ValueError, IndexError) as e:
+                logging.warning(f"检查外部模块失败: {e}")
+                found = {}
+            with self._lock:
+                for name in missing:
+                    self._resolved[(interpreter, name)] = found.get(name, True)
+        with self._lock:
+            return {name: self._resolved[(interpreter, name)] for name in names}
+
+
+def collect_scripts(paths: list) -> list:
+    """展开命令行参数：目录中的每个 .py 文件都视为一个脚本"""
+    scripts = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs[:] = sorted(d for d in dirs if not d.startswith('.') and d != '__pycache__')
+                scripts += [os.path.join(root, name) for name in sorted(files) if name.endswith('.py')]
+        else:
+            scripts.append(path)
+    return [os.path.abspath(path) for path in scripts]
+
+
+def main(argv=None) -> int:
+    """命令行入口：有脚本存在无法解析的模块或语法错误时返回 1"""
+    parser = argparse.ArgumentParser(description="PythonEXE Maker 导入预扫描")
+    parser.add_argument('paths', nargs='+', help="脚本或目录（目录中的每个 .py 文件都视为一个脚本）")
+    parser.add_argument('-j', '--jobs', type=int, default=None, help="分析进程数（默认 CPU 核数）")
+    parser.add_argument('--python', default=sys.executable, help="检查外部模块时使用的目标解释器")
+    parser.add_argument('--no-cache', action='store_true', help="不读取也不写入磁盘缓存")
+    parser.add_argument('-o', '--output', help="把 JSON 结果写入文件（默认输出到标准输出）")
+    args = parser.parse_args(argv)
+
+    scripts = collect_scripts(args.paths)
+    scanner = ImportScanner(max_workers=args.jobs, use_disk_cache=not args.no_cache)
+    started = time.perf_counter()
+    try:
+        results = scanner.scan(scripts, args.python)
+    finally:
+        scanner.close()
+    print(f"扫描 {len(scripts)} 个脚本（{scanner.stats_text()}），用时 {time.perf_counter() - started:.2f}s",
+          file=sys.stderr)
+
+    text = json.dumps({path: result.to_dict() for path, result in results.items()}, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+    else:
+        print(text)
+    return 1 if any(result.unresolved or result.errors for result in results.values()) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
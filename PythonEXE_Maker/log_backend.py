@@ -0,0 +1,372 @@
+"""
+异步日志后端：工作线程只把日志记录与构建事件放入队列，由一个写入线程批量写文件。
+
+日志目录（默认为数据目录下的 logs）中：
+- app.log：程序本身的日志，以及各任务的警告与错误；
+- batches/<开始时间>/<脚本名>.log：每个转换任务的完整输出（含 PyInstaller 的每一行）；
+- batches/<开始时间>/summary.log：批次摘要，每个任务一行（成功/失败、耗时、产物或错误）；
+- batches/<开始时间>/events.ndjson：批次内全部构建事件（每行一个 JSON），供离线分析。
+
+任务的日志来自构建事件总线（后端在安装时订阅）；logging 的记录也可用 extra={'task': 脚本路径} 归入任务日志。
+
+文件超过大小上限时轮转：当前文件压缩为 name.1.log.gz，旧的压缩文件依次后移，超过保留个数的删除；
+程序启动时上一次会话的 app.log 同样压缩保留，不再被覆盖。只保留最近若干个批次目录。
+写入使用带缓冲的文件，队列暂时为空（或每隔 FLUSH_INTERVAL_S）时才刷新到磁盘，
+日志量再大也不会让构建线程等待文件写入。
+"""
+import os
+import sys
+import gzip
+import queue
+import time
+import shutil
+import logging
+import hashlib
+import threading
+from datetime import datetime
+from logging.handlers import QueueHandler
+
+from app_paths import data_dir
+from build_events import BuildEvent, event_bus, RESULT, LEVEL_NAMES, LOGGING_LEVELS
+
+APP_LOG = 'app.log'
+SUMMARY_LOG = 'summary.log'
+EVENTS_LOG = 'events.ndjson'
+# app.log 与每个任务日志的轮转大小上限，以及保留的压缩文件个数
+APP_MAX_BYTES = 10 * 1024 * 1024
+TASK_MAX_BYTES = 5 * 1024 * 1024
+EVENTS_MAX_BYTES = 50 * 1024 * 1024
+BACKUP_COUNT = 5
+# 保留的批次目录个数
+KEEP_BATCHES = 20
+# 写入线程每批最多处理的记录数，以及负载持续时最长的刷新间隔（秒）
+WRITE_BATCH = 1000
+FLUSH_INTERVAL_S = 0.5
+# 文件写缓冲大小
+BUFFER_SIZE = 64 * 1024
+LOG_FORMAT = '%(asctime)s [%(levelname)s] %(message)s'
+
+_STOP = object()
+
+
+class RotatingLogFile:
+    """按大小轮转的日志文件（只在写入线程中使用）"""
+
+    def __init__(self, path: str, max_bytes: int, backups: int = BACKUP_COUNT):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._file = None
+        self._size = 0
+        self.dirty = False
+
+    def write(self, text: str):
+        if self._file is None:
+            self._file = open(self.path, 'a', encoding='utf-8', buffering=BUFFER_SIZE)
+            self._size = self._file.tell()
+        data = text + '\n'
+        self._file.write(data)
+        self._size += len(data.encode('utf-8')) if not data.isascii() else len(data)
+        self.dirty = True
+        if self.max_bytes and self._size >= self.max_bytes:
+            self.rotate()
+
+    def flush(self):
+        if self._file is not None and self.dirty:
+            self._file.flush()
+        self.dirty = False
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self.dirty = False
+
+    def backup_path(self, index: int) -> str:
+        root, ext = os.path.splitext(self.path)
+        return f"{root}.{index}{ext}.gz"
+
+    def rotate(self):
+        """当前文件压缩为第 1 个备份，已有备份依次后移，超出保留个数的删除"""
+        self.close()
+        if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+            return
+        try:
+            for index in range(self.backups, 0, -1):
+                source = self.backup_path(index)
+                if not os.path.exists(source):
+                    continue
+                if index == self.backups:
+                    os.remove(source)
+                else:
+                    os.replace(source, self.backup_path(index + 1))
+            if self.backups:
+                with open(self.path, 'rb') as src, gzip.open(self.backup_path(1), 'wb') as dst:
+                    shutil.copyfileobj(src, dst)
+            os.remove(self.path)
+        except OSError as e:
+            sys.stderr.write(f"日志轮转失败: {e}\n")
+
+
+class LogBackend:
+    """
+    基于队列的日志后端：install() 在根 logger 上安装 QueueHandler，写入线程把记录分发到
+    app.log、当前批次的任务日志与摘要日志，以及（可选的）控制台。
+    """
+
+    def __init__(self, directory: str = None, app_max_bytes: int = APP_MAX_BYTES,
+                 task_max_bytes: int = TASK_MAX_BYTES, backups: int = BACKUP_COUNT,
+                 keep_batches: int = KEEP_BATCHES):
+        self.directory = directory or data_dir('logs')
+        self.task_max_bytes = task_max_bytes
+        self.backups = backups
+        self.keep_batches = keep_batches
+        self.formatter = logging.Formatter(LOG_FORMAT)
+        self.app_log = RotatingLogFile(os.path.join(self.directory, APP_LOG), app_max_bytes, backups)
+        self.console = None
+        self.console_level = logging.INFO
+        self.console_tasks = False
+        self.batch_dir = None
+        self._queue = queue.SimpleQueue()
+        self._handler = None
+        self._thread = None
+        # 写入线程持有的当前批次目录与文件
+        self._writer_batch = None
+        self._task_files = {}
+        self._summary = None
+        self._events = None
+        # 批次目录 → {任务键: 日志文件名}（调用方与写入线程都可能查询，加锁）
+        self._names_lock = threading.Lock()
+        self._task_names = {}
+
+    def install(self, level: int = logging.INFO, console=None, console_level: int = logging.INFO,
+                console_tasks: bool = False):
+        """
+        接管根 logger。console 为输出流（如 sys.stdout）时同时输出到控制台：默认只输出程序日志与
+        任务的警告/错误，console_tasks 为 True 时也输出任务的每一行。
+        """
+        self.console = console
+        self.console_level = console_level
+        self.console_tasks = console_tasks
+        # 上一次会话的日志压缩保留
+        self.app_log.rotate()
+        self._thread = threading.Thread(target=self._run, name='log-writer', daemon=True)
+        self._thread.start()
+        self._handler = QueueHandler(self._queue)
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(self._handler)
+        root.setLevel(level)
+        event_bus().subscribe(self.publish)
+        return self
+
+    def close(self):
+        """写完队列中剩余的记录并停止写入线程"""
+        if self._thread is None:
+            return
+        event_bus().unsubscribe(self.publish)
+        logging.getLogger().removeHandler(self._handler)
+        self._queue.put(_STOP)
+        self._thread.join(timeout=10)
+        self._thread = None
+
+    def publish(self, event: BuildEvent):
+        """构建事件订阅者：事件对象直接入队，由写入线程格式化"""
+        self._queue.put(event)
+
+    # ---------- 批次 ----------
+
+    def begin_batch(self, title: str = '') -> str:
+        """开始一个批次，返回批次目录；之后带 task 的记录写入该目录下各任务的日志"""
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S-%f')[:-3]
+        batch_dir = os.path.join(self.directory, 'batches', stamp)
+        os.makedirs(batch_dir, exist_ok=True)
+        with self._names_lock:
+            self.batch_dir = batch_dir
+            self._task_names[batch_dir] = {}
+        self._queue.put(('begin', batch_dir, title))
+        return batch_dir
+
+    def end_batch(self, text: str = ''):
+        self._queue.put(('end', text))
+
+    def task_log_path(self, task_key: str, batch_dir: str = None) -> str:
+        """批次（默认为当前批次）中该任务的日志文件路径；没有批次时返回 None"""
+        with self._names_lock:
+            batch_dir = batch_dir or self.batch_dir
+            if batch_dir is None:
+                return None
+            names = self._task_names.setdefault(batch_dir, {})
+            name = names.get(task_key)
+            if name is None:
+                stem = os.path.splitext(os.path.basename(task_key))[0] or 'task'
+                name = f"{stem}.log"
+                # 不同目录下的同名脚本加上路径哈希区分
+                if name in names.values() or name == SUMMARY_LOG:
+                    name = f"{stem}-{hashlib.sha1(task_key.encode('utf-8')).hexdigest()[:8]}.log"
+                names[task_key] = name
+            return os.path.join(batch_dir, name)
+
+    # ---------- 写入线程 ----------
+
+    def _run(self):
+        last_flush = time.monotonic()
+        while True:
+            try:
+                item = self._queue.get(timeout=FLUSH_INTERVAL_S)
+            except queue.Empty:
+                self._flush()
+                last_flush = time.monotonic()
+                continue
+            items = [item]
+            while len(items) < WRITE_BATCH:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            for item in items:
+                if item is _STOP:
+                    self._close_batch()
+                    self.app_log.close()
+                    self._flush_console()
+                    return
+                try:
+                    if isinstance(item, BuildEvent):
+                        self._write_event(item)
+                    elif isinstance(item, tuple):
+                        self._control(item)
+                    else:
+                        self._write(item)
+                except Exception as e:
+                    sys.stderr.write(f"写入日志失败: {e}\n")
+            # 队列已空或距上次刷新已久时才刷新，持续输出时由文件缓冲合并写入
+            if self._queue.empty() or time.monotonic() - last_flush >= FLUSH_INTERVAL_S:
+                self._flush()
+                last_flush = time.monotonic()
+
+    def _control(self, item: tuple):
+        if item[0] == 'begin':
+            _, batch_dir, title = item
+            self._close_batch()
+            self._writer_batch = batch_dir
+            self._summary = RotatingLogFile(os.path.join(batch_dir, SUMMARY_LOG), self.task_max_bytes, self.backups)
+            self._events = RotatingLogFile(os.path.join(batch_dir, EVENTS_LOG), EVENTS_MAX_BYTES, self.backups)
+            self._summary.write(f"{datetime.now():%Y-%m-%d %H:%M:%S} 批次开始 {title}".rstrip())
+            self._prune_batches()
+        elif item[0] == 'end' and self._summary is not None:
+            self._summary.write(f"{datetime.now():%Y-%m-%d %H:%M:%S} 批次结束 {item[1]}".rstrip())
+            self._close_batch()
+
+    def _write(self, record: logging.LogRecord):
+        self._write_line(getattr(record, 'task', None), record.levelno, self.formatter.format(record))
+
+    def _write_event(self, event: BuildEvent):
+        if self._events is not None:
+            self._events.write(event.to_json())
+        if event.kind == RESULT:
+            if self._summary is not None:
+                self._summary.write(f"{datetime.fromtimestamp(event.wall_time):%Y-%m-%d %H:%M:%S} "
+                                    f"{os.path.basename(event.task)}  {event.message}")
+            return
+        if event.message is None:
+            return
+        created = datetime.fromtimestamp(event.wall_time)
+        text = (f"{created:%Y-%m-%d %H:%M:%S},{created.microsecond // 1000:03d} "
+                f"[{LEVEL_NAMES[event.level]}] {event.message}")
+        self._write_line(event.task, LOGGING_LEVELS[event.level], text)
+
+    def _write_line(self, task_key: str, levelno: int, text: str):
+        task_file = self._task_file(task_key) if task_key is not None else None
+        if task_file is not None:
+            task_file.write(text)
+            # 任务的警告与错误同时写入 app.log，便于在一个文件中发现问题
+            text = f"[{os.path.basename(task_key)}] {text}"
+            if levelno >= logging.WARNING:
+                self.app_log.write(text)
+        else:
+            self.app_log.write(text)
+        if self.console is not None and levelno >= self.console_level and (
+                task_file is None or self.console_tasks or levelno >= logging.WARNING):
+            self.console.write(text + '\n')
+
+    def _task_file(self, task_key: str) -> RotatingLogFile:
+        if self._summary is None:
+            return None
+        task_file = self._task_files.get(task_key)
+        if task_file is None:
+            path = self.task_log_path(task_key, self._writer_batch)
+            task_file = self._task_files[task_key] = RotatingLogFile(path, self.task_max_bytes, self.backups)
+        return task_file
+
+    def _close_batch(self):
+        for task_file in self._task_files.values():
+            task_file.close()
+        self._task_files = {}
+        if self._summary is not None:
+            self._summary.close()
+            self._summary = None
+        if self._events is not None:
+            self._events.close()
+            self._events = None
+        if self._writer_batch is not None:
+            with self._names_lock:
+                if self._writer_batch != self.batch_dir:
+                    self._task_names.pop(self._writer_batch, None)
+            self._writer_batch = None
+
+    def _flush(self):
+        self.app_log.flush()
+        for task_file in self._task_files.values():
+            task_file.flush()
+        if self._summary is not None:
+            self._summary.flush()
+        if self._events is not None:
+            self._events.flush()
+        self._flush_console()
+
+    def _flush_console(self):
+        if self.console is not None:
+            try:
+                self.console.flush()
+            except (OSError, ValueError):
+                pass
+
+    def _prune_batches(self):
+        """只保留最近 keep_batches 个批次目录"""
+        root = os.path.join(self.directory, 'batches')
+        try:
+            batches = sorted(os.listdir(root))
+        except OSError:
+            return
+        for name in batches[:-self.keep_batches] if self.keep_batches else []:
+            shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+
+
+_backend = None
+
+
+def install_backend(directory: str = None, **kwargs) -> LogBackend:
+    """创建并安装进程内共享的日志后端（只在程序入口调用）"""
+    global _backend
+    _backend = LogBackend(directory).install(**kwargs)
+    return _backend
+
+
+def shared_backend() -> LogBackend:
+    """已安装的日志后端；未安装时（如作为库调用）返回 None"""
+    return _backend
+
+
+def begin_batch(title: str = '') -> str:
+    """开始一个批次（未安装日志后端时不做任何事，返回 None）"""
+    return _backend.begin_batch(title) if _backend else None
+
+
+def end_batch(text: str = ''):
+    if _backend:
+        _backend.end_batch(text)
+
+
+def task_log_path(task_key: str) -> str:
+    return _backend.task_log_path(task_key) if _backend else None
@@ -0,0 +1,70 @@
+import time
+import threading
+from collections import deque
+
+from build_events import RESULT
+
+# 缓冲区默认容量（行），超出后丢弃新行并计数
+DEFAULT_CAPACITY = 200000
+
+
+class LogPipeline:
+    """
+    工作线程 → GUI 的日志通道（订阅构建事件总线）：
+    工作线程只把带文本的 BuildEvent 对象本身追加到缓冲区（deque 的 append/popleft 在 CPython 中是原子的，无需加锁），
+    GUI 线程用定时器按帧时间预算分批取出，避免每行一个 Qt 信号导致事件循环饱和。
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self._buffer = deque()
+        # 丢弃只在缓冲区满时发生，计数时才加锁
+        self._drop_lock = threading.Lock()
+        self._dropped = 0
+        self._drained = 0
+
+    def __call__(self, event):
+        """事件订阅者（在工作线程中调用）：追加一个带文本的事件（缓冲区满时丢弃）；结果事件由界面另行显示"""
+        if event.message is None or event.kind == RESULT:
+            return
+        if len(self._buffer) >= self.capacity:
+            with self._drop_lock:
+                self._dropped += 1
+            return
+        self._buffer.append(event)
+
+    def drain(self, max_lines: int = 500, budget_ms: float = 8.0, sink=None) -> int:
+        """
+        GUI 线程调用：按块取出缓冲区中的事件交给 sink(events)，
+        单次调用最多耗时约 budget_ms 毫秒，返回取出的行数
+        """
+        deadline = time.perf_counter() + budget_ms / 1000.0
+        total = 0
+        buffer = self._buffer
+        popleft = buffer.popleft
+        while buffer:
+            chunk = []
+            for _ in range(min(max_lines, len(buffer))):
+                chunk.append(popleft())
+            total += len(chunk)
+            if sink:
+                sink(chunk)
+            if time.perf_counter() >= deadline:
+                break
+        self._drained += total
+        return total
+
+    @property
+    def queued(self) -> int:
+        """当前排队等待显示的行数"""
+        return len(self._buffer)
+
+    @property
+    def dropped(self) -> int:
+        """因缓冲区已满被丢弃的行数"""
+        return self._dropped
+
+    @property
+    def drained(self) -> int:
+        """累计已显示的行数"""
+        return self._drained
@@ -0,0 +1,458 @@
+import os
+import mmap
+import bisect
+import shutil
+import tempfile
+from array import array
+from collections import deque, OrderedDict
+
+from PyQt5.QtCore import Qt, QAbstractListModel, QModelIndex, QThread, pyqtSignal
+from PyQt5.QtGui import QColor, QFont
+from PyQt5.QtWidgets import QListView, QAbstractItemView
+
+# 日志级别与判断规则与构建事件一致（本模块继续导出这些名称）
+from build_events import LEVEL_INFO, LEVEL_WARNING, LEVEL_ERROR, LEVEL_NAMES, detect_level  # noqa: F401
+
+# 每个任务在内存中保留的行数，更早的行写入磁盘
+DEFAULT_RING_CAPACITY = 2000
+# 从磁盘读回时一次读取的行数，以及最多缓存的页数
+PAGE_LINES = 256
+MAX_CACHED_PAGES = 32
+
+
+class TaskLog:
+    """单个任务的日志：内存中为固定容量的环形缓冲区，溢出的旧行追加到磁盘文件"""
+
+    def __init__(self, spill_path: str, capacity: int):
+        self.spill_path = spill_path
+        self.ring = deque()
+        self.capacity = capacity
+        self.offsets = array('Q')      # 已写入磁盘的行的起始偏移
+        self._spill_file = None
+        self._spill_size = 0
+        self._pages = OrderedDict()
+
+    @property
+    def spilled(self) -> int:
+        return len(self.offsets)
+
+    def __len__(self):
+        return len(self.offsets) + len(self.ring)
+
+    def append(self, text: str):
+        self.ring.append(text)
+        if len(self.ring) > self.capacity:
+            self._spill(self.ring.popleft())
+
+    def _spill(self, text: str):
+        if self._spill_file is None:
+            self._spill_file = open(self.spill_path, 'ab')
+        data = text.replace('\n', ' ').encode('utf-8', errors='replace') + b'\n'
+        self.offsets.append(self._spill_size)
+        self._spill_file.write(data)
+        self._spill_size += len(data)
+
+    def line(self, index: int) -> str:
+        """取第 index 行（已落盘的行按页读回并缓存）"""
+        spilled = len(self.offsets)
+        if index >= spilled:
+            return self.ring[index - spilled]
+
+        page_no = index // PAGE_LINES
+        page = self._pages.get(page_no)
+        # 最后一页在读回之后可能又有新行落盘：缓存的页不足时重新读取
+        if page is None or len(page) < min(PAGE_LINES, spilled - page_no * PAGE_LINES):
+            page = self._load_page(page_no)
+            self._pages[page_no] = page
+            if len(self._pages) > MAX_CACHED_PAGES:
+                self._pages.popitem(last=False)
+        else:
+            self._pages.move_to_end(page_no)
+        return page[index - page_no * PAGE_LINES]
+
+    def _load_page(self, page_no: int) -> list:
+        self._spill_file.flush()
+        first = page_no * PAGE_LINES
+        last = min(first + PAGE_LINES, len(self.offsets))
+        start = self.offsets[first]
+        end = self.offsets[last] if last < len(self.offsets) else self._spill_size
+        with open(self.spill_path, 'rb') as f:
+            f.seek(start)
+            data = f.read(end - start)
+        return data.decode('utf-8', errors='replace').split('\n')[:last - first]
+
+    def close(self):
+        if self._spill_file:
+            self._spill_file.close()
+            self._spill_file = None
+        self._pages.clear()
+
+
+class LogStore:
+    """
+    所有任务日志的存储：文本保存在各任务的 TaskLog 中，
+    全局只保留每行的 (任务编号, 任务内行号, 级别) 三个紧凑数组，过滤时无需访问文本。
+    """
+
+    def __init__(self, ring_capacity: int = DEFAULT_RING_CAPACITY):
+        self.ring_capacity = ring_capacity
+        self._spill_dir = None
+        self._listeners = []
+        self.clear()
+
+    def clear(self):
+        """清空全部日志（删除落盘文件）"""
+        for task in getattr(self, 'tasks', []):
+            task.close()
+        if self._spill_dir:
+            shutil.rmtree(self._spill_dir, ignore_errors=True)
+        self._spill_dir = None
+
+        self.task_keys = []
+        self.task_ids = {}
+        self.tasks = []
+        self.line_task = array('I')
+        self.line_local = array('I')
+        self.line_level = array('B')
+        for listener in self._listeners:
+            listener.store_reset()
+
+    def __len__(self):
+        return len(self.line_level)
+
+    def add_listener(self, listener):
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def task_id(self, task_key: str) -> int:
+        """任务键（脚本路径，空字符串表示程序本身）对应的编号"""
+        task_id = self.task_ids.get(task_key)
+        if task_id is None:
+            if self._spill_dir is None:
+                self._spill_dir = tempfile.mkdtemp(prefix='pyexe-maker-log-')
+            task_id = len(self.tasks)
+            self.task_ids[task_key] = task_id
+            self.task_keys.append(task_key)
+            self.tasks.append(TaskLog(os.path.join(self._spill_dir, f"{task_id}.log"), self.ring_capacity))
+        return task_id
+
+    def extend(self, entries):
+        """批量追加 (任务键, 文本, 级别)，并一次性通知所有视图"""
+        start = len(self.line_level)
+        for task_key, text, level in entries:
+            task_id = self.task_id(task_key)
+            task = self.tasks[task_id]
+            self.line_task.append(task_id)
+            self.line_local.append(len(task))
+            self.line_level.append(level)
+            task.append(text)
+        end = len(self.line_level)
+        if end > start:
+            for listener in self._listeners:
+                listener.store_appended(start, end)
+
+    def text(self, row: int) -> str:
+        return self.tasks[self.line_task[row]].line(self.line_local[row])
+
+    def close(self):
+        self._listeners = []
+        self.clear()
+
+
+class LogListModel(QAbstractListModel):
+    """
+    LogStore 之上的列表模型：只为可见行取文本（落盘的行按需读回），
+    可按最低级别和任务过滤——过滤只扫描紧凑的元数据数组，不触碰文本。
+    """
+
+    def __init__(self, store: LogStore, task_key: str = None, min_level: int = LEVEL_INFO,
+                 show_task_name: bool = False, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self.task_key = task_key
+        self.min_level = min_level
+        self.show_task_name = show_task_name
+        self._rows = None      # 过滤后的全局行号；None 表示不过滤
+        self._names = {}
+        self._rebuild()
+        store.add_listener(self)
+
+    # ---------- 过滤 ----------
+    def _filtered(self) -> bool:
+        return self.task_key is not None or self.min_level > LEVEL_INFO
+
+    def _matches(self, row: int, task_id: int) -> bool:
+        return ((task_id < 0 or self.store.line_task[row] == task_id)
+                and self.store.line_level[row] >= self.min_level)
+
+    def _filter_task_id(self) -> int:
+        if self.task_key is None:
+            return -1
+        return self.store.task_ids.get(self.task_key, -2)
+
+    def _rebuild(self):
+        if not self._filtered():
+            self._rows = None
+            return
+        task_id = self._filter_task_id()
+        rows = array('I')
+        if task_id != -2:
+            line_task = self.store.line_task
+            line_level = self.store.line_level
+            min_level = self.min_level
+            for row in range(len(line_level)):
+                if line_level[row] >= min_level and (task_id < 0 or line_task[row] == task_id):
+                    rows.append(row)
+        self._rows = rows
+
+    def set_filter(self, task_key: str = None, min_level: int = LEVEL_INFO):
+        """设置过滤条件（task_key 为 None 表示全部任务）"""
+        self.beginResetModel()
+        self.task_key = task_key
+        self.min_level = min_level
+        self._rebuild()
+        self.endResetModel()
+
+    # ---------- LogStore 回调 ----------
+    def store_reset(self):
+        self.beginResetModel()
+        self._names = {}
+        self._rebuild()
+        self.endResetModel()
+
+    def store_appended(self, start: int, end: int):
+        if self._rows is None:
+            self.beginInsertRows(QModelIndex(), start, end - 1)
+            self.endInsertRows()
+            return
+        task_id = self._filter_task_id()
+        if task_id == -2:
+            return
+        new_rows = [row for row in range(start, end) if self._matches(row, task_id)]
+        if new_rows:
+            first = len(self._rows)
+            self.beginInsertRows(QModelIndex(), first, first + len(new_rows) - 1)
+            self._rows.extend(new_rows)
+            self.endInsertRows()
+
+    # ---------- 模型接口 ----------
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.store) if self._rows is None else len(self._rows)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row = index.row() if self._rows is None else self._rows[index.row()]
+        if role == Qt.DisplayRole:
+            text = self.store.text(row)
+            if self.show_task_name:
+                task_key = self.store.task_keys[self.store.line_task[row]]
+                if task_key:
+                    name = self._names.get(task_key)
+                    if name is None:
+                        name = self._names[task_key] = os.path.basename(task_key)
+                    text = f"[{name}] {text}"
+            return text
+        if role == Qt.ForegroundRole:
+            level = self.store.line_level[row]
+            if level == LEVEL_ERROR:
+                return QColor('red')
+            if level == LEVEL_WARNING:
+                return QColor('#B8860B')
+        return None
+
+    def detach(self):
+        """从 LogStore 注销（视图销毁前调用）"""
+        self.store.remove_listener(self)
+
+
+class LogListView(QListView):
+    """日志列表视图：统一行高，仅在已滚动到底部时自动跟随新行"""
+
+    def __init__(self, parent=None, font_size: int = 10):
+        super().__init__(parent)
+        self.setUniformItemSizes(True)
+        self.setLayoutMode(QListView.Batched)
+        self.setBatchSize(200)
+        self.setFont(QFont("Courier New", font_size))
+        self.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self._follow = True
+
+    def setModel(self, model):
+        old_model = self.model()
+        if old_model is not None:
+            old_model.rowsAboutToBeInserted.disconnect(self._remember_position)
+            old_model.rowsInserted.disconnect(self._follow_tail)
+        super().setModel(model)
+        model.rowsAboutToBeInserted.connect(self._remember_position)
+        model.rowsInserted.connect(self._follow_tail)
+
+    def _remember_position(self, *args):
+        bar = self.verticalScrollBar()
+        self._follow = bar.value() >= bar.maximum() - 2
+
+    def _follow_tail(self, *args):
+        if self._follow:
+            self.scrollToBottom()
+
+
+class LineIndexer(QThread):
+    """后台线程：在内存映射的文件区间 [start, end) 中查找换行符，分批发出行起始偏移"""
+    chunk_indexed = pyqtSignal(object, int)    # (行起始偏移数组, 已扫描到的位置)
+
+    BATCH_LINES = 50000
+
+    def __init__(self, mapped, start: int, end: int, parent=None):
+        super().__init__(parent)
+        self.mapped = mapped
+        self.start_pos = start
+        self.end_pos = end
+
+    def run(self):
+        find = self.mapped.find
+        pos = self.start_pos
+        end = self.end_pos
+        batch = array('Q')
+        while pos < end and not self.isInterruptionRequested():
+            newline = find(b'\n', pos, end)
+            if newline < 0:
+                break
+            pos = newline + 1
+            batch.append(pos)
+            if len(batch) >= self.BATCH_LINES:
+                self.chunk_indexed.emit(batch, pos)
+                batch = array('Q')
+        self.chunk_indexed.emit(batch, pos)
+
+
+class MappedLogModel(QAbstractListModel):
+    """
+    基于内存映射的日志文件模型：行偏移索引在后台线程中建立，
+    视图只为可见行解码文本；文件增长时只索引新增部分（跟随末尾）。
+    """
+    index_progress = pyqtSignal(int, int)      # (已索引行数, 文件大小)
+
+    def __init__(self, log_path: str, parent=None):
+        super().__init__(parent)
+        self.log_path = log_path
+        self._file = None
+        self._map = None
+        self._size = 0
+        self._offsets = array('Q', [0])        # 每个完整行的起始偏移（末尾元素为下一行起点）
+        self._indexer = None
+        self._stale = []                        # 索引线程结束前需保留的旧映射
+        self.open()
+
+    # ---------- 映射与索引 ----------
+    def open(self):
+        """（重新）打开文件并从头建立索引"""
+        self.beginResetModel()
+        self.close()
+        self._offsets = array('Q', [0])
+        self._size = 0
+        self.endResetModel()
+        self._file = open(self.log_path, 'rb')
+        self.refresh()
+
+    def refresh(self) -> bool:
+        """检查文件是否增长/被截断，并对新增部分建立索引；返回是否有变化"""
+        if self._indexer is not None and self._indexer.isRunning():
+            return False
+        try:
+            size = os.path.getsize(self.log_path)
+        except OSError:
+            return False
+        if size < self._size:
+            # 文件被截断或轮转，重新开始
+            self.open()
+            return True
+        if size == self._size or size == 0:
+            return False
+
+        if self._map is not None:
+            self._stale.append(self._map)
+        self._map = mmap.mmap(self._file.fileno(), size, access=mmap.ACCESS_READ)
+        scan_from = self._offsets[-1]
+        self._size = size
+        self._indexer = LineIndexer(self._map, scan_from, size, self)
+        self._indexer.chunk_indexed.connect(self._add_offsets)
+        self._indexer.finished.connect(self._stale.clear)
+        self._indexer.start()
+        return True
+
+    def _add_offsets(self, offsets, scanned_to: int):
+        if offsets:
+            first = len(self._offsets) - 1
+            self.beginInsertRows(QModelIndex(), first, first + len(offsets) - 1)
+            self._offsets.extend(offsets)
+            self.endInsertRows()
+        self.index_progress.emit(len(self._offsets) - 1, self._size)
+
+    @property
+    def indexing(self) -> bool:
+        return self._indexer is not None and self._indexer.isRunning()
+
+    def close(self):
+        if self._indexer is not None:
+            self._indexer.requestInterruption()
+            self._indexer.wait()
+            self._indexer = None
+        self._stale = []
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    # ---------- 访问 ----------
+    def line(self, row: int) -> str:
+        start = self._offsets[row]
+        end = self._offsets[row + 1]
+        return self._map[start:end].rstrip(b'\r\n').decode('utf-8', errors='replace')
+
+    def row_of_offset(self, offset: int) -> int:
+        """字节偏移所在的行号"""
+        return bisect.bisect_right(self._offsets, offset) - 1
+
+    def find(self, text: str, from_row: int = 0) -> int:
+        """
+        从 from_row 开始在映射内存中查找 text（直接在字节上搜索，不加载整个文件），
+        找不到时从头回绕一次；返回行号或 -1
+        """
+        rows = len(self._offsets) - 1
+        if not text or rows <= 0:
+            return -1
+        needle = text.encode('utf-8')
+        indexed_end = self._offsets[-1]
+        start = self._offsets[min(max(from_row, 0), rows)]
+        pos = self._map.find(needle, start, indexed_end)
+        if pos < 0 and start > 0:
+            pos = self._map.find(needle, 0, indexed_end)
+        return self.row_of_offset(pos) if pos >= 0 else -1
+
+    # ---------- 模型接口 ----------
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._offsets) - 1
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.DisplayRole:
+            return self.line(index.row())
+        if role == Qt.ForegroundRole:
+            # app.log 的格式为 "时间 [级别] 内容"，内容中也可能带有 PyInstaller 的级别
+            text = self.line(index.row())
+            if '[ERROR]' in text or detect_level(text) == LEVEL_ERROR:
+                return QColor('red')
+            if '[WARNING]' in text or detect_level(text) == LEVEL_WARNING:
+                return QColor('#B8860B')
+        return None
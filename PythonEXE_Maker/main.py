@@ -1,36 +1,64 @@
 import os
 import sys
+import time
+import atexit
 import subprocess
 import logging
 import webbrowser
+import multiprocessing
 
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QGridLayout,
-    QLabel, QPushButton, QFileDialog, QMessageBox, QTextEdit, QLineEdit,
+    QLabel, QPushButton, QFileDialog, QMessageBox, QLineEdit,
     QDialog, QProgressBar, QGroupBox, QMenuBar, QAction, QStatusBar, QListWidget,
-    QListWidgetItem, QSplitter, QScrollArea, QFrame, QTabWidget, QComboBox
+    QListWidgetItem, QSplitter, QTabWidget, QComboBox, QCheckBox,
+    QSpinBox
 )
-from PyQt5.QtGui import QFont, QIcon, QColor
-from PyQt5.QtCore import Qt, QThreadPool, QSize
+from PyQt5.QtGui import QFont, QIcon, QDesktopServices
+from PyQt5.QtCore import Qt, QThreadPool, QSize, QTimer, QUrl, pyqtSignal
 
 # 引入我们在其它模块里定义的类和函数 (假设本地已有)
 from converters import ConvertRunnable
-from dialogs import ManualDialog, AboutDialog, LogViewerDialog
+from build_cache import BuildCache
+from workdirs import WorkDirManager
+from scheduler import BuildScheduler, estimate_job_cost
+from toolchain import ToolchainService
+from warm_pool import WarmWorkerPool
+from async_engine import AsyncBuildEngine
+from supervisor import RetryBudget, DEFAULT_WALL_TIMEOUT_S, DEFAULT_IDLE_TIMEOUT_S, DEFAULT_MAX_RETRIES
+from assets import AssetCache
+from log_pipeline import LogPipeline
+from build_events import event_bus, EventMetrics, LOGGING_LEVELS
+from batch import BuildBatch
+from log_backend import install_backend, shared_backend, begin_batch, end_batch
+from build_history import BuildHistory
+from import_scan import ImportScanner
+from preflight import PreflightChecker, PreflightRunnable
+from shared_bundle import SharedBundleRunnable, plan_bundles
+from progress import summarize_batch, format_seconds
+from ui_probe import ResponsivenessProbe, InstrumentedApplication, profiling_enabled
+from task_table import TaskTableModel, TaskTableView
+from log_views import (
+    LogStore, LogListModel, LogListView, LEVEL_INFO, LEVEL_WARNING, LEVEL_ERROR
+)
+from dialogs import ManualDialog, AboutDialog, LogViewerDialog, BuildHistoryDialog
 from widgets import DropArea
 
 # ======= 日志配置 =======
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s [%(levelname)s] %(message)s',
-    handlers=[
-        logging.FileHandler("app.log", mode='w', encoding='utf-8'),
-        logging.StreamHandler(sys.stdout)
-    ]
-)
+def setup_logging(console: bool = True):
+    """
+    只在程序入口调用（导入扫描的进程池以 spawn 方式重新导入本模块时不应轮转 app.log）。
+    日志写入数据目录下的 logs：app.log 与每个批次的任务日志、摘要，由后台写入线程批量写入。
+    """
+    backend = install_backend(console=sys.stdout if console else None)
+    atexit.register(backend.close)
 
 
 class MainWindow(QMainWindow):
     """主窗口：包含主要的UI和逻辑"""
+    # 批次完成（参数为各状态的计数）；由最后一个结束的任务所在线程发出，经队列连接回到界面线程
+    batch_completed = pyqtSignal(object)
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("PythonEXE Maker")
@@ -41,14 +69,46 @@ class MainWindow(QMainWindow):
         self.script_paths = []
         # 线程池
         self.thread_pool = QThreadPool()
+        # 资源感知调度器：按内存/CPU 预算决定何时把任务交给线程池
+        self.scheduler = BuildScheduler(self.thread_pool, parent=self)
         # 转换任务列表
         self.tasks = []
-        # 每个脚本对应的任务UI元素
-        self.task_widgets = {}
+        # 转换任务表模型（每个脚本一行）
+        self.task_model = TaskTableModel(self)
 
         # 在此属性中存储“附加文件”的路径
         self.extra_file_path = None
 
+        # 持久化构建缓存（跨会话复用）
+        self.build_cache = BuildCache()
+        # 增量构建的持久化工作目录
+        self.work_dirs = WorkDirManager()
+        # 工具链探测服务：整个会话只探测一次 PyInstaller
+        self.toolchain = ToolchainService()
+        # 转换后图标与版本信息文件的缓存（批次级准备）
+        self.asset_cache = AssetCache()
+        # 预热的 PyInstaller 进程池（首次需要时创建）
+        self.warm_pool = None
+        # 异步构建引擎：一个事件循环线程驱动所有 PyInstaller 子进程，线程池线程只执行构建前后的准备与收尾
+        self.build_engine = AsyncBuildEngine()
+        # 会话级重试预算：暂时性故障自动重试，但重试总数有上限
+        self.retry_budget = RetryBudget()
+        # 构建事件总线：日志通道（由定时器批量刷新到界面）与批次指标作为订阅者
+        self.events = event_bus()
+        self.log_pipeline = LogPipeline()
+        self._pipeline_counts = None
+        self.event_metrics = EventMetrics()
+        self.events.subscribe(self.log_pipeline)
+        self.events.subscribe(self.event_metrics)
+        # 日志存储：每个任务一个固定容量的环形缓冲区，溢出部分落盘
+        self.log_store = LogStore()
+        # 构建历史数据库（分阶段耗时、产物大小、峰值内存）
+        self.history = BuildHistory()
+        # 导入预扫描（分析结果跨会话缓存，批次内共享的本地模块只分析一次）
+        self.import_scanner = ImportScanner()
+        # 构建前预检（按目标解释器创建，结果在会话内缓存）
+        self.preflight = None
+
         # 初始化UI
         self.init_ui()
         # 应用全局样式表(若需要美化UI，可在这里调用 self.apply_global_stylesheet())
@@ -57,6 +117,30 @@ class MainWindow(QMainWindow):
         # 检查并更新“开始转换”按钮的可用状态
         self.update_start_button_state()
 
+        # 定时批量刷新日志（约 20 次/秒）
+        self.log_timer = QTimer(self)
+        self.log_timer.setInterval(50)
+        self.log_timer.timeout.connect(self.drain_logs)
+        self.log_timer.start()
+
+        # 转换期间定时刷新各任务的估计进度、批次总进度与吞吐量
+        self.batch_started = None
+        self.progress_timer = QTimer(self)
+        self.progress_timer.setInterval(500)
+        self.progress_timer.timeout.connect(self.update_batch_progress)
+        # 当前批次（任务状态与完成计数）
+        self.batch = None
+        self.batch_completed.connect(self.conversion_complete)
+
+        # 界面响应度测量模式（设置环境变量 PYEXE_MAKER_PROFILE_UI=1 启用）
+        self.ui_probe = None
+        if profiling_enabled():
+            self.ui_probe = ResponsivenessProbe(self)
+            self.ui_probe.watch_pipeline(self.log_pipeline)
+            self.ui_probe.watch_paint('task_view', self.task_view.viewport())
+            self.ui_probe.watch_paint('log_view', self.log_view.viewport())
+            self.ui_probe.watch_paint('task_log_view', self.task_log_view.viewport())
+
     def init_ui(self):
         # 创建中央部件
         central_widget = QWidget()
@@ -115,13 +199,25 @@ class MainWindow(QMainWindow):
         task_progress_group = QGroupBox("转换任务进度")
         task_progress_layout = QVBoxLayout(task_progress_group)
 
-        self.task_area = QScrollArea()
-        self.task_area.setWidgetResizable(True)
-        self.task_container = QWidget()
-        self.task_layout = QVBoxLayout(self.task_container)
-        self.task_layout.setAlignment(Qt.AlignTop)
-        self.task_area.setWidget(self.task_container)
-        task_progress_layout.addWidget(self.task_area)
+        self.queue_label = QLabel()
+        task_progress_layout.addWidget(self.queue_label)
+        self.scheduler.counts_changed.connect(self.update_queue_counts)
+        self.update_queue_counts(0, 0, 0)
+
+        # 任务表 + 选中任务的日志（按需展开）
+        self.task_splitter = QSplitter(Qt.Vertical)
+        self.task_view = TaskTableView()
+        self.task_view.setModel(self.task_model)
+        self.task_view.setToolTip("选中某个任务可在下方查看其转换日志。")
+        self.task_view.selectionModel().currentRowChanged.connect(self.show_task_log)
+        self.task_splitter.addWidget(self.task_view)
+
+        self.task_log_model = LogListModel(self.log_store, task_key='', parent=self)
+        self.task_log_view = LogListView(font_size=9)
+        self.task_log_view.setModel(self.task_log_model)
+        self.task_log_view.hide()
+        self.task_splitter.addWidget(self.task_log_view)
+        task_progress_layout.addWidget(self.task_splitter)
 
         task_progress_group.setLayout(task_progress_layout)
         task_tab_layout.addWidget(task_progress_group)
@@ -132,16 +228,41 @@ class MainWindow(QMainWindow):
         log_tab = QWidget()
         log_tab_layout = QVBoxLayout(log_tab)
 
-        self.status_text_edit = QTextEdit()
-        self.status_text_edit.setReadOnly(True)
-        self.status_text_edit.setFont(QFont("Courier New", 10))
-        log_tab_layout.addWidget(self.status_text_edit)
+        # 日志过滤（按级别、按任务）
+        filter_layout = QHBoxLayout()
+        filter_layout.addWidget(QLabel("级别:"))
+        self.level_filter_combo = QComboBox()
+        self.level_filter_combo.addItem("全部", LEVEL_INFO)
+        self.level_filter_combo.addItem("警告及以上", LEVEL_WARNING)
+        self.level_filter_combo.addItem("仅错误", LEVEL_ERROR)
+        self.level_filter_combo.currentIndexChanged.connect(self.apply_log_filter)
+        filter_layout.addWidget(self.level_filter_combo)
+        filter_layout.addWidget(QLabel("任务:"))
+        self.task_filter_combo = QComboBox()
+        self.task_filter_combo.addItem("全部任务", None)
+        self.task_filter_combo.currentIndexChanged.connect(self.apply_log_filter)
+        filter_layout.addWidget(self.task_filter_combo, 1)
+        log_tab_layout.addLayout(filter_layout)
+
+        self.log_model = LogListModel(self.log_store, show_task_name=True, parent=self)
+        self.log_view = LogListView()
+        self.log_view.setModel(self.log_model)
+        log_tab_layout.addWidget(self.log_view)
+
+        self.pipeline_label = QLabel()
+        self.pipeline_label.setToolTip("工作线程输出在日志通道中的排队行数与因积压被丢弃的行数。")
+        log_tab_layout.addWidget(self.pipeline_label)
 
         self.progress_bar = QProgressBar()
         self.progress_bar.setRange(0, 100)
+        self.progress_bar.setToolTip("按各脚本历史构建耗时加权的批次总进度与预计剩余时间。")
         self.progress_bar.hide()
         log_tab_layout.addWidget(self.progress_bar)
 
+        self.throughput_label = QLabel()
+        self.throughput_label.setToolTip("本批次的吞吐量：每分钟完成的脚本数，以及每次构建平均消耗的 CPU 时间。")
+        log_tab_layout.addWidget(self.throughput_label)
+
         self.status_bar = QStatusBar()
         log_tab_layout.addWidget(self.status_bar)
 
@@ -167,6 +288,14 @@ class MainWindow(QMainWindow):
 
         # 文件菜单
         file_menu = menubar.addMenu('文件')
+        clear_cache_action = QAction('清空构建缓存', self)
+        clear_cache_action.triggered.connect(self.clear_build_cache)
+        file_menu.addAction(clear_cache_action)
+
+        clear_work_action = QAction('清空增量构建目录', self)
+        clear_work_action.triggered.connect(self.clear_work_dirs)
+        file_menu.addAction(clear_work_action)
+
         exit_action = QAction('退出', self)
         exit_action.triggered.connect(self.close)
         file_menu.addAction(exit_action)
@@ -203,6 +332,14 @@ class MainWindow(QMainWindow):
         view_log_action.triggered.connect(self.view_log_file)
         log_menu.addAction(view_log_action)
 
+        log_dir_action = QAction('打开日志目录', self)
+        log_dir_action.triggered.connect(self.open_log_dir)
+        log_menu.addAction(log_dir_action)
+
+        history_action = QAction('构建历史', self)
+        history_action.triggered.connect(self.show_build_history)
+        log_menu.addAction(history_action)
+
     def init_settings_group(self) -> QGroupBox:
         """初始化基本设置、EXE信息和高级设置的组"""
         settings_group = QGroupBox("基本设置")
@@ -216,6 +353,16 @@ class MainWindow(QMainWindow):
         settings_layout.addWidget(mode_label, 0, 0)
         settings_layout.addWidget(self.mode_combo, 0, 1)
 
+        # 输出形式
+        layout_label = QLabel("输出形式:")
+        self.layout_combo = QComboBox()
+        self.layout_combo.addItem("单文件（onefile）", 'onefile')
+        self.layout_combo.addItem("目录（onedir，启动更快）", 'onedir')
+        self.layout_combo.setToolTip("单文件 EXE 每次启动都要把内容解包到临时目录；"
+                                     "目录形式省去解包，适合频繁调用的命令行工具。")
+        settings_layout.addWidget(layout_label, 1, 0)
+        settings_layout.addWidget(self.layout_combo, 1, 1)
+
         # 输出目录
         output_label = QLabel("输出目录:")
         self.output_edit = QLineEdit()
@@ -230,8 +377,8 @@ class MainWindow(QMainWindow):
         output_h_layout.addWidget(self.output_edit)
         output_h_layout.addWidget(output_button)
 
-        settings_layout.addWidget(output_label, 1, 0)
-        settings_layout.addLayout(output_h_layout, 1, 1)
+        settings_layout.addWidget(output_label, 2, 0)
+        settings_layout.addLayout(output_h_layout, 2, 1)
 
         # EXE 信息
         exe_info_group = QGroupBox("EXE 信息")
@@ -272,7 +419,7 @@ class MainWindow(QMainWindow):
         exe_info_layout.addWidget(self.copyright_edit, 3, 1)
 
         exe_info_group.setLayout(exe_info_layout)
-        settings_layout.addWidget(exe_info_group, 2, 0, 1, 2)
+        settings_layout.addWidget(exe_info_group, 3, 0, 1, 2)
 
         # 高级设置
         advanced_settings_group = QGroupBox("高级设置")
@@ -295,8 +442,102 @@ class MainWindow(QMainWindow):
         advanced_settings_layout.addWidget(extra_file_label, 1, 0)
         advanced_settings_layout.addWidget(self.select_file_button, 1, 1)
 
+        # 构建缓存开关
+        self.cache_checkbox = QCheckBox("使用构建缓存")
+        self.cache_checkbox.setChecked(True)
+        self.cache_checkbox.setToolTip("脚本、依赖、参数、图标和版本信息均未变化时，直接复用上次的构建产物。")
+        advanced_settings_layout.addWidget(self.cache_checkbox, 2, 0, 1, 2)
+
+        # 增量构建开关
+        self.incremental_checkbox = QCheckBox("增量构建（保留工作目录）")
+        self.incremental_checkbox.setChecked(True)
+        self.incremental_checkbox.setToolTip("每个脚本使用独立且保留的工作目录，仅在脚本或参数变化时执行 --clean。")
+        advanced_settings_layout.addWidget(self.incremental_checkbox, 3, 0, 1, 2)
+
+        # 预热进程开关（依赖 fork，仅 Linux/macOS 可用）
+        self.warm_checkbox = QCheckBox("使用预热的 PyInstaller 进程")
+        self.warm_checkbox.setChecked(hasattr(os, 'fork'))
+        self.warm_checkbox.setEnabled(hasattr(os, 'fork'))
+        self.warm_checkbox.setToolTip("复用已导入 PyInstaller 的常驻进程，省去每次构建的解释器启动与模块导入时间（仅 Linux/macOS）。")
+        advanced_settings_layout.addWidget(self.warm_checkbox, 5, 0, 1, 2)
+
+        # 导入预扫描开关
+        self.scan_checkbox = QCheckBox("导入预扫描（自动补充隐藏导入）")
+        self.scan_checkbox.setChecked(True)
+        self.scan_checkbox.setToolTip("构建前静态分析脚本及其本地模块的导入：为常量参数的动态导入添加 --hidden-import，"
+                                      "并提前提示目标解释器中无法解析的模块。")
+        advanced_settings_layout.addWidget(self.scan_checkbox, 6, 0, 1, 2)
+
+        # 构建前预检开关
+        self.preflight_checkbox = QCheckBox("构建前预检（语法与顶层导入）")
+        self.preflight_checkbox.setChecked(True)
+        self.preflight_checkbox.setToolTip("在目标解释器中并行编译所有脚本并检查模块级导入，"
+                                           "未通过的脚本直接判定失败，不再启动 PyInstaller。")
+        advanced_settings_layout.addWidget(self.preflight_checkbox, 7, 0, 1, 2)
+
+        # 共享运行时开关
+        self.bundle_checkbox = QCheckBox("共享运行时（MERGE 合并打包）")
+        self.bundle_checkbox.setChecked(False)
+        self.bundle_checkbox.setToolTip("同一输出目录下的脚本写进一个 spec，在一次 PyInstaller 运行中构建，"
+                                        "共有的库只打包进第一个 EXE，其余 EXE 运行时引用它（需放在同一目录分发）。"
+                                        "合并打包不使用构建缓存。")
+        advanced_settings_layout.addWidget(self.bundle_checkbox, 8, 0, 1, 2)
+
+        # 构建后测量启动耗时
+        startup_label = QLabel("测量启动耗时:")
+        self.startup_spin = QSpinBox()
+        self.startup_spin.setRange(0, 50)
+        self.startup_spin.setValue(0)
+        self.startup_spin.setSpecialValueText("关闭")
+        self.startup_spin.setSuffix(" 次")
+        self.startup_spin.setToolTip("构建成功后把生成的 EXE 连续启动若干次（每次最多 10 秒），报告冷/热启动、"
+                                     "解包与模块导入耗时，用于比较单文件与目录两种输出形式。")
+        advanced_settings_layout.addWidget(startup_label, 9, 0)
+        advanced_settings_layout.addWidget(self.startup_spin, 9, 1)
+
+        # 子进程监管：总时限、无输出时限与暂时性故障的重试次数
+        wall_timeout_label = QLabel("构建时限:")
+        self.wall_timeout_spin = QSpinBox()
+        self.wall_timeout_spin.setRange(0, 600)
+        self.wall_timeout_spin.setValue(DEFAULT_WALL_TIMEOUT_S // 60)
+        self.wall_timeout_spin.setSpecialValueText("不限制")
+        self.wall_timeout_spin.setSuffix(" 分钟")
+        self.wall_timeout_spin.setToolTip("单次 PyInstaller 运行超过该时间即结束它及其派生的全部进程（不重试）。")
+        advanced_settings_layout.addWidget(wall_timeout_label, 10, 0)
+        advanced_settings_layout.addWidget(self.wall_timeout_spin, 10, 1)
+
+        idle_timeout_label = QLabel("无输出时限:")
+        self.idle_timeout_spin = QSpinBox()
+        self.idle_timeout_spin.setRange(0, 120)
+        self.idle_timeout_spin.setValue(DEFAULT_IDLE_TIMEOUT_S // 60)
+        self.idle_timeout_spin.setSpecialValueText("不限制")
+        self.idle_timeout_spin.setSuffix(" 分钟")
+        self.idle_timeout_spin.setToolTip("PyInstaller 连续这么久没有任何输出时视为卡死，结束整个进程组并按暂时性故障重试。")
+        advanced_settings_layout.addWidget(idle_timeout_label, 11, 0)
+        advanced_settings_layout.addWidget(self.idle_timeout_spin, 11, 1)
+
+        retry_label = QLabel("失败重试:")
+        self.retry_spin = QSpinBox()
+        self.retry_spin.setRange(0, 5)
+        self.retry_spin.setValue(DEFAULT_MAX_RETRIES)
+        self.retry_spin.setSpecialValueText("不重试")
+        self.retry_spin.setSuffix(" 次")
+        self.retry_spin.setToolTip("进程被信号结束、长时间无输出或文件被其他程序占用等暂时性故障时自动重试的次数；"
+                                   "本次会话的重试总数另有上限。")
+        advanced_settings_layout.addWidget(retry_label, 12, 0)
+        advanced_settings_layout.addWidget(self.retry_spin, 12, 1)
+
+        # 最大并行任务数（实际并行度还受内存与 CPU 负载约束）
+        jobs_label = QLabel("并行任务数:")
+        self.jobs_spin = QSpinBox()
+        self.jobs_spin.setRange(1, 64)
+        self.jobs_spin.setValue(self.scheduler.max_jobs)
+        self.jobs_spin.setToolTip("同时运行的转换任务上限。调度器还会根据可用内存和 CPU 负载推迟启动新任务。")
+        advanced_settings_layout.addWidget(jobs_label, 4, 0)
+        advanced_settings_layout.addWidget(self.jobs_spin, 4, 1)
+
         advanced_settings_group.setLayout(advanced_settings_layout)
-        settings_layout.addWidget(advanced_settings_group, 3, 0, 1, 2)
+        settings_layout.addWidget(advanced_settings_group, 4, 0, 1, 2)
 
         settings_group.setLayout(settings_layout)
         return settings_group
@@ -404,26 +645,50 @@ class MainWindow(QMainWindow):
         # 禁用相关UI
         self.toggle_ui_elements(False)
         # 清空日志
-        self.status_text_edit.clear()
+        self.log_store.clear()
+        self.event_metrics.clear()
+        begin_batch(f"{len(self.script_paths)} 个脚本")
         self.append_status("开始转换...")
+        self.progress_bar.setValue(0)
+        self.progress_bar.setFormat("%p%")
         self.progress_bar.show()
+        self.throughput_label.clear()
         self.status_bar.showMessage("转换中...")
 
         self.tasks = []
-        self.task_widgets = {}
-
-        # 清空任务进度区域
-        for i in reversed(range(self.task_layout.count())):
-            w = self.task_layout.itemAt(i).widget()
-            if w:
-                w.setParent(None)
+        # 批次跟踪各任务状态，最后一个任务发布结果事件后发出 batch_completed
+        self.batch = BuildBatch(self.script_paths, events=self.events)
+        self.batch.done.add_done_callback(lambda future: self.batch_completed.emit(future.result()))
+        self.batch.attach()
+        self.scheduler.reset()
+        self.scheduler.set_max_jobs(self.jobs_spin.value())
+        # 每个运行中的构建都可能同时在收尾（写缓存、测量启动耗时），收尾线程不少于并行数
+        self.build_engine.ensure_finish_workers(self.jobs_spin.value())
+        warm_pool = self.get_warm_pool() if self.warm_checkbox.isChecked() else None
+
+        # 在任务分发前为整个批次准备一次图标与版本信息文件
+        exe_names = [exe_name or os.path.splitext(os.path.basename(path))[0] for path in self.script_paths]
+        # 工具链尚未探测时不在界面线程中探测（版本信息文件的键仍包含本进程的 PyInstaller 版本）
+        toolchain = self.toolchain.current
+        assets = self.asset_cache.prepare_batch(exe_names, icon_path, file_version, copyright_info,
+                                                report=self.append_status,
+                                                toolchain_id=toolchain.fingerprint() if toolchain else '')
+
+        # 重置任务表（一次模型重置）
+        self.task_model.reset_tasks(self.script_paths)
+        self.task_log_view.hide()
+
+        # 任务过滤列表
+        self.task_filter_combo.blockSignals(True)
+        self.task_filter_combo.clear()
+        self.task_filter_combo.addItem("全部任务", None)
+        for script_path in self.script_paths:
+            self.task_filter_combo.addItem(os.path.basename(script_path), script_path)
+        self.task_filter_combo.blockSignals(False)
+        self.apply_log_filter()
 
         # 为每个脚本创建转换任务
         for script_path in self.script_paths:
-            task_widget = self.create_task_widget(script_path)
-            self.task_layout.addWidget(task_widget['widget'])
-            self.task_widgets[script_path] = task_widget
-
             runnable = ConvertRunnable(
                 script_path=script_path,
                 convert_mode=convert_mode,
@@ -433,15 +698,24 @@ class MainWindow(QMainWindow):
                 file_version=file_version,
                 copyright_info=copyright_info,
                 extra_library=extra_library,
-                additional_options=additional_options
-            )
-            # 信号连接：把脚本路径一起传过去以区分不同任务
-            runnable.signals.status_updated.connect(
-                lambda msg, sp=script_path: self.update_status(msg, sp)
-            )
-            runnable.signals.progress_updated.connect(
-                lambda val, sp=script_path: self.update_progress(val, sp)
+                additional_options=additional_options,
+                build_cache=self.build_cache if self.cache_checkbox.isChecked() else None,
+                work_dirs=self.work_dirs if self.incremental_checkbox.isChecked() else None,
+                toolchain=self.toolchain,
+                warm_pool=warm_pool,
+                assets=assets,
+                events=self.events,
+                history=self.history,
+                import_scanner=self.import_scanner if self.scan_checkbox.isChecked() else None,
+                output_layout=self.layout_combo.currentData(),
+                startup_runs=self.startup_spin.value(),
+                engine=self.build_engine,
+                wall_timeout=self.wall_timeout_spin.value() * 60,
+                idle_timeout=self.idle_timeout_spin.value() * 60,
+                max_retries=self.retry_spin.value(),
+                retry_budget=self.retry_budget
             )
+            # 信号连接：把脚本路径一起传过去以区分不同任务（日志经事件总线到达，进度由 progress_timer 轮询估计值）
             runnable.signals.conversion_finished.connect(
                 lambda exe, size, sp=script_path: self.conversion_finished(exe, size, sp)
             )
@@ -449,51 +723,137 @@ class MainWindow(QMainWindow):
                 lambda err, sp=script_path: self.conversion_failed(err, sp)
             )
 
-            self.thread_pool.start(runnable)
+            if self.ui_probe:
+                self.ui_probe.watch_signals(runnable.signals)
+
             self.tasks.append(runnable)
 
+        if not self.preflight_checkbox.isChecked():
+            self.submit_tasks(self.tasks)
+
+        # 预检在线程池中执行，通过的任务再交给调度器
+        if self.preflight_checkbox.isChecked():
+            self.append_status(f"正在预检 {len(self.tasks)} 个脚本...")
+            preflight = PreflightRunnable(self.get_preflight(), self.script_paths)
+            preflight.signals.checked.connect(
+                lambda report, tasks=list(self.tasks): self.preflight_checked(report, tasks)
+            )
+            self.thread_pool.start(preflight)
+
+        self.batch_started = time.perf_counter()
+        self.progress_timer.start()
+        if self.ui_probe:
+            self.ui_probe.reset()
+            self.ui_probe.start()
         self.cancel_button.setEnabled(True)
 
+    def get_preflight(self) -> PreflightChecker:
+        """按当前工具链的解释器返回预检器（复用导入预扫描的缓存）"""
+        if self.preflight is None or self.preflight.interpreter != self.toolchain.interpreter:
+            self.preflight = PreflightChecker(self.toolchain.interpreter, import_scanner=self.import_scanner)
+        return self.preflight
+
+    def submit_tasks(self, tasks: list):
+        """把任务交给调度器；共享运行时模式下同一输出目录的任务合并为一个打包任务"""
+        if not self.bundle_checkbox.isChecked():
+            for task in tasks:
+                self.scheduler.submit(task)
+            return
+        for group in plan_bundles(tasks):
+            if len(group) == 1:
+                self.scheduler.submit(group[0])
+                continue
+            bundle = SharedBundleRunnable(group)
+            self.append_status(f"共享运行时打包：{', '.join(os.path.basename(task.script_path) for task in group)}")
+            self.scheduler.submit(bundle, expected_cost=sum(estimate_job_cost(task.script_path) for task in group))
+
+    def preflight_checked(self, report: dict, tasks: list):
+        """预检完成：未通过的任务直接判定失败，其余交给调度器"""
+        rejected = 0
+        passed = []
+        for task in tasks:
+            # 预检期间已取消：仍交给调度器，由任务自己报告取消结果
+            if not task._is_running:
+                self.scheduler.submit(task)
+                continue
+            errors = report.get(task.script_path, [])
+            if not errors:
+                passed.append(task)
+                continue
+            rejected += 1
+            task._is_running = False
+            for error in errors:
+                task.update_status(f"预检未通过: {error}", LEVEL_ERROR)
+            message = f"预检未通过: {errors[0]}" + (f" 等 {len(errors)} 项" if len(errors) > 1 else "")
+            task.publish_result(False, message)
+            self.conversion_failed(message, task.script_path)
+        self.append_status(f"预检完成：{len(tasks) - rejected} 个脚本通过，{rejected} 个未通过。")
+        self.submit_tasks(passed)
+
     def cancel_conversion(self):
         """取消所有正在进行的转换任务"""
         if hasattr(self, 'tasks') and self.tasks:
+            queued = self.scheduler.queued_count
             for task in self.tasks:
                 task.stop()
-            self.append_status("已请求取消转换任务。")
+            # 排队中的任务立即放行，各自报告取消结果；所有任务结束后由批次完成信号恢复界面
+            self.scheduler.dispatch()
+            self.append_status(f"已请求取消转换任务（{queued} 个排队任务不再构建），等待运行中的任务结束...")
             self.status_bar.showMessage("取消转换...")
             self.cancel_button.setEnabled(False)
-            # 因为主动取消，这里直接调用 conversion_complete 来恢复UI
-            self.conversion_complete()
 
     def conversion_finished(self, exe_path: str, exe_size: int, script_path: str):
         """处理单个脚本转换完成的情况"""
         self.append_status(f"转换成功! EXE 文件位于: {exe_path} (大小: {exe_size} KB)")
-        task_widget = self.task_widgets.get(script_path)
-        if task_widget:
-            task_widget['status'].setText(f"转换成功! 文件: {exe_path} ({exe_size} KB)")
-            task_widget['progress'].setValue(100)
-        # 若所有任务都结束，则执行收尾
-        if all(not getattr(task, '_is_running', False) for task in self.tasks):
-            self.conversion_complete()
+        self.task_model.set_status(script_path, f"转换成功! 文件: {exe_path} ({exe_size} KB)")
+        self.task_model.set_progress(script_path, 100)
 
     def conversion_failed(self, error_message: str, script_path: str):
         """处理单个脚本转换失败的情况"""
-        self.append_status(f"<span style='color:red;'>{error_message}</span>")
-        task_widget = self.task_widgets.get(script_path)
-        if task_widget:
-            task_widget['status'].setText(f"<span style='color:red;'>{error_message}</span>")
-            task_widget['progress'].setValue(0)
-        # 若所有任务都结束，则执行收尾
-        if all(not getattr(task, '_is_running', False) for task in self.tasks):
-            self.conversion_complete()
-
-    def conversion_complete(self):
-        """所有转换任务完成或取消后的处理"""
+        self.append_status(error_message, LEVEL_ERROR)
+        self.task_model.set_status(script_path, error_message, failed=True)
+        self.task_model.set_progress(script_path, 0)
+
+    def conversion_complete(self, counts: dict = None):
+        """批次中所有任务都已结束（成功、失败或取消）后的处理"""
         self.toggle_ui_elements(True)
+        self.progress_timer.stop()
+        self.update_batch_progress()
         self.progress_bar.hide()
-        self.status_bar.showMessage("转换完成。")
+        if self.cache_checkbox.isChecked():
+            self.append_status(f"构建缓存统计: {self.build_cache.stats_text()}")
+        totals = self.event_metrics.totals()
+        self.append_status(f"PyInstaller 输出 {totals['output_lines']} 行，警告 {totals['warnings']} 条，"
+                           f"错误 {totals['errors']} 条。")
+        if self.ui_probe and self.ui_probe.active:
+            self.ui_probe.stop()
+            self.append_status(self.ui_probe.summary_text())
+        summary = self.batch.summary_text()
+        self.append_status(f"批次结束：{summary}")
+        self.status_bar.showMessage(f"转换完成：{summary}")
+        elapsed = time.perf_counter() - self.batch_started if self.batch_started else 0
+        end_batch(f"{summary}，耗时 {format_seconds(elapsed)}")
         self.tasks = []
 
+    def get_warm_pool(self) -> WarmWorkerPool:
+        """按需创建预热进程池，容量与并行任务数一致"""
+        if self.warm_pool is None or self.warm_pool.max_size != self.jobs_spin.value():
+            if self.warm_pool:
+                self.warm_pool.shutdown()
+            self.warm_pool = WarmWorkerPool(self.toolchain.interpreter, max_size=self.jobs_spin.value(),
+                                            prewarm=min(len(self.script_paths), self.jobs_spin.value()))
+        return self.warm_pool
+
+    def clear_build_cache(self):
+        """清空持久化构建缓存"""
+        self.build_cache.clear()
+        self.append_status("构建缓存已清空。")
+
+    def clear_work_dirs(self):
+        """删除所有增量构建工作目录"""
+        self.work_dirs.clear()
+        self.append_status("增量构建工作目录已清空。")
+
     def validate_version(self, version: str) -> bool:
         """验证版本号格式 (X.X.X.X)"""
         parts = version.split('.')
@@ -503,6 +863,7 @@ class MainWindow(QMainWindow):
         """启用或禁用与任务相关的 UI"""
         self.start_button.setEnabled(enabled and bool(self.script_paths))
         self.mode_combo.setEnabled(enabled)
+        self.layout_combo.setEnabled(enabled)
         self.output_edit.setEnabled(enabled)
         self.name_edit.setEnabled(enabled)
         self.icon_edit.setEnabled(enabled)
@@ -511,31 +872,77 @@ class MainWindow(QMainWindow):
         self.drop_area.setEnabled(enabled)
         self.script_list.setEnabled(enabled)
         self.select_file_button.setEnabled(enabled)
+        self.cache_checkbox.setEnabled(enabled)
+        self.incremental_checkbox.setEnabled(enabled)
+        self.jobs_spin.setEnabled(enabled)
+        self.warm_checkbox.setEnabled(enabled and hasattr(os, 'fork'))
+        self.scan_checkbox.setEnabled(enabled)
+        self.preflight_checkbox.setEnabled(enabled)
+        self.bundle_checkbox.setEnabled(enabled)
+        self.startup_spin.setEnabled(enabled)
+        self.wall_timeout_spin.setEnabled(enabled)
+        self.idle_timeout_spin.setEnabled(enabled)
+        self.retry_spin.setEnabled(enabled)
         if enabled:
             self.cancel_button.setEnabled(False)
 
-    def append_status(self, text: str):
-        """在日志文本框中追加状态信息，并更新状态栏"""
-        logging.info(text)
-        if "<span style='color:red;'>" in text:
-            self.status_text_edit.setTextColor(QColor('red'))
-        else:
-            self.status_text_edit.setTextColor(QColor('black'))
-        self.status_text_edit.append(text)
+    def append_status(self, text: str, level: int = LEVEL_INFO):
+        """在日志视图中追加界面自身的状态信息（不属于任何任务），并更新状态栏"""
+        logging.log(LOGGING_LEVELS[level], text)
+        self.log_store.extend([('', text, level)])
         self.status_bar.showMessage(text)
 
-    def update_status(self, status: str, script_path: str):
-        """更新特定脚本的状态"""
-        self.append_status(f"[{os.path.basename(script_path)}] {status}")
-        task_widget = self.task_widgets.get(script_path)
-        if task_widget:
-            task_widget['log'].append(status)
-
-    def update_progress(self, value: int, script_path: str):
-        """更新特定脚本的进度条"""
-        task_widget = self.task_widgets.get(script_path)
-        if task_widget:
-            task_widget['progress'].setValue(value)
+    def apply_log_filter(self):
+        """按所选级别与任务过滤日志视图（只扫描元数据，不重新渲染全部文本）"""
+        self.log_model.set_filter(self.task_filter_combo.currentData(),
+                                  self.level_filter_combo.currentData())
+        self.log_view.scrollToBottom()
+
+    def drain_logs(self):
+        """定时从日志通道批量取出工作线程的输出（每次最多占用约 8ms）"""
+        self.log_pipeline.drain(sink=self.show_log_chunk)
+        counts = (self.log_pipeline.queued, self.log_pipeline.dropped)
+        if counts != self._pipeline_counts:
+            self._pipeline_counts = counts
+            self.pipeline_label.setText(f"待显示: {counts[0]} 行    已丢弃: {counts[1]} 行")
+
+    def show_log_chunk(self, events: list):
+        """一次性追加一批构建事件：所有视图各收到一次插入通知，状态栏只显示最后一条"""
+        self.log_store.extend([(event.task, event.message, event.level) for event in events])
+        event = events[-1]
+        self.status_bar.showMessage(f"[{os.path.basename(event.task)}] {event.message}")
+
+    def update_queue_counts(self, queued: int, running: int, done: int):
+        """显示调度器的排队/运行/完成数量"""
+        self.queue_label.setText(f"排队: {queued}    运行中: {running}    已完成: {done}")
+
+    def update_batch_progress(self):
+        """刷新运行中任务的估计进度、批次加权总进度与剩余时间，以及吞吐量"""
+        if not self.tasks:
+            return
+        states = []
+        finished = []
+        for task in self.tasks:
+            state = task.progress_state()
+            if state is None and not task._is_running:
+                # 预检未通过或排队时已取消，不计入批次进度
+                continue
+            if state and not task._is_running:
+                finished.append(task)
+                state = (1.0, 0.0, state[2])
+            elif state:
+                self.task_model.set_progress(task.script_path, int(state[0] * 100), state[1])
+            states.append(state)
+        fraction, eta = summarize_batch(states, max(1, self.scheduler.running_count))
+        self.progress_bar.setValue(int(fraction * 100))
+        self.progress_bar.setFormat(f"%p%    剩余约 {format_seconds(eta)}" if len(finished) != len(states) else "%p%")
+
+        # 吞吐量：完成脚本数/分钟，实际执行构建的任务平均 CPU 时间
+        elapsed_min = (time.perf_counter() - self.batch_started) / 60 if self.batch_started else 0
+        cpu = [task.sampler.cpu_s for task in finished if task.sampler.cpu_s is not None]
+        text = f"吞吐量: {len(finished) / elapsed_min:.1f} 个/分钟" if elapsed_min > 0 else "吞吐量: -"
+        text += f"    平均 CPU 时间: {sum(cpu) / len(cpu):.1f} 秒/次构建" if cpu else "    平均 CPU 时间: -"
+        self.throughput_label.setText(f"{text}    已完成 {self.batch.finished_count}/{self.batch.total}")
 
     def show_manual(self):
         """显示“使用说明”对话框"""
@@ -553,65 +960,62 @@ class MainWindow(QMainWindow):
 
     def view_log_file(self):
         """查看日志文件"""
-        log_path = os.path.abspath("app.log")
+        backend = shared_backend()
+        log_path = backend.app_log.path if backend else os.path.abspath("app.log")
         if os.path.exists(log_path):
             log_viewer = LogViewerDialog(self, log_path)
             log_viewer.exec_()
         else:
             QMessageBox.warning(self, "警告", "日志文件不存在。")
 
-    def create_task_widget(self, script_path: str) -> dict:
-        """
-        创建一个转换任务在UI上的显示小部件：
-        - 脚本名
-        - 进度条
-        - 状态文字
-        - 简要日志
-        """
-        widget = QFrame()
-        widget.setFrameShape(QFrame.StyledPanel)
-        layout = QHBoxLayout(widget)
-
-        script_label = QLabel(os.path.basename(script_path))
-        script_label.setFixedWidth(200)
-        layout.addWidget(script_label)
-
-        progress = QProgressBar()
-        progress.setRange(0, 100)
-        progress.setValue(0)
-        progress.setFixedWidth(200)
-        layout.addWidget(progress)
-
-        status = QLabel("等待中...")
-        status.setWordWrap(True)
-        layout.addWidget(status)
-
-        log = QTextEdit()
-        log.setReadOnly(True)
-        log.setFont(QFont("Courier New", 10))
-        log.setFixedHeight(50)
-        log.setToolTip("本任务的转换日志片段")
-        layout.addWidget(log)
-
-        return {
-            'widget': widget,
-            'script_label': script_label,
-            'progress': progress,
-            'status': status,
-            'log': log
-        }
+    def open_log_dir(self):
+        """在文件管理器中打开日志目录（各批次的任务日志与摘要位于 batches 子目录）"""
+        backend = shared_backend()
+        log_dir = backend.directory if backend else os.getcwd()
+        QDesktopServices.openUrl(QUrl.fromLocalFile(log_dir))
+
+    def show_build_history(self):
+        """查看构建历史（按脚本绘制历次构建耗时）"""
+        history_dialog = BuildHistoryDialog(self.history, self)
+        history_dialog.exec_()
+
+    def show_task_log(self, current, previous):
+        """展开选中任务的日志（共用一个视图，仅切换过滤条件）"""
+        if not current.isValid():
+            self.task_log_view.hide()
+            return
+        self.task_log_model.set_filter(self.task_model.script_path(current.row()))
+        if self.task_log_view.isHidden():
+            self.task_log_view.show()
+            total = sum(self.task_splitter.sizes())
+            self.task_splitter.setSizes([total * 2 // 3, total - total * 2 // 3])
+        self.task_log_view.scrollToBottom()
 
     def closeEvent(self, event):
         """关闭窗口前，尝试停止所有任务"""
         if hasattr(self, 'tasks') and self.tasks:
+            self.scheduler.cancel_pending()
             for task in self.tasks:
                 task.stop()
             self.tasks = []
+        if self.batch:
+            self.batch.detach()
+        self.build_engine.shutdown()
+        self.events.unsubscribe(self.log_pipeline)
+        self.events.unsubscribe(self.event_metrics)
+        if self.warm_pool:
+            self.warm_pool.shutdown()
+        self.log_store.close()
+        self.history.close()
+        self.import_scanner.close()
         event.accept()
 
 
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
+    # 打包为可执行文件后，导入扫描的进程池子进程需要它
+    multiprocessing.freeze_support()
+    setup_logging()
+    app = InstrumentedApplication(sys.argv) if profiling_enabled() else QApplication(sys.argv)
 
     script_dir = os.path.dirname(os.path.abspath(__file__))
     icon_path = os.path.join(script_dir, 'icon.png')
@@ -0,0 +1,171 @@
+"""
+构建前预检：在把任务交给 PyInstaller 之前，检查脚本能否编译、顶层导入能否解析。
+
+检查在目标解释器中执行（与最终打包使用的 Python 版本与 site-packages 一致）：
+文件分成若干块，由多个目标解释器子进程并行处理。未通过的脚本直接判定失败，
+不再占用构建槽位。
+"""
+import os
+import sys
+import json
+import logging
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+from PyQt5.QtCore import QRunnable, QObject, pyqtSignal
+
+from build_cache import find_local_imports
+
+# 每个子进程至少处理的文件数（文件很少时不值得启动多个解释器）
+MIN_FILES_PER_WORKER = 8
+
+# 在目标解释器中执行：从标准输入读取 [文件, 脚本所在目录] 列表，逐个编译并检查模块级的无条件导入，
+# 按输入顺序输出每个文件的错误列表（一行 JSON）
+PREFLIGHT_SCRIPT = r"""
+import ast, sys, json, importlib.util
+
+def top_level_imports(body):
+    # 模块加载时一定会执行的导入：跳过函数/类定义、try/except ImportError 与 if 块
+    # （平台、版本判断与 TYPE_CHECKING 下的导入不一定执行，不能据此判定失败）
+    for node in body:
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                yield alias.name, node.lineno
+        elif isinstance(node, ast.ImportFrom):
+            if not node.level and node.module:
+                yield node.module, node.lineno
+        elif isinstance(node, ast.Try):
+            yield from top_level_imports(node.finalbody)
+        elif isinstance(node, ast.With):
+            yield from top_level_imports(node.body)
+
+results = []
+for path, root in json.load(sys.stdin):
+    errors = []
+    try:
+        with open(path, 'rb') as f:
+            source = f.read()
+        tree = ast.parse(source, path)
+        # 从 AST 编译还能发现解析阶段之外的错误（如函数外的 return）
+        compile(tree, path, 'exec', dont_inherit=True)
+    except SyntaxError as e:
+        errors.append(['syntax', e.lineno or 0, e.offset or 0, e.msg])
+    except (OSError, ValueError) as e:
+        errors.append(['read', 0, 0, str(e)])
+    else:
+        # 本地模块按脚本所在目录解析
+        sys.path.insert(0, root)
+        checked = set()
+        for name, lineno in top_level_imports(tree.body):
+            top = name.split('.')[0]
+            if top in checked:
+                continue
+            checked.add(top)
+            try:
+                found = importlib.util.find_spec(top) is not None
+            except Exception:
+                found = False
+            if not found:
+                errors.append(['import', lineno, 0, top])
+        sys.path.pop(0)
+    results.append(errors)
+print(json.dumps(results))
+"""
+
+
+def format_error(path: str, kind: str, lineno: int, offset: int, detail: str) -> str:
+    name = os.path.basename(path)
+    if kind == 'syntax':
+        return f"{name} 第 {lineno} 行第 {offset} 列语法错误: {detail}"
+    if kind == 'import':
+        return f"{name} 第 {lineno} 行导入的模块 {detail} 在目标解释器中不存在"
+    return f"{name} 无法读取: {detail}"
+
+
+class PreflightChecker:
+    """在目标解释器中并行预检一批脚本（连同它们的本地模块）；结果按文件 mtime 在会话内缓存"""
+
+    def __init__(self, interpreter: str = None, max_workers: int = None, import_scanner=None):
+        self.interpreter = interpreter or sys.executable
+        self.max_workers = max_workers or os.cpu_count() or 1
+        # 有导入预扫描服务时复用其缓存的本地导入图，否则每次重新查找本地模块
+        self.import_scanner = import_scanner
+        self._results = {}
+
+    def check(self, script_paths: list) -> dict:
+        """返回 {脚本路径: 错误描述列表}，列表为空表示通过"""
+        files_of = {}
+        keys = {}
+        local_files = self._local_files(script_paths)
+        for script_path in script_paths:
+            root = os.path.dirname(os.path.abspath(script_path))
+            files_of[script_path] = [(path, root) for path in
+                                     [os.path.abspath(script_path)] + local_files[script_path]]
+            for item in files_of[script_path]:
+                keys[item] = self._key(*item)
+        pending = sorted(item for item, key in keys.items() if key not in self._results)
+
+        if pending:
+            workers = max(1, min(self.max_workers, len(pending) // MIN_FILES_PER_WORKER))
+            chunks = [pending[i::workers] for i in range(workers)]
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for chunk, chunk_result in zip(chunks, executor.map(self._run_chunk, chunks)):
+                    for item, errors in zip(chunk, chunk_result):
+                        self._results[keys[item]] = errors
+
+        report = {}
+        for script_path, files in files_of.items():
+            errors = []
+            for item in files:
+                errors += [format_error(item[0], *error) for error in self._results.get(keys[item], [])]
+            report[script_path] = errors
+        return report
+
+    def _local_files(self, script_paths: list) -> dict:
+        if self.import_scanner:
+            try:
+                scans = self.import_scanner.scan(script_paths, self.interpreter)
+                return {path: scans[path].local_files for path in script_paths}
+            except Exception as e:
+                logging.warning(f"导入预扫描失败: {e}")
+        return {path: find_local_imports(path) for path in script_paths}
+
+    def _key(self, path: str, root: str) -> tuple:
+        try:
+            st = os.stat(path)
+            return path, root, st.st_mtime_ns, st.st_size
+        except OSError:
+            return path, root, None, None
+
+    def _run_chunk(self, items: list) -> dict:
+        """用一个目标解释器子进程检查一组文件（检查本身失败时放行，交给 PyInstaller 报告）"""
+        try:
+            completed = subprocess.run([self.interpreter, '-c', PREFLIGHT_SCRIPT], input=json.dumps(items),
+                                       stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                       universal_newlines=True, timeout=120, check=True)
+            return json.loads(completed.stdout.strip().splitlines()[-1])
+        except (OSError, subprocess.SubprocessError, ValueError, IndexError) as e:
+            logging.warning(f"构建前预检失败，跳过检查: {e}")
+            return [[] for _ in items]
+
+
+class PreflightSignals(QObject):
+    checked = pyqtSignal(dict)    # {脚本路径: 错误描述列表}
+
+
+class PreflightRunnable(QRunnable):
+    """在线程池中执行预检，完成后通过 checked 信号把结果交回主线程"""
+
+    def __init__(self, checker: PreflightChecker, script_paths: list):
+        super().__init__()
+        self.checker = checker
+        self.script_paths = list(script_paths)
+        self.signals = PreflightSignals()
+
+    def run(self):
+        try:
+            report = self.checker.check(self.script_paths)
+        except Exception as e:
+            logging.warning(f"构建前预检失败，跳过检查: {e}")
+            report = {path: [] for path in self.script_paths}
+        self.signals.checked.emit(report)
@@ -0,0 +1,113 @@
+import re
+
+from build_history import PHASE_ORDER
+
+# 没有历史记录时使用的典型阶段耗时（秒），只用于分配各阶段在进度条中的比重
+DEFAULT_PHASE_SECONDS = {
+    'toolchain': 0.5, 'scan': 0.2, 'cache': 0.2, 'assets': 0.2, 'startup': 1.5,
+    'Analysis': 15.0, 'PYZ': 1.5, 'PKG': 3.0, 'EXE': 1.5, 'cleanup': 0.3,
+}
+# PyInstaller 在 Analysis 阶段每处理一个模块钩子/隐藏导入输出一行
+MODULE_LINE = re.compile(r'module hook|Analyzing|hidden import')
+# 没有历史模块数时，Analysis 阶段进度按 n / (n + MODULE_HALF_POINT) 逼近完成
+MODULE_HALF_POINT = 40
+# 完成前单个阶段进度的上限（当前阶段超出预期时停在这里，而不是提前显示完成）
+PHASE_CAP = 0.95
+
+
+class ProgressEstimator:
+    """
+    根据脚本历次构建的各阶段耗时估计当前进度与剩余时间：
+    已完成阶段按历史耗时计入，当前阶段按已用时间与历史耗时之比计入；
+    Analysis 阶段同时参考已分析的模块数（有历史模块数时按其比例，否则按 n / (n + K) 逼近）；
+    没有历史记录时使用典型阶段耗时。
+    """
+
+    def __init__(self, timer, profile: dict = None, expected_modules: int = None):
+        self.timer = timer
+        self.has_history = bool(profile)
+        profile = profile or DEFAULT_PHASE_SECONDS
+        self.phases = [name for name in PHASE_ORDER if profile.get(name)]
+        self.profile = {name: profile[name] for name in self.phases}
+        self.expected_total = sum(self.profile.values()) or 1.0
+        self.expected_modules = expected_modules
+        self.modules = 0
+        self._fraction = 0.0
+
+    def feed(self, line: str):
+        """统计 Analysis 阶段处理的模块数"""
+        if self.timer.current == 'Analysis' and MODULE_LINE.search(line):
+            self.modules += 1
+
+    def _phase_fraction(self, name: str) -> float:
+        """当前阶段的完成比例"""
+        expected = self.profile.get(name)
+        by_time = min(self.timer.current_elapsed() / expected, PHASE_CAP) if expected else 0.0
+        if name != 'Analysis':
+            return by_time
+        if self.expected_modules:
+            by_modules = self.modules / self.expected_modules
+        else:
+            by_modules = self.modules / (self.modules + MODULE_HALF_POINT)
+        return min(max(by_time, by_modules), PHASE_CAP)
+
+    def _expected_done(self) -> float:
+        """按历史耗时折算的已完成工作量（秒）"""
+        current = self.timer.current
+        if current is None:
+            return sum(self.profile.get(name, 0.0) for name in self.timer.durations)
+        if current in self.phases:
+            index = self.phases.index(current)
+        else:
+            # 历史中没有的阶段：PHASE_ORDER 中排在它之前的阶段都算已完成
+            order = PHASE_ORDER.index(current) if current in PHASE_ORDER else len(PHASE_ORDER)
+            index = len([name for name in self.phases if PHASE_ORDER.index(name) < order])
+        done = sum(self.profile[name] for name in self.phases[:index])
+        return done + self.profile.get(current, 0.0) * self._phase_fraction(current)
+
+    def fraction(self) -> float:
+        """当前进度（0~1，单调不减，完成前不超过 0.99）"""
+        self._fraction = max(self._fraction, min(self._expected_done() / self.expected_total, 0.99))
+        return self._fraction
+
+    def percent(self) -> int:
+        return int(self.fraction() * 100)
+
+    def remaining_seconds(self) -> float:
+        """剩余时间估计：剩余工作量按本次构建相对历史的快慢比例缩放"""
+        done = self._expected_done()
+        remaining = max(self.expected_total - done, 0.0)
+        elapsed = self.timer.elapsed()
+        if done > 0.5 and elapsed > 0:
+            remaining *= min(max(elapsed / done, 0.5), 3.0)
+        return remaining
+
+
+def format_seconds(seconds: float) -> str:
+    """把秒数格式化为“1分05秒”之类的简短文本"""
+    seconds = int(round(seconds))
+    if seconds < 60:
+        return f"{seconds}秒"
+    minutes, seconds = divmod(seconds, 60)
+    if minutes < 60:
+        return f"{minutes}分{seconds:02d}秒"
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}小时{minutes:02d}分"
+
+
+def summarize_batch(states: list, slots: int):
+    """
+    汇总一个批次的进度。states 中每项为 (进度 0~1, 预计剩余秒数, 预计总耗时) 或 None（尚未开始）。
+    返回 (按预计耗时加权的总进度 0~1, 批次剩余时间估计秒数)；未开始的任务按已知任务的平均耗时计。
+    """
+    known = [state[2] for state in states if state]
+    default_weight = sum(known) / len(known) if known else sum(DEFAULT_PHASE_SECONDS.values())
+    total_weight = done_weight = remaining = 0.0
+    for state in states:
+        fraction, remaining_s, weight = state if state else (0.0, default_weight, default_weight)
+        total_weight += weight
+        done_weight += weight * fraction
+        remaining += remaining_s
+    if not total_weight:
+        return 0.0, 0.0
+    return done_weight / total_weight, remaining / max(1, slots)
@@ -0,0 +1,194 @@
+import os
+import time
+import heapq
+import itertools
+import logging
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+from build_cache import find_local_imports
+
+
+def read_mem_available() -> int:
+    """从 /proc/meminfo 读取可用内存（字节），不可用时返回 None"""
+    try:
+        with open('/proc/meminfo', 'r') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def read_load_average() -> float:
+    """从 /proc/loadavg 读取 1 分钟平均负载，不可用时返回 None"""
+    try:
+        with open('/proc/loadavg', 'r') as f:
+            return float(f.read().split()[0])
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def estimate_job_cost(script_path: str) -> float:
+    """粗略估计构建耗时：脚本及其本地依赖的总字节数"""
+    total = 0
+    for path in [script_path] + find_local_imports(script_path):
+        try:
+            total += os.path.getsize(path)
+        except OSError:
+            pass
+    return float(total)
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+class BuildJob:
+    """调度队列中的一个构建任务"""
+
+    def __init__(self, runnable, priority: int, expected_cost: float, memory_bytes: int):
+        self.runnable = runnable
+        self.priority = priority
+        self.expected_cost = expected_cost
+        self.memory_bytes = memory_bytes
+        self.started_at = None
+
+
+class BuildScheduler(QObject):
+    """
+    资源感知的构建调度器：位于 MainWindow 与线程池之间，
+    根据内存预算、可用内存与 CPU 负载（读取 /proc）决定何时放行下一个任务；
+    队列按 优先级（高者先）→ 预计耗时（短者先）排序。
+    """
+    counts_changed = pyqtSignal(int, int, int)     # (排队数, 运行数, 完成数)
+
+    # 新启动的任务在此时间窗内尚未达到内存峰值，需预留其内存
+    RAMP_SECONDS = 15
+
+    def __init__(self, thread_pool, max_jobs: int = None, memory_per_job_mb: int = None,
+                 memory_budget_mb: int = None, memory_reserve_mb: int = None,
+                 max_load_per_cpu: float = None, parent=None):
+        super().__init__(parent)
+        self.thread_pool = thread_pool
+        cpu_count = os.cpu_count() or 1
+        self.max_jobs = 1
+        self.memory_per_job = (memory_per_job_mb or _env_int('PYEXE_MAKER_MEM_PER_JOB_MB', 600)) * 1024 * 1024
+        budget_mb = memory_budget_mb or _env_int('PYEXE_MAKER_MEM_BUDGET_MB', 0)
+        self.memory_budget = budget_mb * 1024 * 1024 if budget_mb else None
+        self.memory_reserve = (memory_reserve_mb or _env_int('PYEXE_MAKER_MEM_RESERVE_MB', 1024)) * 1024 * 1024
+        if max_load_per_cpu is None:
+            max_load_per_cpu = float(os.environ.get('PYEXE_MAKER_MAX_LOAD', 1.0))
+        self.max_load = max_load_per_cpu * cpu_count
+
+        self._queue = []
+        self._seq = itertools.count()
+        self._running = []
+        self.done_count = 0
+
+        # 队列非空时定期重新评估资源（外部负载可能已下降）
+        self._timer = QTimer(self)
+        self._timer.setInterval(500)
+        self._timer.timeout.connect(self.dispatch)
+        self.set_max_jobs(max_jobs or _env_int('PYEXE_MAKER_MAX_JOBS', cpu_count))
+
+    # ---------- 对外接口 ----------
+    def set_max_jobs(self, max_jobs: int):
+        """
+        设置最大并行任务数，线程池不足时一并扩容：
+        否则放行的任务会在线程池的先进先出队列中排队，并行上限与队列的优先级排序都不再生效
+        """
+        self.max_jobs = max(1, max_jobs)
+        if self.thread_pool.maxThreadCount() < self.max_jobs:
+            self.thread_pool.setMaxThreadCount(self.max_jobs)
+        if self._queue:
+            self.dispatch()
+
+    def submit(self, runnable, priority: int = 0, expected_cost: float = None, memory_mb: int = None):
+        """提交任务；expected_cost 为空时按脚本大小估算"""
+        if expected_cost is None:
+            expected_cost = estimate_job_cost(runnable.script_path)
+        memory_bytes = memory_mb * 1024 * 1024 if memory_mb else self.memory_per_job
+        job = BuildJob(runnable, priority, expected_cost, memory_bytes)
+        runnable.signals.finished.connect(lambda j=job: self._on_job_done(j))
+        heapq.heappush(self._queue, (-priority, expected_cost, next(self._seq), job))
+        self.dispatch()
+
+    def cancel_pending(self) -> int:
+        """丢弃所有尚未开始的任务，返回丢弃数量"""
+        dropped = len(self._queue)
+        self._queue = []
+        self._timer.stop()
+        self._emit_counts()
+        return dropped
+
+    def reset(self):
+        """开始新批次前清零计数"""
+        self.cancel_pending()
+        self._running = []
+        self.done_count = 0
+        self._emit_counts()
+
+    @property
+    def queued_count(self) -> int:
+        return len(self._queue)
+
+    @property
+    def running_count(self) -> int:
+        return len(self._running)
+
+    # ---------- 调度 ----------
+    def dispatch(self):
+        """在资源允许的范围内放行队首任务"""
+        while self._queue:
+            job = self._queue[0][3]
+            # 排队期间已被取消的任务不占资源，立即放行，由它自己报告取消结果后退出
+            if job.runnable._is_running and not self._can_admit(job):
+                break
+            heapq.heappop(self._queue)
+            job.started_at = time.monotonic()
+            self._running.append(job)
+            self.thread_pool.start(job.runnable)
+
+        if self._queue:
+            self._timer.start()
+        else:
+            self._timer.stop()
+        self._emit_counts()
+
+    def _can_admit(self, job: BuildJob) -> bool:
+        """判断当前资源是否允许启动 job（空闲时总是放行一个，保证批次可以推进）"""
+        if not self._running:
+            return True
+        if len(self._running) >= self.max_jobs:
+            return False
+
+        committed = sum(j.memory_bytes for j in self._running)
+        if self.memory_budget and committed + job.memory_bytes > self.memory_budget:
+            return False
+
+        mem_available = read_mem_available()
+        if mem_available is not None:
+            now = time.monotonic()
+            ramping = sum(j.memory_bytes for j in self._running if now - j.started_at < self.RAMP_SECONDS)
+            if mem_available - ramping - self.memory_reserve < job.memory_bytes:
+                return False
+
+        load = read_load_average()
+        if load is not None and load >= self.max_load:
+            return False
+        return True
+
+    def _on_job_done(self, job: BuildJob):
+        if job in self._running:
+            self._running.remove(job)
+        self.done_count += 1
+        logging.debug(f"调度器: 任务结束，排队 {self.queued_count}，运行 {self.running_count}")
+        self.dispatch()
+
+    def _emit_counts(self):
+        self.counts_changed.emit(self.queued_count, self.running_count, self.done_count)
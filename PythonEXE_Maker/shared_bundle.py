@@ -0,0 +1,354 @@
+"""
+共享运行时打包：把同一输出目录下的多个脚本写进一个 spec 文件，用 PyInstaller 的 MERGE 合并。
+
+所有脚本在同一个 PyInstaller 进程中分析（共用基础模块图，只启动一次解释器），
+MERGE 把多个 EXE 共有的库与数据文件只保留在第一个 EXE 中，其余 EXE 只包含各自特有的部分
+并在运行时从第一个 EXE 引用共享文件——因此这些 EXE 必须放在同一目录下一起分发。
+
+每个脚本的 PyInstaller 参数仍由 ConvertRunnable.prepare_pyinstaller_options 生成，
+再由 parse_options 转换为 spec 中 Analysis / EXE 的参数。
+"""
+import os
+import json
+import hashlib
+
+from converters import ConvertRunnable
+from workspace import TaskWorkspace
+from build_history import hash_script
+from build_cache import artifact_size
+from progress import ProgressEstimator
+from build_events import LEVEL_WARNING, LEVEL_ERROR
+
+# spec 第一行之后的标记行：记录合并打包的 EXE 列表（PyInstaller 替身据此生成产物）
+BUNDLE_MARKER = '# pyexe-maker-bundle: '
+BUNDLE_SPEC = 'bundle.spec'
+
+# 带参数值的选项 -> parse_options 结果中的字段
+VALUE_OPTIONS = {
+    '--hidden-import': 'hiddenimports', '--hiddenimport': 'hiddenimports',
+    '--add-data': 'datas', '--add-binary': 'binaries',
+    '--exclude-module': 'excludes',
+    '--paths': 'pathex', '-p': 'pathex',
+    '--icon': 'icon', '-i': 'icon',
+    '--version-file': 'version',
+    '--collect-all': 'collect_all',
+    '--collect-submodules': 'collect_submodules',
+    '--collect-data': 'collect_data', '--collect-datas': 'collect_data',
+    '--copy-metadata': 'copy_metadata',
+}
+# 由共享打包统一管理的选项（每个脚本各自的值不写入 spec）
+MANAGED_VALUE_OPTIONS = {'--distpath', '--workpath', '--specpath', '-n', '--name'}
+MANAGED_FLAGS = {'--clean', '--noconfirm', '-y'}
+FLAG_OPTIONS = {
+    '--onefile': ('onedir', False), '-F': ('onedir', False),
+    '--onedir': ('onedir', True), '-D': ('onedir', True),
+    '--console': ('console', True), '-c': ('console', True), '--nowindowed': ('console', True),
+    '--windowed': ('console', False), '-w': ('console', False), '--noconsole': ('console', False),
+    '--noupx': ('upx', False),
+    '--strip': ('strip', True), '-s': ('strip', True),
+    '--uac-admin': ('uac_admin', True),
+}
+
+SPEC_HEADER = '''# -*- mode: python ; coding: utf-8 -*-
+{marker}
+# 由 PythonEXE Maker 生成的共享运行时 spec（每次构建前重新生成，请勿手动修改）
+from PyInstaller.utils.hooks import collect_all, collect_submodules, collect_data_files, copy_metadata
+
+
+def _collect(datas, binaries, hiddenimports, packages=(), submodules=(), data=(), metadata=()):
+    for package in packages:
+        package_datas, package_binaries, package_hiddenimports = collect_all(package)
+        datas += package_datas
+        binaries += package_binaries
+        hiddenimports += package_hiddenimports
+    for package in submodules:
+        hiddenimports += collect_submodules(package)
+    for package in data:
+        datas += collect_data_files(package)
+    for package in metadata:
+        datas += copy_metadata(package)
+    return datas, binaries, hiddenimports
+
+'''
+
+
+def _split_pair(value: str) -> tuple:
+    """拆分 --add-data / --add-binary 的 SRC;DEST 或 SRC:DEST（以最后一个分隔符为准，兼容 Windows 盘符）"""
+    for separator in (';', ':'):
+        index = value.rfind(separator)
+        # 排除 "C:\..." 中盘符后的冒号
+        if index > 0 and not (separator == ':' and index == 1 and len(value) > 2 and value[2] in '\\/'):
+            return os.path.abspath(value[:index]), value[index + 1:] or '.'
+    return os.path.abspath(value), '.'
+
+
+def parse_options(options: list) -> dict:
+    """把 PyInstaller 命令行参数转换为 spec 参数；无法在 spec 中表达的参数放入 ignored"""
+    spec = {
+        'onedir': False, 'console': True, 'upx': True, 'strip': False, 'uac_admin': False, 'icon': None, 'version': None,
+        'hiddenimports': [], 'datas': [], 'binaries': [], 'excludes': [], 'pathex': [],
+        'collect_all': [], 'collect_submodules': [], 'collect_data': [], 'copy_metadata': [],
+        'ignored': [],
+    }
+    i = 0
+    while i < len(options):
+        option, value = options[i], None
+        if option.startswith('-') and '=' in option:
+            option, value = option.split('=', 1)
+        elif (option in VALUE_OPTIONS or option in MANAGED_VALUE_OPTIONS) and i + 1 < len(options):
+            value = options[i + 1]
+            i += 1
+        i += 1
+
+        if option in MANAGED_VALUE_OPTIONS or option in MANAGED_FLAGS:
+            continue
+        if option in FLAG_OPTIONS and value is None:
+            key, flag = FLAG_OPTIONS[option]
+            spec[key] = flag
+            continue
+        key = VALUE_OPTIONS.get(option)
+        if key is None or value is None:
+            # 未知选项若后面跟着非选项参数，视为它的参数值一并忽略
+            if value is None and i < len(options) and not options[i].startswith('-'):
+                option = f'{option} {options[i]}'
+                i += 1
+            spec['ignored'].append(option if value is None else f'{option}={value}')
+        elif key in ('datas', 'binaries'):
+            spec[key].append(_split_pair(value))
+        elif key == 'pathex':
+            spec[key] += [os.path.abspath(path) for path in value.split(os.pathsep) if path]
+        elif key in ('icon', 'version'):
+            spec[key] = os.path.abspath(value)
+        elif value not in spec[key]:
+            spec[key].append(value)
+    return spec
+
+
+def generate_spec(entries: list) -> str:
+    """
+    entries 为 [(脚本路径, EXE 名称, parse_options 结果)]，生成 MERGE 合并打包的 spec 文本。
+    所有值以 repr 写入，路径一律为绝对路径。
+    """
+    marker = BUNDLE_MARKER + json.dumps({'exes': [[name, script, spec['onedir']] for script, name, spec in entries]},
+                                        ensure_ascii=False)
+    lines = [SPEC_HEADER.format(marker=marker)]
+    for index, (script, name, spec) in enumerate(entries):
+        a = f'a{index}'
+        lines.append(f"{a}_datas, {a}_binaries, {a}_hiddenimports = _collect(\n"
+                     f"    {spec['datas']!r}, {spec['binaries']!r}, {spec['hiddenimports']!r},\n"
+                     f"    packages={spec['collect_all']!r}, submodules={spec['collect_submodules']!r},\n"
+                     f"    data={spec['collect_data']!r}, metadata={spec['copy_metadata']!r})")
+        lines.append(f"{a} = Analysis(\n"
+                     f"    [{os.path.abspath(script)!r}],\n"
+                     f"    pathex={[os.path.dirname(os.path.abspath(script))] + spec['pathex']!r},\n"
+                     f"    binaries={a}_binaries,\n"
+                     f"    datas={a}_datas,\n"
+                     f"    hiddenimports={a}_hiddenimports,\n"
+                     f"    hookspath=[],\n"
+                     f"    hooksconfig={{}},\n"
+                     f"    runtime_hooks=[],\n"
+                     f"    excludes={spec['excludes']!r},\n"
+                     f"    noarchive=False,\n"
+                     f")\n")
+
+    # MERGE 参数：(Analysis, 入口脚本名（不含 .py）, 相对 dist 目录的 EXE 路径（不含 .exe），onedir 时位于同名目录中)
+    merged = ',\n'.join(f"    (a{index}, {os.path.splitext(os.path.basename(script))[0]!r}, "
+                        f"{(name + '/' + name) if spec['onedir'] else name!r})"
+                        for index, (script, name, spec) in enumerate(entries))
+    lines.append(f"MERGE(\n{merged},\n)\n")
+
+    for index, (script, name, spec) in enumerate(entries):
+        a = f'a{index}'
+        extra = ''
+        if spec['icon']:
+            extra += f"    icon={spec['icon']!r},\n"
+        if spec['version']:
+            extra += f"    version={spec['version']!r},\n"
+        # onefile 把库与数据打进 EXE；onedir 由 COLLECT 放到 EXE 所在目录
+        contents = (f"    {a}.scripts,\n    {a}.dependencies,\n    [],\n    exclude_binaries=True,\n"
+                    if spec['onedir'] else
+                    f"    {a}.scripts,\n    {a}.binaries,\n    {a}.datas,\n    {a}.dependencies,\n    [],\n")
+        lines.append(f"pyz{index} = PYZ({a}.pure)\n"
+                     f"exe{index} = EXE(\n"
+                     f"    pyz{index},\n"
+                     f"{contents}"
+                     f"    name={name!r},\n"
+                     f"    debug=False,\n"
+                     f"    bootloader_ignore_signals=False,\n"
+                     f"    strip={spec['strip']!r},\n"
+                     f"    upx={spec['upx']!r},\n"
+                     f"    upx_exclude=[],\n"
+                     f"    runtime_tmpdir=None,\n"
+                     f"    console={spec['console']!r},\n"
+                     f"    uac_admin={spec['uac_admin']!r},\n"
+                     f"{extra})\n")
+        if spec['onedir']:
+            lines.append(f"coll{index} = COLLECT(\n"
+                         f"    exe{index},\n"
+                         f"    {a}.binaries,\n"
+                         f"    {a}.datas,\n"
+                         f"    strip={spec['strip']!r},\n"
+                         f"    upx={spec['upx']!r},\n"
+                         f"    upx_exclude=[],\n"
+                         f"    name={name!r},\n"
+                         f")\n")
+    return '\n'.join(lines)
+
+
+def plan_bundles(tasks: list) -> list:
+    """
+    把任务按输出目录分组，返回任务组列表；多于一个任务的组合并打包，单个任务的组单独构建。
+    同一组内 EXE 名称或入口脚本名重复的任务无法共用一个 spec，改为单独构建。
+    """
+    groups = {}
+    singles = []
+    for task in tasks:
+        output_dir = os.path.abspath(task.output_dir or os.path.dirname(task.script_path))
+        group = groups.setdefault(output_dir, {'tasks': [], 'names': set(), 'scripts': set()})
+        exe_name = (task.exe_name or os.path.splitext(os.path.basename(task.script_path))[0]).lower()
+        script_name = os.path.splitext(os.path.basename(task.script_path))[0]
+        if exe_name in group['names'] or script_name in group['scripts']:
+            singles.append([task])
+            continue
+        group['names'].add(exe_name)
+        group['scripts'].add(script_name)
+        group['tasks'].append(task)
+    return [group['tasks'] for group in groups.values()] + singles
+
+
+class SharedBundleRunnable(ConvertRunnable):
+    """
+    一次 PyInstaller 运行构建一组脚本（共享运行时）。成员是已配置好的 ConvertRunnable：
+    它们提供各自的参数，并通过自己的信号报告各自 EXE 的结果；本任务的 finished 信号只用于调度器。
+    合并后的 EXE 互相引用，不写入构建缓存，也不记录单脚本的构建历史。
+    """
+
+    def __init__(self, members: list):
+        first = members[0]
+        super().__init__(
+            script_path=first.script_path, convert_mode=first.convert_mode,
+            output_dir=first.output_dir or os.path.dirname(first.script_path),
+            exe_name=None, icon_path=None, file_version=None, copyright_info=None,
+            extra_library=None, additional_options=None,
+            work_dirs=first.work_dirs, toolchain=first.toolchain, warm_pool=first.warm_pool,
+            events=first.events, engine=first.engine,
+            # 一次运行构建整组脚本，总时限按成员数放宽
+            wall_timeout=first.wall_timeout * len(members), idle_timeout=first.idle_timeout,
+            max_retries=first.max_retries, retry_budget=first.retry_budget
+        )
+        self.members = list(members)
+        for member in self.members:
+            member.bundle = self
+
+    def create_estimator(self) -> ProgressEstimator:
+        """成员共用本任务的计时与进度估计，界面轮询成员时显示整个合并构建的进度"""
+        estimator = ProgressEstimator(self.timer)
+        for member in self.members:
+            member.timer = self.timer
+            member.estimator = estimator
+        return estimator
+
+    def prepare_build(self, context) -> list:
+        """生成合并打包的 spec，返回以 spec 为目标的 PyInstaller 参数（无法构建时返回 None）"""
+        context.reported = set()
+        context.exe_name = None
+        for member in self.members:
+            member.update_status(f"已加入共享运行时打包（共 {len(self.members)} 个脚本，"
+                                 f"日志见 {os.path.basename(self.script_path)}）。")
+
+        self.begin_phase('toolchain')
+        if not self.ensure_pyinstaller():
+            context.error_message = "未检测到可用的 PyInstaller，无法转换。"
+            return None
+
+        for member in self.members:
+            member.toolchain_info = self.toolchain_info
+        if any(member.import_scanner for member in self.members):
+            self.begin_phase('scan')
+            for member in self.members:
+                if member.import_scanner:
+                    member.scan_imports()
+
+        # 各成员的参数仍由 prepare_pyinstaller_options 生成，再转换为 spec 参数
+        self.begin_phase('assets')
+        context.entries = entries = []
+        stamp_options = []
+        for member in self.members:
+            exe_name = member.exe_name or os.path.splitext(os.path.basename(member.script_path))[0]
+            options = member.prepare_pyinstaller_options(exe_name, self.output_dir)
+            options += member.asset_options(exe_name)
+            spec = parse_options(options)
+            for option in spec['ignored']:
+                member.update_status(f"WARNING: 共享运行时打包不支持参数 {option}，已忽略。", LEVEL_WARNING)
+            entries.append((member.script_path, exe_name, spec))
+            stamp_options += options + [f'--script-sha256={hash_script(member.script_path)}']
+        spec_text = generate_spec(entries)
+        # 工作目录以 exe_name 区分，释放时使用同一名称
+        context.exe_name = 'bundle-' + hashlib.sha1(
+            '\0'.join(sorted(name for _, name, _ in entries)).encode('utf-8')).hexdigest()[:12]
+
+        # 增量构建：整组使用一个持久化工作目录，任何成员的脚本或参数变化时执行 --clean
+        context.workspace = TaskWorkspace(context.exe_name)
+        if self.work_dirs:
+            workpath, specpath, context.work_stamp, needs_clean = self.work_dirs.acquire(
+                self.script_path, context.exe_name, stamp_options
+            )
+            self.update_status("脚本或参数已变化，执行完整构建。" if needs_clean else "复用增量构建工作目录。")
+        else:
+            workpath, specpath = context.workspace.subdir('build'), context.workspace.subdir('spec')
+            needs_clean = True
+        context.target = os.path.join(specpath, BUNDLE_SPEC)
+        with open(context.target, 'w', encoding='utf-8') as f:
+            f.write(spec_text)
+
+        options = ['--distpath', self.output_dir, '--workpath', workpath, '--noconfirm']
+        if needs_clean:
+            options.append('--clean')
+        self.update_status(f"开始共享运行时打包：{', '.join(name for _, name, _ in entries)}")
+        return options
+
+    def complete_build(self, context, success: bool):
+        """逐个成员检查产物并通过成员自己的信号报告结果"""
+        try:
+            context.build_ok = success
+            self.timer.end()
+            for member, (script_path, exe_name, spec) in zip(self.members, context.entries):
+                exe_path = member.exe_path_for(self.output_dir, exe_name)
+                if success and os.path.exists(exe_path) and member.startup_runs:
+                    self.begin_phase('profile')
+                    member.measure_startup(exe_path)
+                member._is_running = False
+                if success and os.path.exists(exe_path):
+                    exe_size = artifact_size(os.path.dirname(exe_path) if spec['onedir'] else exe_path) // 1024
+                    member.report_progress(100)
+                    member.signals.conversion_finished.emit(exe_path, exe_size)
+                    member.update_status(f"转换成功! EXE 文件位于: {exe_path} (大小: {exe_size} KB)")
+                    member.publish_result(True, f"{exe_path} ({exe_size} KB)", self.retries, exe_size)
+                else:
+                    message = context.error_message if not success else "转换完成，但未找到生成的 EXE 文件。"
+                    member.update_status(message, LEVEL_ERROR)
+                    member.signals.conversion_failed.emit(message)
+                    member.publish_result(False, context.outcome or message, self.retries)
+                member.signals.finished.emit()
+                context.reported.add(member)
+        except Exception as e:
+            self.report_exception(context, e)
+        finally:
+            self.finish_build(context)
+
+    def finish_build(self, context):
+        """未能报告结果的成员（工具链缺失、异常或取消）统一判定失败，然后释放工作目录并结束本任务"""
+        for member in self.members:
+            if member not in context.reported:
+                member._is_running = False
+                member.update_status(context.error_message, LEVEL_ERROR)
+                member.signals.conversion_failed.emit(context.error_message)
+                member.publish_result(False, context.outcome or context.error_message, self.retries)
+                member.signals.finished.emit()
+        self._is_running = False
+        self.begin_phase('cleanup')
+        if context.work_stamp:
+            self.work_dirs.release(self.script_path, context.exe_name, context.work_stamp, context.build_ok)
+        self.cleanup_files(context.workspace)
+        self.timer.end()
+        self.signals.finished.emit()
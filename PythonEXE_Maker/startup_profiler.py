@@ -0,0 +1,242 @@
+"""
+构建产物的启动耗时测量：把生成的可执行文件连续启动 N 次（每次带超时），报告
+- 冷启动：第一次启动的耗时（Linux 上先用 posix_fadvise 把产物逐出页缓存）
+- 热启动：其余各次耗时的中位数与最小值
+- 解包耗时：onefile 产物从启动到引导程序解包完毕、派生出 Python 子进程的时间（读取 /proc，仅 Linux）
+- 模块导入耗时：冻结后的程序不读取 PYTHON* 环境变量，因此用目标解释器以 -X importtime 运行源脚本，
+  按顶层模块的累计导入耗时排序
+
+据此可以为每个工具选择启动最快的输出形式（onefile / onedir）。也可以单独运行：
+    python startup_profiler.py dist/tool.exe dist/tool/tool.exe --runs 10 --script tool.py
+"""
+import os
+import re
+import sys
+import json
+import time
+import signal
+import argparse
+import subprocess
+from statistics import median
+
+DEFAULT_RUNS = 5
+DEFAULT_TIMEOUT = 10.0
+# 报告中列出的导入耗时最多的顶层模块数
+TOP_IMPORTS = 15
+# 等待 onefile 引导程序派生子进程时的轮询间隔（秒）
+POLL_INTERVAL = 0.005
+# -X importtime 输出："import time: self [us] | cumulative | imported package"
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( +)(\S+)')
+
+
+def detect_layout(exe_path: str) -> str:
+    """onedir 产物旁有 _internal 目录（PyInstaller 6）"""
+    if os.path.isdir(os.path.join(os.path.dirname(os.path.abspath(exe_path)), '_internal')):
+        return 'onedir'
+    return 'onefile'
+
+
+def evict_from_page_cache(exe_path: str, layout: str) -> bool:
+    """把产物的文件逐出页缓存，使第一次启动接近真正的冷启动（不支持时返回 False）"""
+    if not hasattr(os, 'posix_fadvise'):
+        return False
+    if layout == 'onedir':
+        root = os.path.dirname(os.path.abspath(exe_path))
+        paths = [os.path.join(dirpath, name) for dirpath, _, files in os.walk(root) for name in files]
+    else:
+        paths = [exe_path]
+    for path in paths:
+        try:
+            fd = os.open(path, os.O_RDONLY)
+            try:
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+            finally:
+                os.close(fd)
+        except OSError:
+            return False
+    return True
+
+
+def _has_child(pid: int) -> bool:
+    """pid 是否已派生子进程：读取 /proc/<pid>/task/<pid>/children，内核不提供该文件时扫描 /proc"""
+    try:
+        with open(f'/proc/{pid}/task/{pid}/children', 'r') as f:
+            return bool(f.read().strip())
+    except FileNotFoundError:
+        pass
+    except OSError:
+        return False
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat', 'r') as f:
+                # 进程名可能含空格，父进程号位于最后一个右括号之后的第二个字段
+                if int(f.read().rsplit(')', 1)[1].split()[1]) == pid:
+                    return True
+        except (OSError, ValueError, IndexError):
+            continue
+    return False
+
+
+def _kill(process):
+    """结束进程及其派生的子进程（onefile 的 Python 子进程）"""
+    try:
+        if os.name == 'posix':
+            os.killpg(process.pid, signal.SIGKILL)
+        else:
+            process.kill()
+    except OSError:
+        pass
+    process.wait()
+
+
+def launch_once(cmd: list, timeout: float, watch_unpack: bool = False) -> dict:
+    """启动一次并等待退出，返回 {'elapsed_ms', 'unpack_ms', 'status', 'returncode'}"""
+    watch_unpack = watch_unpack and os.path.isdir('/proc')
+    started = time.perf_counter()
+    try:
+        process = subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                                   stderr=subprocess.DEVNULL, start_new_session=(os.name == 'posix'))
+    except OSError:
+        return {'elapsed_ms': None, 'unpack_ms': None, 'status': 'failed', 'returncode': None}
+    deadline = started + timeout
+    unpack_ms = None
+    try:
+        # onefile：引导程序解包完成后派生 Python 子进程，轮询 /proc 记下这一时刻
+        while watch_unpack and unpack_ms is None and process.poll() is None:
+            if _has_child(process.pid):
+                unpack_ms = (time.perf_counter() - started) * 1000
+            elif time.perf_counter() > deadline:
+                break
+            else:
+                time.sleep(POLL_INTERVAL)
+        process.wait(timeout=max(0.0, deadline - time.perf_counter()))
+    except subprocess.TimeoutExpired:
+        _kill(process)
+        return {'elapsed_ms': None, 'unpack_ms': unpack_ms, 'status': 'timeout', 'returncode': None}
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    return {'elapsed_ms': elapsed_ms, 'unpack_ms': unpack_ms,
+            'status': 'ok' if process.returncode == 0 else 'failed', 'returncode': process.returncode}
+
+
+def _top_level_imports(cmd: list, timeout: float, cwd: str = None) -> list:
+    """运行 cmd（已带 -X importtime），返回顶层导入 [{module, self_ms, cumulative_ms}]；无法运行时返回 None"""
+    try:
+        completed = subprocess.run(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                                   stderr=subprocess.PIPE, universal_newlines=True, timeout=timeout, cwd=cwd)
+        output = completed.stderr
+    except subprocess.TimeoutExpired as e:
+        output = e.stderr or ''
+        if isinstance(output, bytes):
+            output = output.decode('utf-8', 'replace')
+    except OSError:
+        return None
+
+    modules = []
+    for line in output.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        # 缩进为一个空格的是顶层导入，其累计耗时已包含被它间接导入的模块
+        if match and len(match.group(3)) == 1:
+            modules.append({'module': match.group(4), 'self_ms': int(match.group(1)) / 1000,
+                            'cumulative_ms': int(match.group(2)) / 1000})
+    return modules
+
+
+def import_costs(interpreter: str, script_path: str, args: list = (), timeout: float = DEFAULT_TIMEOUT,
+                 top: int = TOP_IMPORTS) -> dict:
+    """
+    用 -X importtime 运行源脚本，返回 {'total_ms', 'interpreter_ms', 'modules': [{module, self_ms, cumulative_ms}]}。
+    解释器自身初始化时导入的模块（encodings、site 等）单独计入 interpreter_ms。
+    """
+    modules = _top_level_imports([interpreter, '-X', 'importtime', script_path] + list(args), timeout,
+                                 cwd=os.path.dirname(os.path.abspath(script_path)))
+    if modules is None:
+        return None
+    baseline = {m['module'] for m in _top_level_imports([interpreter, '-X', 'importtime', '-c', 'pass'],
+                                                        timeout) or []}
+    script_modules = [m for m in modules if m['module'] not in baseline]
+    script_modules.sort(key=lambda m: m['cumulative_ms'], reverse=True)
+    return {
+        'total_ms': sum(m['cumulative_ms'] for m in script_modules),
+        'interpreter_ms': sum(m['cumulative_ms'] for m in modules if m['module'] in baseline),
+        'modules': script_modules[:top],
+    }
+
+
+def profile_startup(exe_path: str, runs: int = DEFAULT_RUNS, timeout: float = DEFAULT_TIMEOUT,
+                    args: list = (), layout: str = None, script_path: str = None, interpreter: str = None) -> dict:
+    """连续启动 runs 次并汇总；提供 script_path 时另外测量模块导入耗时"""
+    layout = layout or detect_layout(exe_path)
+    cmd = [os.path.abspath(exe_path)] + list(args)
+    cold_evicted = evict_from_page_cache(exe_path, layout)
+    launches = [launch_once(cmd, timeout, watch_unpack=(layout == 'onefile')) for _ in range(max(1, runs))]
+
+    # 超时与无法启动的运行没有耗时
+    warm = [launch['elapsed_ms'] for launch in launches[1:] if launch['elapsed_ms'] is not None]
+    unpack = [launch['unpack_ms'] for launch in launches if launch['unpack_ms'] is not None]
+    result = {
+        'exe': exe_path,
+        'layout': layout,
+        'runs': len(launches),
+        'timeouts': sum(1 for launch in launches if launch['status'] == 'timeout'),
+        'failures': sum(1 for launch in launches if launch['status'] == 'failed'),
+        'cold_evicted': cold_evicted,
+        'cold_ms': launches[0]['elapsed_ms'],
+        'warm_p50_ms': median(warm) if warm else None,
+        'warm_min_ms': min(warm) if warm else None,
+        'unpack_ms': median(unpack) if unpack else (0.0 if layout == 'onedir' else None),
+        'launches_ms': [launch['elapsed_ms'] for launch in launches],
+        'imports': None,
+    }
+    if script_path:
+        result['imports'] = import_costs(interpreter or sys.executable, script_path, args, timeout)
+    return result
+
+
+def _ms(value) -> str:
+    return '-' if value is None else f"{value:.0f}ms"
+
+
+def summary_lines(profile: dict, timeout: float = DEFAULT_TIMEOUT) -> list:
+    """启动耗时报告的日志行"""
+    lines = [f"启动耗时（{profile['layout']}，{profile['runs']} 次）：冷启动 {_ms(profile['cold_ms'])}"
+             f"{'' if profile['cold_evicted'] else '（未能清除页缓存）'}，热启动中位数 {_ms(profile['warm_p50_ms'])}"
+             f" / 最快 {_ms(profile['warm_min_ms'])}，解包 {_ms(profile['unpack_ms'])}"]
+    if profile['timeouts']:
+        lines.append(f"WARNING: {profile['timeouts']} 次启动未在 {timeout:g} 秒内退出"
+                     f"（常驻或 GUI 程序无法测量启动耗时）")
+    if profile['failures']:
+        lines.append(f"WARNING: {profile['failures']} 次启动失败或以非零退出码结束")
+    imports = profile.get('imports')
+    if imports and imports['modules']:
+        top = '，'.join(f"{m['module']} {m['cumulative_ms']:.0f}ms" for m in imports['modules'][:5])
+        lines.append(f"模块导入共 {imports['total_ms']:.0f}ms，最慢：{top}")
+    return lines
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="测量 PyInstaller 产物的启动耗时")
+    parser.add_argument('exe', nargs='+', help="要测量的可执行文件（可同时给出不同输出形式的产物以作比较）")
+    parser.add_argument('--runs', type=int, default=DEFAULT_RUNS, help="每个产物的启动次数")
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT, help="每次启动的超时（秒）")
+    parser.add_argument('--args', default='', help="启动参数（如 --version，让程序立即退出）")
+    parser.add_argument('--script', help="源脚本：用 -X importtime 测量模块导入耗时")
+    parser.add_argument('--python', default=sys.executable, help="测量导入耗时使用的解释器")
+    args = parser.parse_args(argv)
+
+    profiles = [profile_startup(exe, args.runs, args.timeout, args.args.split(), script_path=args.script,
+                                interpreter=args.python) for exe in args.exe]
+    for profile in profiles:
+        for line in summary_lines(profile, args.timeout):
+            print(f"[{os.path.basename(profile['exe'])}] {line}", file=sys.stderr)
+    measured = [p for p in profiles if p['warm_p50_ms'] is not None or p['cold_ms'] is not None]
+    fastest = min(measured, key=lambda p: p['warm_p50_ms'] if p['warm_p50_ms'] is not None else p['cold_ms'],
+                  default=None)
+    print(json.dumps({'profiles': profiles, 'fastest': fastest['exe'] if fastest else None},
+                     ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,277 @@
+"""
+构建子进程监管：进程组、超时与自动重试。
+
+- 每个 PyInstaller 进程在独立的会话（POSIX）或进程组（Windows）中启动，终止时向整个进程组发送信号，
+  PyInstaller 派生的子进程（引导程序、hook 子进程、UPX）不会在取消或关闭窗口后继续运行；
+- 终止先发送 SIGTERM（Windows 为 CTRL_BREAK_EVENT），宽限期后仍未退出则 SIGKILL（taskkill /T /F）；
+  主进程退出后组内仍有残留进程时一并结束；
+- 每个构建有总时限与无输出时限；
+- 暂时性故障（进程被信号杀死、长时间无输出、杀毒软件占用文件、资源暂时不足等）自动重试，
+  单个任务的重试次数与整个会话/批次的重试总数都有上限。
+
+异步构建引擎在事件循环中自行计时；在线程中同步读取输出的构建（包括预热进程）由共享的 ProcessWatchdog 计时。
+"""
+import os
+import re
+import time
+import errno
+import signal
+import logging
+import threading
+import subprocess
+
+# 终止进程组时 SIGTERM 与 SIGKILL 之间的宽限期（秒）
+TERMINATE_GRACE_S = 3.0
+# 默认总时限与无输出时限（秒，0 表示不限制）
+DEFAULT_WALL_TIMEOUT_S = 30 * 60
+DEFAULT_IDLE_TIMEOUT_S = 5 * 60
+# 单个任务默认的最大重试次数与首次重试前的等待时间（之后每次加倍）
+DEFAULT_MAX_RETRIES = 2
+RETRY_BACKOFF_S = 2.0
+# 看门狗的检查间隔（秒）
+WATCHDOG_INTERVAL_S = 0.5
+
+# 进程结束的原因
+EXITED = 'exited'
+CANCELLED = 'cancelled'
+WALL_TIMEOUT = 'wall_timeout'
+IDLE_TIMEOUT = 'idle_timeout'
+SPAWN_FAILED = 'spawn_failed'
+FAILED = 'failed'
+
+# 输出中出现即视为暂时性故障的特征（多为 Windows 上杀毒软件或索引服务短暂占用文件）
+TRANSIENT_PATTERNS = re.compile(
+    r'\[WinError (?:5|32|33|110|1224)\]'
+    r'|being used by another process'
+    r'|Resource temporarily unavailable'
+    r'|Text file busy'
+    r'|Cannot allocate memory'
+    r'|\bMemoryError\b'
+)
+# 启动子进程失败时视为暂时性故障的错误码
+TRANSIENT_ERRNOS = {errno.EAGAIN, errno.ENOMEM, errno.EMFILE, errno.ENFILE, errno.ETXTBSY}
+
+
+def new_session_kwargs() -> dict:
+    """subprocess / asyncio 启动子进程时使用的参数：让子进程成为新进程组的组长"""
+    if os.name == 'nt':
+        return {'creationflags': subprocess.CREATE_NEW_PROCESS_GROUP}
+    return {'start_new_session': True}
+
+
+def signal_group(pid: int) -> bool:
+    """请求整个进程组退出（POSIX 为 SIGTERM，Windows 为 CTRL_BREAK_EVENT），返回是否发送成功"""
+    try:
+        if os.name == 'nt':
+            os.kill(pid, signal.CTRL_BREAK_EVENT)
+        else:
+            os.killpg(pid, signal.SIGTERM)
+        return True
+    except OSError:
+        return False
+
+
+def kill_group(pid: int):
+    """强制结束整个进程组（Windows 上按进程树结束）"""
+    if os.name == 'nt':
+        subprocess.run(['taskkill', '/T', '/F', '/PID', str(pid)],
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        return
+    try:
+        os.killpg(pid, signal.SIGKILL)
+    except OSError:
+        pass
+
+
+def group_alive(pid: int) -> bool:
+    """进程组中是否还有进程（Windows 上无法判断，总是返回 False）"""
+    if os.name == 'nt':
+        return False
+    try:
+        os.killpg(pid, 0)
+        return True
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+
+
+def reap_group(pid: int):
+    """主进程已退出并被回收后，结束组内残留的进程"""
+    if group_alive(pid):
+        logging.info(f"进程组 {pid} 中仍有残留进程，强制结束")
+        kill_group(pid)
+
+
+class ProcessResult:
+    """一次 PyInstaller 运行的结果"""
+
+    def __init__(self, reason: str, returncode: int = None, error=None, timeout: float = None):
+        self.reason = reason
+        self.returncode = returncode
+        self.error = error
+        self.timeout = timeout
+
+    @property
+    def ok(self) -> bool:
+        return self.reason == EXITED and self.returncode == 0
+
+    def describe(self) -> str:
+        if self.reason == CANCELLED:
+            return "转换已被用户取消。"
+        if self.reason == WALL_TIMEOUT:
+            return f"构建超过 {self.timeout:g} 秒仍未结束，已终止整个进程组。"
+        if self.reason == IDLE_TIMEOUT:
+            return f"PyInstaller 超过 {self.timeout:g} 秒没有输出，已终止整个进程组。"
+        if self.reason == SPAWN_FAILED:
+            return f"无法启动 PyInstaller: {self.error}"
+        if self.reason == FAILED:
+            return f"转换过程中出现异常: {self.error}"
+        if self.returncode is not None and self.returncode < 0:
+            return f"PyInstaller 被信号 {-self.returncode} 终止。"
+        return f"PyInstaller 退出码为 {self.returncode}。"
+
+
+def is_transient(result: ProcessResult, output_tail=()) -> bool:
+    """判断失败是否可能是暂时性的（重试有望成功）；超过总时限与用户取消不重试"""
+    if result.ok or result.reason in (CANCELLED, WALL_TIMEOUT, FAILED):
+        return False
+    if result.reason == IDLE_TIMEOUT:
+        return True
+    if result.reason == SPAWN_FAILED:
+        return getattr(result.error, 'errno', None) in TRANSIENT_ERRNOS
+    # 被外部信号杀死（如内存不足时被 OOM killer 结束）
+    if result.returncode is not None and result.returncode < 0:
+        return True
+    return any(TRANSIENT_PATTERNS.search(line) for line in output_tail)
+
+
+class RetryBudget:
+    """
+    会话或批次级的重试预算：重试总数不超过 minimum + ratio × 已开始的构建数，
+    系统性故障（如磁盘已满）导致大量失败时不会把每个任务都重试一遍。
+    """
+
+    def __init__(self, ratio: float = 0.2, minimum: int = 3):
+        self.ratio = ratio
+        self.minimum = minimum
+        self.builds = 0
+        self.retries = 0
+        self._lock = threading.Lock()
+
+    def record_build(self):
+        with self._lock:
+            self.builds += 1
+
+    def try_acquire(self) -> bool:
+        """申请一次重试，预算已用完时返回 False"""
+        with self._lock:
+            if self.retries >= self.minimum + self.ratio * self.builds:
+                return False
+            self.retries += 1
+            return True
+
+
+class ProcessWatch:
+    """看门狗对一个进程组的监视：输出时调用 touch()，进程被回收后调用 close()"""
+
+    def __init__(self, watchdog, pid: int, wall_timeout: float, idle_timeout: float, exited=None):
+        self._watchdog = watchdog
+        self.pid = pid
+        # 可选：返回主进程退出码（未退出时为 None）的函数，如 Popen.poll
+        self.exited = exited
+        self.reaped = False
+        self.wall_timeout = wall_timeout
+        self.idle_timeout = idle_timeout
+        self.started = self.last_output = time.monotonic()
+        # 终止原因（超时或取消）；None 表示未被终止
+        self.reason = None
+        self.kill_at = None
+
+    def touch(self):
+        self.last_output = time.monotonic()
+
+    def cancel(self):
+        self._watchdog.terminate(self, CANCELLED)
+
+    def close(self):
+        self._watchdog.release(self)
+
+    def result(self, returncode: int) -> ProcessResult:
+        """进程结束后的结果：被看门狗终止时以终止原因为准"""
+        if self.reason == WALL_TIMEOUT:
+            return ProcessResult(WALL_TIMEOUT, returncode, timeout=self.wall_timeout)
+        if self.reason == IDLE_TIMEOUT:
+            return ProcessResult(IDLE_TIMEOUT, returncode, timeout=self.idle_timeout)
+        if self.reason == CANCELLED:
+            return ProcessResult(CANCELLED, returncode)
+        return ProcessResult(EXITED, returncode)
+
+
+class ProcessWatchdog:
+    """用一个后台线程监视所有同步构建的总时限与无输出时限，并在终止后按宽限期升级为强制结束"""
+
+    def __init__(self, interval_s: float = WATCHDOG_INTERVAL_S):
+        self.interval_s = interval_s
+        self._watches = set()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def watch(self, pid: int, wall_timeout: float = None, idle_timeout: float = None, exited=None) -> ProcessWatch:
+        """开始监视以 pid 为组长的进程组；提供 exited 时主进程一退出就结束组内残留进程"""
+        watch = ProcessWatch(self, pid, wall_timeout, idle_timeout, exited)
+        with self._lock:
+            self._watches.add(watch)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='build-watchdog', daemon=True)
+                self._thread.start()
+        return watch
+
+    def terminate(self, watch: ProcessWatch, reason: str):
+        """请求进程组退出，宽限期后仍在运行则强制结束"""
+        with self._lock:
+            if watch.reason is not None or watch not in self._watches:
+                return
+            watch.reason = reason
+            watch.kill_at = time.monotonic() + TERMINATE_GRACE_S
+        signal_group(watch.pid)
+
+    def release(self, watch: ProcessWatch):
+        with self._lock:
+            self._watches.discard(watch)
+        if not watch.reaped:
+            reap_group(watch.pid)
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval_s)
+            now = time.monotonic()
+            with self._lock:
+                watches = list(self._watches)
+            for watch in watches:
+                if watch.kill_at is not None:
+                    if now >= watch.kill_at:
+                        watch.kill_at = None
+                        kill_group(watch.pid)
+                elif watch.exited is not None and watch.exited() is not None:
+                    # 残留进程继承了标准输出，不结束它们读取方就等不到 EOF
+                    watch.exited = None
+                    watch.reaped = True
+                    reap_group(watch.pid)
+                elif watch.wall_timeout and now - watch.started >= watch.wall_timeout:
+                    self.terminate(watch, WALL_TIMEOUT)
+                elif watch.idle_timeout and now - watch.last_output >= watch.idle_timeout:
+                    self.terminate(watch, IDLE_TIMEOUT)
+
+
+_shared_watchdog = None
+_shared_watchdog_lock = threading.Lock()
+
+
+def shared_watchdog() -> ProcessWatchdog:
+    """进程内共享的看门狗（监视线程在第一次使用时启动）"""
+    global _shared_watchdog
+    with _shared_watchdog_lock:
+        if _shared_watchdog is None:
+            _shared_watchdog = ProcessWatchdog()
+        return _shared_watchdog
@@ -0,0 +1,162 @@
+import os
+
+from progress import format_seconds
+
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QTimer
+from PyQt5.QtGui import QColor
+from PyQt5.QtWidgets import (
+    QApplication, QStyle, QStyledItemDelegate, QStyleOptionProgressBar, QTableView,
+    QAbstractItemView, QHeaderView
+)
+
+COLUMN_SCRIPT = 0
+COLUMN_PROGRESS = 1
+COLUMN_STATUS = 2
+HEADERS = ["脚本", "进度", "状态"]
+
+
+class TaskRow:
+    """任务表中的一行"""
+    __slots__ = ('script_path', 'name', 'progress', 'eta', 'status', 'failed')
+
+    def __init__(self, script_path: str):
+        self.script_path = script_path
+        self.name = os.path.basename(script_path)
+        self.progress = 0
+        self.eta = None
+        self.status = "等待中..."
+        self.failed = False
+
+
+class TaskTableModel(QAbstractTableModel):
+    """
+    转换任务表模型：更新只标记脏行，由定时器合并为一次 dataChanged(最小行, 最大行) 通知，
+    上千个任务频繁刷新进度时也只触发少量重绘。
+    """
+
+    def __init__(self, parent=None, flush_interval_ms: int = 100):
+        super().__init__(parent)
+        self._rows = []
+        self._row_of = {}
+        self._dirty = set()
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.setInterval(flush_interval_ms)
+        self._flush_timer.timeout.connect(self.flush)
+
+    # ---------- 数据维护 ----------
+    def reset_tasks(self, script_paths):
+        """用新的脚本列表替换全部任务（一次模型重置，而不是逐个删除控件）"""
+        self.beginResetModel()
+        self._rows = [TaskRow(path) for path in script_paths]
+        self._row_of = {row.script_path: i for i, row in enumerate(self._rows)}
+        self._dirty.clear()
+        self.endResetModel()
+
+    def set_progress(self, script_path: str, value: int, eta: float = None):
+        """更新进度与预计剩余秒数（eta 为 None 时不显示剩余时间）"""
+        row = self._row_of.get(script_path)
+        if row is None:
+            return
+        task = self._rows[row]
+        eta = int(round(eta)) if eta is not None and value < 100 else None
+        if task.progress != value or task.eta != eta:
+            task.progress = value
+            task.eta = eta
+            self._mark_dirty(row)
+
+    def set_status(self, script_path: str, text: str, failed: bool = False):
+        row = self._row_of.get(script_path)
+        if row is not None:
+            self._rows[row].status = text
+            self._rows[row].failed = failed
+            self._mark_dirty(row)
+
+    def script_path(self, row: int) -> str:
+        return self._rows[row].script_path
+
+    def _mark_dirty(self, row: int):
+        self._dirty.add(row)
+        if not self._flush_timer.isActive():
+            self._flush_timer.start()
+
+    def flush(self):
+        """把累积的改动合并为一次 dataChanged 通知"""
+        if not self._dirty:
+            return
+        first, last = min(self._dirty), max(self._dirty)
+        self._dirty.clear()
+        self.dataChanged.emit(self.index(first, 0), self.index(last, len(HEADERS) - 1))
+
+    # ---------- 模型接口 ----------
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return HEADERS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        task = self._rows[index.row()]
+        column = index.column()
+        if role == Qt.DisplayRole:
+            if column == COLUMN_SCRIPT:
+                return task.name
+            if column == COLUMN_PROGRESS:
+                return task.progress
+            return task.status
+        if role == Qt.UserRole and column == COLUMN_PROGRESS:
+            return task.eta
+        if role == Qt.ToolTipRole:
+            return task.script_path if column == COLUMN_SCRIPT else task.status
+        if role == Qt.ForegroundRole and column == COLUMN_STATUS and task.failed:
+            return QColor('red')
+        return None
+
+
+class ProgressDelegate(QStyledItemDelegate):
+    """在单元格中直接绘制进度条（不为每行创建 QProgressBar 控件）"""
+
+    def paint(self, painter, option, index):
+        value = index.data(Qt.DisplayRole) or 0
+        bar = QStyleOptionProgressBar()
+        bar.rect = option.rect.adjusted(2, 3, -2, -3)
+        bar.minimum = 0
+        bar.maximum = 100
+        bar.progress = int(value)
+        eta = index.data(Qt.UserRole)
+        bar.text = f"{int(value)}% · 剩余约 {format_seconds(eta)}" if eta is not None else f"{int(value)}%"
+        bar.textVisible = True
+        bar.state = option.state
+        style = option.widget.style() if option.widget else QApplication.style()
+        style.drawControl(QStyle.CE_ProgressBar, bar, painter)
+
+
+class TaskTableView(QTableView):
+    """转换任务表：统一行高，进度列使用 ProgressDelegate 绘制"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.setItemDelegateForColumn(COLUMN_PROGRESS, ProgressDelegate(self))
+        self.setWordWrap(False)
+        self.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.verticalHeader().setDefaultSectionSize(24)
+        self.verticalHeader().hide()
+
+    def setModel(self, model):
+        super().setModel(model)
+        header = self.horizontalHeader()
+        header.setSectionResizeMode(COLUMN_SCRIPT, QHeaderView.Interactive)
+        header.setSectionResizeMode(COLUMN_PROGRESS, QHeaderView.Fixed)
+        header.setSectionResizeMode(COLUMN_STATUS, QHeaderView.Stretch)
+        self.setColumnWidth(COLUMN_SCRIPT, 200)
+        self.setColumnWidth(COLUMN_PROGRESS, 200)
@@ -0,0 +1,222 @@
+import os
+import sys
+import json
+import shlex
+import logging
+import threading
+import subprocess
+
+from app_paths import data_dir
+
+# 在目标解释器中一次性完成全部探测，输出一行 JSON
+PROBE_SCRIPT = r"""
+import os, json, sys, site, sysconfig
+paths = sysconfig.get_paths()
+site_dirs = {paths['purelib'], paths['platlib']}
+if site.ENABLE_USER_SITE:
+    site_dirs.add(site.getusersitepackages())
+info = {'python_version': sys.version.split()[0], 'pyinstaller_version': None, 'versioninfo': False}
+try:
+    import PyInstaller
+    info['pyinstaller_version'] = PyInstaller.__version__
+    site_dirs.add(os.path.dirname(os.path.dirname(os.path.abspath(PyInstaller.__file__))))
+    from PyInstaller.utils.win32 import versioninfo
+    info['versioninfo'] = True
+except Exception:
+    pass
+info['site_dirs'] = sorted(site_dirs)
+print(json.dumps(info))
+"""
+
+
+class Toolchain:
+    """一次探测得到的工具链信息"""
+
+    def __init__(self, interpreter: str, python_version: str = None, pyinstaller_version: str = None,
+                 versioninfo: bool = False, command: list = None, site_dirs: list = None):
+        self.interpreter = interpreter
+        self.python_version = python_version
+        self.pyinstaller_version = pyinstaller_version
+        self.versioninfo = versioninfo
+        # 自定义的 PyInstaller 命令（如基准测试用的替身），为 None 时使用 python -m PyInstaller
+        self.command = command
+        # 安装包所在的 site-packages 目录（安装、升级或卸载 PyInstaller 时其 mtime 会变化）
+        self.site_dirs = site_dirs or []
+
+    @property
+    def has_pyinstaller(self) -> bool:
+        return bool(self.pyinstaller_version)
+
+    @property
+    def pyinstaller_cmd(self) -> list:
+        """调用 PyInstaller 的命令前缀"""
+        return list(self.command) if self.command else [self.interpreter, '-m', 'PyInstaller']
+
+    def fingerprint(self) -> str:
+        """解释器与 PyInstaller 版本标识（用作构建缓存键的一部分）"""
+        fingerprint = f"{self.interpreter}|Python {self.python_version}|PyInstaller {self.pyinstaller_version}"
+        if self.command:
+            fingerprint += f"|{' '.join(self.command)}"
+        return fingerprint
+
+    def to_dict(self) -> dict:
+        return {
+            'interpreter': self.interpreter,
+            'python_version': self.python_version,
+            'pyinstaller_version': self.pyinstaller_version,
+            'versioninfo': self.versioninfo,
+            'command': self.command,
+            'site_dirs': self.site_dirs,
+        }
+
+
+class ToolchainService:
+    """
+    工具链探测服务：整个会话只探测一次并缓存结果（可选持久化到磁盘，
+    以解释器路径 + mtime 为键，并记录 site-packages 目录的 mtime：
+    pip 安装、升级或卸载 PyInstaller 后磁盘缓存失效、重新探测），供所有转换任务共享。
+    并发调用者只会触发一次探测/安装（single-flight）。
+    设置环境变量 PYEXE_MAKER_PYINSTALLER（或传入 pyinstaller_command）时，
+    直接使用该命令代替 PyInstaller，不再探测与安装。
+    """
+
+    CACHE_FILE = 'toolchain.json'
+
+    def __init__(self, interpreter: str = None, use_disk_cache: bool = True, auto_install: bool = True,
+                 pyinstaller_command: str = None):
+        self.interpreter = interpreter or sys.executable
+        self.use_disk_cache = use_disk_cache
+        self.auto_install = auto_install
+        command = pyinstaller_command or os.environ.get("PYEXE_MAKER_PYINSTALLER")
+        self.pyinstaller_command = shlex.split(command, posix=os.name != 'nt') if command else None
+        self._lock = threading.Lock()
+        self._toolchain = None
+
+    def get(self, status_callback=None) -> Toolchain:
+        """返回工具链信息；首次调用时探测（必要时安装 PyInstaller），其余调用者等待同一结果"""
+        report = status_callback or logging.info
+        if self._toolchain is not None:
+            return self._toolchain
+
+        with self._lock:
+            if self._toolchain is not None:
+                return self._toolchain
+
+            if self.pyinstaller_command:
+                report(f"使用自定义 PyInstaller 命令: {' '.join(self.pyinstaller_command)}")
+                self._toolchain = Toolchain(self.interpreter, sys.version.split()[0], 'custom',
+                                            command=self.pyinstaller_command)
+                return self._toolchain
+
+            toolchain = self._load_from_disk()
+            if toolchain is None:
+                toolchain = self._probe()
+                if not toolchain.has_pyinstaller and self.auto_install:
+                    report("未检测到 PyInstaller，正在尝试安装...")
+                    try:
+                        subprocess.check_call([self.interpreter, "-m", "pip", "install", "pyinstaller"])
+                        report("PyInstaller 安装成功。")
+                    except (OSError, subprocess.CalledProcessError) as e:
+                        report(f"安装 PyInstaller 失败: {e}")
+                    toolchain = self._probe()
+                if toolchain.has_pyinstaller:
+                    self._save_to_disk(toolchain)
+
+            if toolchain.has_pyinstaller:
+                self._toolchain = toolchain
+            # 探测失败时不缓存，下一次调用会重新探测
+            return toolchain
+
+    @property
+    def current(self) -> Toolchain:
+        """已探测到的工具链；尚未探测时为 None（不会触发探测）"""
+        return self._toolchain
+
+    def invalidate(self):
+        """丢弃缓存的探测结果"""
+        with self._lock:
+            self._toolchain = None
+
+    # ---------- 探测 ----------
+    def _probe(self) -> Toolchain:
+        try:
+            result = subprocess.run([self.interpreter, '-c', PROBE_SCRIPT],
+                                    check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                    universal_newlines=True)
+            info = json.loads(result.stdout.strip().splitlines()[-1])
+        except (OSError, subprocess.CalledProcessError, ValueError, IndexError) as e:
+            logging.warning(f"工具链探测失败: {e}")
+            return Toolchain(self.interpreter)
+        return Toolchain(self.interpreter, **info)
+
+    # ---------- 磁盘缓存 ----------
+    def _disk_key(self) -> str:
+        try:
+            mtime = os.path.getmtime(self.interpreter)
+        except OSError:
+            return None
+        return f"{os.path.abspath(self.interpreter)}|{mtime}"
+
+    def _load_from_disk(self) -> Toolchain:
+        key = self._disk_key()
+        if not self.use_disk_cache or not key:
+            return None
+        try:
+            with open(os.path.join(data_dir(), self.CACHE_FILE), 'r', encoding='utf-8') as f:
+                info = json.load(f).get(key)
+        except (OSError, ValueError):
+            return None
+        if not info or 'site_stamp' not in info:
+            return None
+        stamp = info.pop('site_stamp')
+        try:
+            # 旧版本写入的条目字段可能不同，重新探测
+            toolchain = Toolchain(**info)
+        except TypeError:
+            return None
+        if stamp != self._site_stamp(toolchain.site_dirs):
+            return None
+        return toolchain
+
+    @staticmethod
+    def _site_stamp(site_dirs: list) -> dict:
+        """各 site-packages 目录的 mtime（不存在的目录为 None）"""
+        stamp = {}
+        for path in site_dirs:
+            try:
+                stamp[path] = os.path.getmtime(path)
+            except OSError:
+                stamp[path] = None
+        return stamp
+
+    def _save_to_disk(self, toolchain: Toolchain):
+        key = self._disk_key()
+        if not self.use_disk_cache or not key:
+            return
+        cache_path = os.path.join(data_dir(), self.CACHE_FILE)
+        try:
+            try:
+                with open(cache_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                data = {}
+            data[key] = dict(toolchain.to_dict(), site_stamp=self._site_stamp(toolchain.site_dirs))
+            tmp_path = cache_path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            logging.warning(f"无法写入工具链缓存: {e}")
+
+
+_shared_service = None
+_shared_lock = threading.Lock()
+
+
+def shared_toolchain_service() -> ToolchainService:
+    """进程内共享的默认工具链服务"""
+    global _shared_service
+    with _shared_lock:
+        if _shared_service is None:
+            _shared_service = ToolchainService()
+        return _shared_service
@@ -0,0 +1,156 @@
+import os
+import time
+import threading
+
+from PyQt5.QtCore import Qt, QObject, QEvent, QTimer
+from PyQt5.QtWidgets import QApplication
+
+# 设置该环境变量后主窗口进入界面响应度测量模式
+PROFILE_ENV = 'PYEXE_MAKER_PROFILE_UI'
+# WorkerSignals 中需要统计排队情况的信号
+WORKER_SIGNALS = ('conversion_finished', 'conversion_failed', 'finished')
+
+
+def profiling_enabled() -> bool:
+    return os.environ.get(PROFILE_ENV, '') not in ('', '0')
+
+
+def percentile(values: list, p: float) -> float:
+    """最近秩法求百分位数（values 为空时返回 0）"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(p / 100.0 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+class InstrumentedApplication(QApplication):
+    """在 notify 中为登记过的控件计时绘制事件（只在测量模式下使用，有额外开销）"""
+
+    def __init__(self, argv):
+        super().__init__(argv)
+        self.paint_targets = {}
+        self.paint_times = {}
+
+    def watch_paint(self, name: str, widget):
+        self.paint_targets[widget] = name
+        self.paint_times.setdefault(name, [])
+
+    def notify(self, receiver, event):
+        if event.type() != QEvent.Paint or receiver not in self.paint_targets:
+            return super().notify(receiver, event)
+        started = time.perf_counter()
+        result = super().notify(receiver, event)
+        self.paint_times[self.paint_targets[receiver]].append((time.perf_counter() - started) * 1000)
+        return result
+
+
+class ResponsivenessProbe(QObject):
+    """
+    界面响应度测量：
+    - 事件循环延迟：高频定时器实际触发时刻相对预期的滞后（即界面卡顿时长）
+    - 绘制耗时：任务表与日志视图每次绘制所用时间（需要 InstrumentedApplication）
+    - 信号积压：WorkerSignals 已发出但尚未在主线程处理的排队信号数，以及日志通道中待显示的行数
+    """
+
+    def __init__(self, parent=None, interval_ms: int = 10):
+        super().__init__(parent)
+        self.interval_ms = interval_ms
+        self._timer = QTimer(self)
+        self._timer.setTimerType(Qt.PreciseTimer)
+        self._timer.setInterval(interval_ms)
+        self._timer.timeout.connect(self._tick)
+        self._lock = threading.Lock()
+        self.pipeline = None
+        self.reset()
+
+    def reset(self):
+        """清空已采集的数据（每个批次开始时调用）"""
+        app = QApplication.instance()
+        if isinstance(app, InstrumentedApplication):
+            for times in app.paint_times.values():
+                times.clear()
+        self.stalls = []
+        self.backlog = []
+        self.log_queued = []
+        self.emitted = 0
+        self.delivered = 0
+        self._last_tick = None
+
+    def start(self):
+        self._last_tick = None
+        self._timer.start()
+
+    def stop(self):
+        self._timer.stop()
+
+    @property
+    def active(self) -> bool:
+        return self._timer.isActive()
+
+    def watch_paint(self, name: str, widget):
+        """登记需要统计绘制耗时的控件（通常是视图的 viewport）"""
+        app = QApplication.instance()
+        if isinstance(app, InstrumentedApplication):
+            app.watch_paint(name, widget)
+
+    def watch_pipeline(self, pipeline):
+        """采样日志通道的积压行数"""
+        self.pipeline = pipeline
+
+    def watch_signals(self, signals):
+        """统计一个 WorkerSignals 的发出数（工作线程内直接计数）与主线程处理数"""
+        for name in WORKER_SIGNALS:
+            signal = getattr(signals, name)
+            signal.connect(self._on_emitted, Qt.DirectConnection)
+            signal.connect(self._on_delivered, Qt.QueuedConnection)
+
+    def _on_emitted(self, *args):
+        with self._lock:
+            self.emitted += 1
+
+    def _on_delivered(self, *args):
+        with self._lock:
+            self.delivered += 1
+
+    def _tick(self):
+        now = time.perf_counter()
+        if self._last_tick is not None:
+            self.stalls.append(max(0.0, (now - self._last_tick) * 1000 - self.interval_ms))
+        self._last_tick = now
+        with self._lock:
+            self.backlog.append(self.emitted - self.delivered)
+        if self.pipeline is not None:
+            self.log_queued.append(self.pipeline.queued)
+
+    def report(self) -> dict:
+        """汇总为 {指标: 数值}，时间单位为毫秒"""
+        result = {
+            'samples': len(self.stalls),
+            'stall_p50_ms': percentile(self.stalls, 50),
+            'stall_p99_ms': percentile(self.stalls, 99),
+            'stall_max_ms': max(self.stalls, default=0.0),
+            'signals_emitted': self.emitted,
+            'signal_backlog_p99': percentile(self.backlog, 99),
+            'signal_backlog_max': max(self.backlog, default=0),
+            'log_queue_p99': percentile(self.log_queued, 99),
+            'log_queue_max': max(self.log_queued, default=0),
+        }
+        app = QApplication.instance()
+        if isinstance(app, InstrumentedApplication):
+            for name, times in app.paint_times.items():
+                result[f'{name}_paints'] = len(times)
+                result[f'{name}_paint_p50_ms'] = percentile(times, 50)
+                result[f'{name}_paint_p99_ms'] = percentile(times, 99)
+        return result
+
+    def summary_text(self) -> str:
+        report = self.report()
+        text = (f"界面响应：卡顿 p50 {report['stall_p50_ms']:.1f}ms / p99 {report['stall_p99_ms']:.1f}ms / "
+                f"最大 {report['stall_max_ms']:.1f}ms，信号积压峰值 {report['signal_backlog_max']}，"
+                f"日志积压峰值 {report['log_queue_max']} 行")
+        paints = [f"{name} {report[f'{name}_paint_p99_ms']:.1f}ms"
+                  for name in ('task_view', 'log_view', 'task_log_view') if report.get(f'{name}_paints')]
+        if paints:
+            text += f"，绘制 p99：{'，'.join(paints)}"
+        return text
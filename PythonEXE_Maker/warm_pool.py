@@ -0,0 +1,189 @@
+import os
+import sys
+import json
+import queue
+import signal
+import logging
+import threading
+import subprocess
+
+from supervisor import signal_group
+
+# 子进程输出中的控制标记（以 NUL 开头，不会与 PyInstaller 的日志混淆）
+PID_MARKER = '\0PID '
+EXIT_MARKER = '\0EXIT '
+
+
+def _zygote_main():
+    """
+    预热进程入口：预先导入 PyInstaller 及其分析模块，然后逐行读取任务（JSON），
+    每个任务 fork 出一个子进程在进程内调用 PyInstaller.__main__.run，保证任务之间状态隔离。
+    """
+    import PyInstaller.__main__
+    for module in ('PyInstaller.building.build_main', 'PyInstaller.depend.analysis'):
+        try:
+            __import__(module)
+        except Exception:
+            pass
+
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        job = json.loads(line)
+        sys.stdout.flush()
+        sys.stderr.flush()
+        pid = os.fork()
+        if pid == 0:
+            # 子进程：独立会话，便于连同它派生的进程一起结束；stderr 合并到 stdout（即与父进程相连的管道）
+            os.setsid()
+            os.dup2(1, 2)
+            sys.stdout.reconfigure(line_buffering=True)
+            sys.stderr.reconfigure(line_buffering=True)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            code = 1
+            try:
+                print(f"{PID_MARKER}{os.getpid()}", flush=True)
+                os.chdir(job['cwd'])
+                PyInstaller.__main__.run(job['args'])
+                code = 0
+            except SystemExit as e:
+                code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+            except BaseException as e:
+                print(f"预热进程执行 PyInstaller 失败: {e!r}", flush=True)
+            finally:
+                sys.stdout.flush()
+                sys.stderr.flush()
+                os._exit(code)
+
+        _, status = os.waitpid(pid, 0)
+        if os.WIFEXITED(status):
+            code = os.WEXITSTATUS(status)
+        else:
+            code = -os.WTERMSIG(status)
+        print(f"{EXIT_MARKER}{code}", flush=True)
+
+
+class _Zygote:
+    """一个已预热的 PyInstaller 进程"""
+
+    def __init__(self, interpreter: str):
+        self.process = subprocess.Popen(
+            [interpreter, '-u', os.path.abspath(__file__), '--zygote'],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+            universal_newlines=True, encoding='utf-8', errors='replace'
+        )
+
+    @property
+    def alive(self) -> bool:
+        return self.process.poll() is None
+
+    def close(self):
+        try:
+            self.process.stdin.close()
+        except OSError:
+            pass
+        try:
+            self.process.wait(timeout=2)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+
+
+class WarmWorkerPool:
+    """
+    预热的 PyInstaller 工作进程池（仅 POSIX，依赖 fork）：
+    省去每次构建的解释器启动和 PyInstaller 导入开销。
+    池中无空闲进程且已达上限时，run() 返回 None，由调用方回退为普通子进程。
+    """
+
+    def __init__(self, interpreter: str = None, max_size: int = None, prewarm: int = 1):
+        self.interpreter = interpreter or sys.executable
+        self.max_size = max_size or (os.cpu_count() or 1)
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._all = []
+        self._closed = False
+        if self.available:
+            for _ in range(min(prewarm, self.max_size)):
+                self._idle.put(self._spawn())
+
+    @property
+    def available(self) -> bool:
+        return hasattr(os, 'fork') and not self._closed
+
+    def _spawn(self) -> _Zygote:
+        zygote = _Zygote(self.interpreter)
+        with self._lock:
+            self._all.append(zygote)
+        return zygote
+
+    def _acquire(self) -> _Zygote:
+        while True:
+            try:
+                zygote = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if zygote.alive:
+                return zygote
+            self._discard(zygote)
+        with self._lock:
+            if len(self._all) >= self.max_size:
+                return None
+        return self._spawn()
+
+    def _discard(self, zygote: _Zygote):
+        with self._lock:
+            if zygote in self._all:
+                self._all.remove(zygote)
+        zygote.close()
+
+    def run(self, args: list, cwd: str, on_line, should_continue, on_start=None) -> int:
+        """
+        在预热进程中执行一次 PyInstaller 构建（阻塞调用线程）。
+        每行输出回调 on_line(line)；should_continue() 返回 False 时终止子进程；
+        on_start(pid) 在构建子进程启动后回调。
+        返回退出码；无法使用预热进程时返回 None。
+        """
+        if not self.available:
+            return None
+        zygote = self._acquire()
+        if zygote is None:
+            return None
+
+        child_pid = None
+        try:
+            zygote.process.stdin.write(json.dumps({'args': args, 'cwd': cwd}) + '\n')
+            zygote.process.stdin.flush()
+            for line in zygote.process.stdout:
+                line = line.rstrip('\n')
+                if line.startswith(PID_MARKER):
+                    child_pid = int(line[len(PID_MARKER):])
+                    if on_start:
+                        on_start(child_pid)
+                    continue
+                if line.startswith(EXIT_MARKER):
+                    code = int(line[len(EXIT_MARKER):])
+                    self._idle.put(zygote)
+                    return code
+                if not should_continue() and child_pid:
+                    signal_group(child_pid)
+                    child_pid = None
+                on_line(line)
+        except (OSError, ValueError) as e:
+            logging.warning(f"预热进程通信失败: {e}")
+
+        # 预热进程意外退出
+        self._discard(zygote)
+        return None
+
+    def shutdown(self):
+        """关闭全部预热进程"""
+        self._closed = True
+        with self._lock:
+            zygotes = list(self._all)
+            self._all = []
+        for zygote in zygotes:
+            zygote.close()
+
+
+if __name__ == '__main__' and '--zygote' in sys.argv:
+    _zygote_main()
@@ -0,0 +1,144 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import logging
+import threading
+
+from app_paths import data_dir
+
+# 工作目录总磁盘预算（MB），可通过环境变量 PYEXE_MAKER_WORKDIR_MAX_MB 调整
+DEFAULT_WORKDIR_MAX_MB = 4096
+
+
+def _dir_size(path: str) -> int:
+    """统计目录总大小（字节）"""
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+class WorkDirManager:
+    """
+    增量构建的工作目录管理：
+    每个脚本（按脚本路径 + EXE 名称区分）拥有独立且跨次保留的 workpath/specpath，
+    使 PyInstaller 可以复用上次的 Analysis/PYZ/PKG 结果；
+    仅当脚本内容或参数变化时才需要 --clean。总占用超出预算时按 LRU 淘汰。
+    """
+
+    STAMP_FILE = 'stamp.json'
+
+    def __init__(self, root_dir: str = None, max_bytes: int = None):
+        self.root_dir = root_dir or data_dir('work')
+        os.makedirs(self.root_dir, exist_ok=True)
+        if max_bytes is None:
+            max_mb = int(os.environ.get('PYEXE_MAKER_WORKDIR_MAX_MB', DEFAULT_WORKDIR_MAX_MB))
+            max_bytes = max_mb * 1024 * 1024
+        self.max_bytes = max_bytes
+
+        self._lock = threading.Lock()
+        self._in_use = set()
+
+    @staticmethod
+    def compute_stamp(script_path: str, options: list) -> str:
+        """脚本内容 + 参数列表（含图标、版本信息文件内容）的指纹"""
+        h = hashlib.sha256()
+        with open(script_path, 'rb') as f:
+            h.update(f.read())
+        for opt in options:
+            for prefix in ('--icon=', '--version-file='):
+                if opt.startswith(prefix) and os.path.isfile(opt[len(prefix):]):
+                    # 图标/版本文件位于任务临时工作区，路径每次不同，只计入内容
+                    h.update(b'\0' + prefix.encode('utf-8'))
+                    with open(opt[len(prefix):], 'rb') as f:
+                        h.update(f.read())
+                    break
+            else:
+                h.update(b'\0' + opt.encode('utf-8'))
+        return h.hexdigest()
+
+    def work_dir_for(self, script_path: str, exe_name: str) -> str:
+        """脚本对应的工作目录（不同目录下的同名脚本互不干扰）"""
+        key = hashlib.sha1(f"{os.path.abspath(script_path)}|{exe_name}".encode('utf-8')).hexdigest()[:16]
+        return os.path.join(self.root_dir, f"{exe_name}-{key}")
+
+    def acquire(self, script_path: str, exe_name: str, options: list):
+        """
+        领取脚本的工作目录，返回 (workpath, specpath, stamp, needs_clean)。
+        指纹与上次成功构建一致时 needs_clean 为 False。
+        """
+        work_dir = self.work_dir_for(script_path, exe_name)
+        stamp = self.compute_stamp(script_path, options)
+        with self._lock:
+            self._in_use.add(work_dir)
+
+        previous = self._read_stamp(work_dir)
+        needs_clean = previous.get('stamp') != stamp
+
+        workpath = os.path.join(work_dir, 'build')
+        specpath = os.path.join(work_dir, 'spec')
+        os.makedirs(workpath, exist_ok=True)
+        os.makedirs(specpath, exist_ok=True)
+        return workpath, specpath, stamp, needs_clean
+
+    def release(self, script_path: str, exe_name: str, stamp: str, success: bool):
+        """归还工作目录：成功则记录指纹，失败则清除指纹（下次强制 --clean），随后执行淘汰"""
+        work_dir = self.work_dir_for(script_path, exe_name)
+        stamp_path = os.path.join(work_dir, self.STAMP_FILE)
+        try:
+            if success:
+                with open(stamp_path, 'w', encoding='utf-8') as f:
+                    json.dump({'stamp': stamp, 'script': os.path.abspath(script_path),
+                               'last_used': time.time(), 'size': _dir_size(work_dir)}, f)
+            elif os.path.exists(stamp_path):
+                os.remove(stamp_path)
+        except OSError as e:
+            logging.warning(f"无法更新工作目录指纹: {e}")
+
+        with self._lock:
+            self._in_use.discard(work_dir)
+            self._evict()
+
+    def _read_stamp(self, work_dir: str) -> dict:
+        try:
+            with open(os.path.join(work_dir, self.STAMP_FILE), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _evict(self):
+        """总占用超出预算时，从最久未使用的工作目录开始删除（跳过正在使用的目录）"""
+        entries = []
+        for name in os.listdir(self.root_dir):
+            work_dir = os.path.join(self.root_dir, name)
+            if not os.path.isdir(work_dir):
+                continue
+            meta = self._read_stamp(work_dir)
+            size = meta.get('size')
+            if size is None:
+                size = _dir_size(work_dir)
+            entries.append((meta.get('last_used', 0), size, work_dir))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, work_dir in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if work_dir in self._in_use:
+                continue
+            shutil.rmtree(work_dir, ignore_errors=True)
+            total -= size
+            logging.info(f"已淘汰增量构建工作目录: {os.path.basename(work_dir)} ({size // 1024} KB)")
+
+    def clear(self):
+        """删除全部未在使用的工作目录"""
+        with self._lock:
+            for name in os.listdir(self.root_dir):
+                work_dir = os.path.join(self.root_dir, name)
+                if os.path.isdir(work_dir) and work_dir not in self._in_use:
+                    shutil.rmtree(work_dir, ignore_errors=True)
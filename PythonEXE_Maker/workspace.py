@@ -0,0 +1,57 @@
+import os
+import shutil
+import logging
+import tempfile
+
+APP_PREFIX = 'pyexe-maker-'
+
+
+def scratch_root() -> str:
+    """
+    临时工作区的根目录：
+    - 优先使用环境变量 PYEXE_MAKER_SCRATCH
+    - 其次使用 tmpfs（/dev/shm，Linux 下位于内存中）
+    - 否则使用系统临时目录
+    """
+    root = os.environ.get('PYEXE_MAKER_SCRATCH')
+    if root:
+        os.makedirs(root, exist_ok=True)
+        return root
+    if os.path.isdir('/dev/shm') and os.access('/dev/shm', os.W_OK):
+        return '/dev/shm'
+    return tempfile.gettempdir()
+
+
+class TaskWorkspace:
+    """
+    单个转换任务的私有临时目录：存放转换后的图标、版本信息文件、spec 与 workpath，
+    同一目录下的多个脚本并行构建时互不覆盖。退出时整体删除。
+    """
+
+    def __init__(self, name: str = ''):
+        self.path = tempfile.mkdtemp(prefix=f"{APP_PREFIX}{name}-", dir=scratch_root())
+
+    def file(self, name: str) -> str:
+        """工作区内的文件路径"""
+        return os.path.join(self.path, name)
+
+    def subdir(self, name: str) -> str:
+        """工作区内的子目录（自动创建）"""
+        path = os.path.join(self.path, name)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def cleanup(self):
+        """删除整个工作区"""
+        if self.path and os.path.exists(self.path):
+            shutil.rmtree(self.path, ignore_errors=True)
+            if os.path.exists(self.path):
+                logging.warning(f"无法完全删除临时工作区: {self.path}")
+        self.path = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.cleanup()
+        return False
@@ -0,0 +1,47 @@
+"""
+生成基准测试用的合成脚本语料：
+- tiny：只有一行输出的脚本
+- heavy：导入大量标准库（以及已安装的常见第三方库）的脚本
+- many：同一目录下的大量脚本，共享一个本地辅助模块
+"""
+import os
+import importlib.util
+
+# heavy 语料导入的标准库模块
+HEAVY_STDLIB = [
+    'asyncio', 'email.mime.multipart', 'http.server', 'xml.dom.minidom', 'sqlite3', 'decimal',
+    'unittest', 'logging.handlers', 'concurrent.futures', 'multiprocessing', 'tkinter', 'ctypes',
+    'json', 'csv', 'zipfile', 'tarfile', 'urllib.request', 'ssl', 'argparse', 'difflib',
+]
+# 已安装时一并导入的第三方库
+HEAVY_THIRD_PARTY = ['PIL.Image', 'numpy', 'yaml', 'requests']
+
+
+def _write(path: str, text: str) -> str:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    return path
+
+
+def tiny_script(root: str, index: int = 0) -> str:
+    return _write(os.path.join(root, 'tiny', f'tiny_{index}.py'), f"print('hello from tiny script {index}')\n")
+
+
+def heavy_script(root: str, index: int = 0) -> str:
+    modules = list(HEAVY_STDLIB)
+    modules += [name for name in HEAVY_THIRD_PARTY if importlib.util.find_spec(name.split('.')[0])]
+    lines = [f"import {name}" for name in modules]
+    lines.append(f"print('heavy script {index} imported {len(modules)} modules')")
+    return _write(os.path.join(root, 'heavy', f'heavy_{index}.py'), '\n'.join(lines) + '\n')
+
+
+def many_scripts(root: str, count: int) -> list:
+    directory = os.path.join(root, 'many')
+    _write(os.path.join(directory, 'shared_helpers.py'),
+           "import json\n\n\ndef describe(index):\n    return json.dumps({'script': index})\n")
+    return [
+        _write(os.path.join(directory, f'tool_{i:03d}.py'),
+               f"from shared_helpers import describe\n\nprint(describe({i}))\n")
+        for i in range(count)
+    ]
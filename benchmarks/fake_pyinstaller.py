@@ -0,0 +1,148 @@
+"""
+确定性的 PyInstaller 替身：按录制的日志流与时间间隔回放输出，并生成固定内容的产物。
+
+用法（由转换引擎调用，参数与 PyInstaller 相同）：
+    PYEXE_MAKER_PYINSTALLER="python benchmarks/fake_pyinstaller.py" python PythonEXE_Maker/main.py
+
+环境变量：
+    FAKE_PYINSTALLER_TRACE   录制文件（record_trace.py 生成），默认 traces/tiny.json
+    FAKE_PYINSTALLER_SPEED   回放时间倍率（0.1 表示 10 倍速，0 表示不等待），默认 1
+    FAKE_PYINSTALLER_REPEAT  Analysis 阶段每行重复输出的次数（压测日志通道），默认 1
+    FAKE_PYINSTALLER_EXE_KB  产物大小（KB），默认 1024
+    FAKE_PYINSTALLER_MEM_MB  Analysis 阶段额外占用的内存（MB），用于模拟峰值内存，默认 0
+    FAKE_PYINSTALLER_FAIL    设为 1 时以退出码 1 结束（模拟构建失败）
+
+与 PyInstaller 一样，工作目录中已有上次构建且未指定 --clean 时回放 "warm" 录制（增量构建）。
+目标为共享运行时 spec（shared_bundle.py 生成）时只回放一次录制，按 spec 中的 EXE 列表生成产物：
+第一个 EXE 为完整大小，其余只包含各自特有的部分（大小的 1/16）。
+"""
+import os
+import sys
+import json
+import time
+import hashlib
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_TRACE = os.path.join(HERE, 'traces', 'tiny.json')
+# 这些选项后面跟一个参数值
+VALUE_OPTIONS = {
+    '--distpath', '--workpath', '--specpath', '-n', '--name', '--icon', '-i', '--version-file',
+    '--add-data', '--add-binary', '--hidden-import', '--paths', '-p', '--runtime-tmpdir',
+    '--upx-dir', '--log-level', '--exclude-module', '--collect-all', '--collect-submodules',
+}
+STAMP_FILE = 'fake-pyinstaller.stamp'
+BUNDLE_MARKER = '# pyexe-maker-bundle: '
+
+
+def parse_args(argv: list) -> dict:
+    """解析与构建产物相关的 PyInstaller 参数"""
+    options = {'flags': set(), 'values': {}, 'script': None}
+    i = 0
+    while i < len(argv):
+        arg = argv[i]
+        if arg.startswith('-') and '=' in arg:
+            key, value = arg.split('=', 1)
+            options['values'][key] = value
+        elif arg in VALUE_OPTIONS and i + 1 < len(argv):
+            options['values'][arg] = argv[i + 1]
+            i += 1
+        elif arg.startswith('-'):
+            options['flags'].add(arg)
+        else:
+            options['script'] = arg
+        i += 1
+    return options
+
+
+def write_artifact(path: str, size_kb: int, seed: bytes):
+    """写入内容只取决于脚本与参数的产物"""
+    block = hashlib.sha256(seed).digest() * 32
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'wb') as f:
+        for _ in range(size_kb):
+            f.write(block[:1024])
+
+
+def read_bundle(spec_path: str) -> list:
+    """从共享运行时 spec 的标记行读取 [[EXE 名称, 脚本路径, 是否 onedir], ...]"""
+    with open(spec_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.startswith(BUNDLE_MARKER):
+                return json.loads(line[len(BUNDLE_MARKER):])['exes']
+    return []
+
+
+def main(argv=None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    options = parse_args(argv)
+    script = options['script']
+    if not script:
+        print("ERROR: no script given", flush=True)
+        return 2
+
+    values = options['values']
+    exes = read_bundle(script) if script.endswith('.spec') else []
+    name = values.get('-n') or values.get('--name') or os.path.splitext(os.path.basename(script))[0]
+    distpath = os.path.abspath(values.get('--distpath', 'dist'))
+    workpath = os.path.abspath(values.get('--workpath', 'build'))
+    speed = float(os.environ.get('FAKE_PYINSTALLER_SPEED', '1'))
+    repeat = max(1, int(os.environ.get('FAKE_PYINSTALLER_REPEAT', '1')))
+    exe_kb = int(os.environ.get('FAKE_PYINSTALLER_EXE_KB', '1024'))
+    mem_mb = int(os.environ.get('FAKE_PYINSTALLER_MEM_MB', '0'))
+
+    with open(os.environ.get('FAKE_PYINSTALLER_TRACE', DEFAULT_TRACE), 'r', encoding='utf-8') as f:
+        trace = json.load(f)
+
+    stamp_path = os.path.join(workpath, name, STAMP_FILE)
+    warm = '--clean' not in options['flags'] and os.path.exists(stamp_path) and 'warm' in trace
+    recording = trace['warm' if warm else 'cold']
+    substitutions = {'{script}': script, '{script_dir}': os.path.dirname(os.path.abspath(script)),
+                     '{name}': name, '{distpath}': distpath, '{workpath}': workpath}
+
+    ballast = None
+    in_analysis = False
+    started = time.perf_counter()
+    for offset, line in recording['events']:
+        delay = started + offset * speed - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        for placeholder, value in substitutions.items():
+            line = line.replace(placeholder, value)
+        if 'checking ' in line:
+            in_analysis = 'checking Analysis' in line
+            if in_analysis and mem_mb and ballast is None:
+                ballast = bytearray(mem_mb * 1024 * 1024)
+                for i in range(0, len(ballast), 4096):
+                    ballast[i] = 1
+        for _ in range(repeat if in_analysis else 1):
+            print(line, flush=True)
+    ballast = None
+
+    if os.environ.get('FAKE_PYINSTALLER_FAIL') == '1':
+        print("ERROR: simulated build failure", flush=True)
+        return 1
+    if recording.get('exit_code', 0) != 0:
+        return recording['exit_code']
+
+    for index, (exe_name, exe_script, onedir) in enumerate(exes or [[name, script, '--onedir' in options['flags']]]):
+        # 只取决于脚本内容与名称（不含每次不同的临时工作目录）
+        seed = exe_name.encode('utf-8')
+        try:
+            with open(exe_script, 'rb') as f:
+                seed += f.read()
+        except OSError:
+            pass
+        size_kb = exe_kb if index == 0 else max(1, exe_kb // 16)
+        if onedir:
+            write_artifact(os.path.join(distpath, exe_name, exe_name + '.exe'), size_kb, seed)
+            os.makedirs(os.path.join(distpath, exe_name, '_internal'), exist_ok=True)
+        else:
+            write_artifact(os.path.join(distpath, exe_name + '.exe'), size_kb, seed)
+    os.makedirs(os.path.dirname(stamp_path), exist_ok=True)
+    with open(stamp_path, 'w') as f:
+        f.write(str(time.time()))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,220 @@
+"""
+主窗口在大量任务输出时的界面响应度基准测试（离屏运行，不需要显示器）。
+
+在 QT_QPA_PLATFORM=offscreen 下创建 MainWindow，添加 N 个脚本并点击“开始转换”；
+每个任务不启动 PyInstaller，而是在工作线程中以给定速率输出类似 PyInstaller 的日志行
+（经由与真实构建相同的 handle_output_line / 日志通道 / WorkerSignals 路径）。
+测量期间每秒切换一次“任务管理”与“日志”选项卡，使任务表与日志视图都参与重绘。
+
+报告事件循环卡顿（p50/p99/最大）、各视图绘制耗时、WorkerSignals 排队积压与日志通道积压。
+
+用法：
+    python benchmarks/gui_responsiveness.py --builds 8 --rate 200 --duration 5
+    python benchmarks/gui_responsiveness.py -o gui.json
+    python benchmarks/gui_responsiveness.py --compare gui.json
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import tempfile
+import argparse
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, os.path.join(ROOT, 'PythonEXE_Maker'))
+sys.path.insert(0, HERE)
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+os.environ['PYEXE_MAKER_PROFILE_UI'] = '1'
+
+import corpus  # noqa: E402
+from supervisor import ProcessResult, EXITED, CANCELLED  # noqa: E402
+from run_benchmarks import FAKE_PYINSTALLER, metric, compare, quote_command  # noqa: E402
+
+# 模拟输出按阶段循环使用的日志模板（与 PyInstaller 的标记一致，进度估计与阶段计时照常工作）
+PHASES = ('Analysis', 'PYZ', 'PKG', 'EXE')
+ANALYSIS_LINES = (
+    "{n} INFO: Analyzing hidden import 'module_{n}'",
+    "{n} INFO: Processing module hook 'hook-module_{n}.py' from '/site-packages/_pyinstaller_hooks'",
+    "{n} INFO: Processing pre-safe import module hook six.moves",
+    "{n} WARNING: Library not found: could not resolve 'libfake_{n}.so'",
+)
+
+
+def simulated_lines(count: int):
+    """生成 count 行模拟日志：前 80% 属于 Analysis，其余依次经过 PYZ / PKG / EXE"""
+    markers = {int(count * share): phase for share, phase in zip((0, 0.8, 0.87, 0.94), PHASES)}
+    phase = PHASES[0]
+    for n in range(count):
+        if n in markers:
+            phase = markers[n]
+            yield f"{n} INFO: checking {phase}"
+        elif phase == 'Analysis':
+            yield ANALYSIS_LINES[n % len(ANALYSIS_LINES)].format(n=n)
+        else:
+            yield f"{n} INFO: Building {phase} because {phase}-00.toc is non existent"
+
+
+def make_simulated_build(base, rate: float, duration: float):
+    """返回 ConvertRunnable 的子类：以 rate 行/秒输出 duration 秒后写出 EXE"""
+
+    class SimulatedBuild(base):
+        def start_pyinstaller(self, options: list, on_done, target: str = None, delay: float = 0.0) -> bool:
+            # 模拟输出在工作线程中同步产生，不交给异步构建引擎
+            return False
+
+        def run_pyinstaller(self, options: list, target: str = None) -> ProcessResult:
+            distpath = options[options.index('--distpath') + 1]
+            name = options[options.index('-n') + 1]
+            self.sampler.attach(os.getpid())
+            started = time.perf_counter()
+            sent = 0
+            lines = simulated_lines(max(1, int(rate * duration)))
+            for line in lines:
+                # 按计划时间批量补齐，避免 sleep 精度限制高速率
+                due = int((time.perf_counter() - started) * rate)
+                while sent >= due:
+                    time.sleep(0.005)
+                    due = int((time.perf_counter() - started) * rate)
+                if not self._is_running:
+                    return ProcessResult(CANCELLED)
+                self.handle_output_line(line)
+                sent += 1
+            with open(os.path.join(distpath, name + '.exe'), 'wb') as f:
+                f.write(b'MZ' + b'\0' * 1024)
+            return ProcessResult(EXITED, 0)
+
+    return SimulatedBuild
+
+
+def run(args) -> dict:
+    from PyQt5.QtCore import QTimer
+    from ui_probe import InstrumentedApplication
+
+    workdir = tempfile.mkdtemp(prefix='pyexe-gui-bench-')
+    # 日志写入临时数据目录；控制台日志会混入标准输出的 JSON，不输出
+    os.environ['PYEXE_MAKER_HOME'] = os.path.join(workdir, 'home')
+    import main as main_module
+    main_module.setup_logging(console=False)
+
+    # 工具链不做探测；调度器不因本机内存/负载推迟任务
+    os.environ['PYEXE_MAKER_PYINSTALLER'] = quote_command([sys.executable, FAKE_PYINSTALLER])
+    os.environ['PYEXE_MAKER_MAX_JOBS'] = str(args.builds)
+    os.environ['PYEXE_MAKER_MEM_PER_JOB_MB'] = '1'
+    os.environ['PYEXE_MAKER_MEM_RESERVE_MB'] = '1'
+    os.environ['PYEXE_MAKER_MAX_LOAD'] = '1000'
+    try:
+        app = InstrumentedApplication(sys.argv[:1])
+        main_module.ConvertRunnable = make_simulated_build(main_module.ConvertRunnable, args.rate, args.duration)
+        window = main_module.MainWindow()
+        window.resize(1300, 900)
+        window.show()
+
+        for script in corpus.many_scripts(os.path.join(workdir, 'corpus'), args.builds):
+            window.add_script_path(script)
+        window.output_edit.setText(os.path.join(workdir, 'dist'))
+        os.makedirs(os.path.join(workdir, 'dist'))
+        window.cache_checkbox.setChecked(False)
+        window.warm_checkbox.setChecked(False)
+        window.jobs_spin.setValue(args.builds)
+
+        # 每秒切换一次选项卡，并选中第一个任务以显示任务日志视图
+        def switch_tab():
+            window.tab_widget.setCurrentIndex(1 - window.tab_widget.currentIndex())
+            if not window.task_view.currentIndex().isValid():
+                window.task_view.selectRow(0)
+
+        tab_timer = QTimer()
+        tab_timer.setInterval(1000)
+        tab_timer.timeout.connect(switch_tab)
+
+        state = {'finished': 0}
+
+        def build_finished():
+            state['finished'] += 1
+            if state['finished'] == args.builds:
+                # 让最后一批日志显示完后再结束
+                QTimer.singleShot(200, app.quit)
+
+        started = time.perf_counter()
+        window.start_conversion()
+        for task in window.tasks:
+            task.signals.finished.connect(build_finished)
+        tab_timer.start()
+        QTimer.singleShot(int((args.duration * 4 + 30) * 1000), app.quit)
+        app.exec_()
+        wall = time.perf_counter() - started
+        tab_timer.stop()
+
+        report = window.ui_probe.report()
+        window.close()
+        window.thread_pool.waitForDone()
+    finally:
+        # 写完日志再删除临时数据目录
+        main_module.shared_backend().close()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    metrics = {
+        'builds_finished': metric(state['finished'], 'jobs', 'higher'),
+        'wall_s': metric(wall, 's'),
+        'lines_per_s': metric(state['finished'] * int(args.rate * args.duration) / wall, 'lines/s', 'higher'),
+        'stall_p50_ms': metric(report['stall_p50_ms'], 'ms'),
+        'stall_p99_ms': metric(report['stall_p99_ms'], 'ms'),
+        'stall_max_ms': metric(report['stall_max_ms'], 'ms'),
+        'signal_backlog_p99': metric(report['signal_backlog_p99'], 'signals'),
+        'signal_backlog_max': metric(report['signal_backlog_max'], 'signals'),
+        'log_queue_p99': metric(report['log_queue_p99'], 'lines'),
+        'log_queue_max': metric(report['log_queue_max'], 'lines'),
+    }
+    for view in ('task_view', 'log_view', 'task_log_view'):
+        if report.get(f'{view}_paints'):
+            metrics[f'{view}_paints'] = metric(report[f'{view}_paints'], 'paints', 'higher')
+            metrics[f'{view}_paint_p50_ms'] = metric(report[f'{view}_paint_p50_ms'], 'ms')
+            metrics[f'{view}_paint_p99_ms'] = metric(report[f'{view}_paint_p99_ms'], 'ms')
+    return metrics
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="PythonEXE Maker 主窗口响应度基准测试")
+    parser.add_argument('--builds', type=int, default=8, help="同时运行的模拟构建数")
+    parser.add_argument('--rate', type=float, default=200, help="每个构建每秒输出的日志行数")
+    parser.add_argument('--duration', type=float, default=5, help="每个构建输出日志的时长（秒）")
+    parser.add_argument('-o', '--output', help="结果 JSON 文件（默认输出到标准输出）")
+    parser.add_argument('--compare', help="与之前的结果 JSON 对比")
+    parser.add_argument('--threshold', type=float, default=0.2, help="判定退化的相对变化阈值")
+    args = parser.parse_args(argv)
+
+    report = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'builds': args.builds,
+            'rate': args.rate,
+            'duration': args.duration,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+        },
+        'scenarios': {'gui': run(args)},
+    }
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+    elif not args.compare:
+        print(text)
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        if regressions:
+            print(f"发现 {len(regressions)} 项退化: {', '.join(regressions)}", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,89 @@
+"""
+录制真实 PyInstaller 的日志流与时间间隔，供 fake_pyinstaller.py 回放。
+
+用法：python benchmarks/record_trace.py script.py traces/name.json
+
+依次录制一次完整构建（--clean，"cold"）和一次复用工作目录的增量构建（"warm"），
+输出中的脚本路径、名称与目录替换为占位符，回放时再代入实际参数。
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import argparse
+import subprocess
+
+
+def record(cmd: list, substitutions: dict) -> dict:
+    """运行一次命令，记录每行输出相对启动时刻的时间"""
+    events = []
+    started = time.perf_counter()
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                               universal_newlines=True)
+    for line in process.stdout:
+        line = line.rstrip('\n')
+        for value, placeholder in substitutions:
+            line = line.replace(value, placeholder)
+        events.append([round(time.perf_counter() - started, 4), line])
+    process.wait()
+    return {'exit_code': process.returncode, 'duration_s': round(time.perf_counter() - started, 3),
+            'events': events}
+
+
+def format_trace(trace: dict) -> str:
+    """每个事件占一行的 JSON，便于对比不同版本的录制"""
+    parts = [f'{{\n "recorded_with": {json.dumps(trace["recorded_with"])}']
+    for key in ('cold', 'warm'):
+        recording = trace[key]
+        events = ',\n'.join('   ' + json.dumps(event, ensure_ascii=False) for event in recording['events'])
+        parts.append(
+            f' "{key}": {{\n  "exit_code": {recording["exit_code"]},\n'
+            f'  "duration_s": {recording["duration_s"]},\n  "events": [\n{events}\n  ]\n }}'
+        )
+    return ',\n'.join(parts) + '\n}\n'
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="录制 PyInstaller 构建日志")
+    parser.add_argument('script', help="用于录制的 Python 脚本")
+    parser.add_argument('output', help="输出的录制文件（JSON）")
+    parser.add_argument('--python', default=sys.executable, help="运行 PyInstaller 的解释器")
+    args = parser.parse_args(argv)
+
+    script = os.path.abspath(args.script)
+    # 使用不会与路径片段冲突的名称，便于替换为占位符
+    name = 'pyexe_trace_app'
+    root = tempfile.mkdtemp(prefix='pyexe-trace-')
+    workpath = os.path.join(root, 'build')
+    distpath = os.path.join(root, 'dist')
+    base_cmd = [args.python, '-m', 'PyInstaller', '--onefile', '--workpath', workpath,
+                '--specpath', workpath, '--distpath', distpath, '-n', name, script]
+    # 先替换较长的路径，避免目录名是其他路径前缀时替换错位
+    substitutions = sorted(
+        [(script, '{script}'), (workpath, '{workpath}'), (distpath, '{distpath}'), (name, '{name}'),
+         (os.path.dirname(script), '{script_dir}')],
+        key=lambda item: -len(item[0])
+    )
+    try:
+        trace = {
+            'recorded_with': subprocess.run(
+                [args.python, '-c', 'import PyInstaller, sys; print(PyInstaller.__version__, sys.version.split()[0])'],
+                stdout=subprocess.PIPE, universal_newlines=True
+            ).stdout.strip(),
+            'cold': record(base_cmd[:3] + ['--clean'] + base_cmd[3:], substitutions),
+            'warm': record(base_cmd, substitutions),
+        }
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        f.write(format_trace(trace))
+    print(f"cold {trace['cold']['duration_s']}s / warm {trace['warm']['duration_s']}s -> {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,289 @@
+"""
+转换引擎的端到端基准测试。
+
+场景：
+    cold_warm   tiny / heavy 脚本的冷构建、增量（热）构建与缓存命中耗时及峰值内存
+    throughput  同一目录下大量脚本在不同并行度下的批次吞吐量
+    pipeline    调度器 + 日志通道在大量输出下的表现（仅 fake 引擎，数秒内完成）
+
+默认使用 fake_pyinstaller.py 按录制的日志与时间回放（--engine real 使用真实 PyInstaller）。
+结果写入 JSON，可用 --compare 与之前的结果对比，出现超过阈值的退化时退出码为 1。
+
+用法：
+    python benchmarks/run_benchmarks.py -o bench.json
+    python benchmarks/run_benchmarks.py --compare bench.json
+    python benchmarks/run_benchmarks.py --engine real --scripts 4 --parallelism 1,2
+"""
+import os
+import sys
+import json
+import time
+import shlex
+import shutil
+import platform
+import tempfile
+import argparse
+import subprocess
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, os.path.join(ROOT, 'PythonEXE_Maker'))
+sys.path.insert(0, HERE)
+
+import corpus  # noqa: E402
+from headless import load_manifest, run_batch  # noqa: E402
+from toolchain import ToolchainService  # noqa: E402
+from build_history import BuildHistory  # noqa: E402
+
+FAKE_PYINSTALLER = os.path.join(HERE, 'fake_pyinstaller.py')
+TRACES = {'tiny': 'tiny.json', 'heavy': 'heavy.json', 'many': 'tiny.json'}
+SCENARIOS = ('cold_warm', 'throughput', 'pipeline')
+# 对比时低于该绝对变化量的差异视为噪声（按单位）
+NOISE_FLOOR = {'s': 0.05, 'ms': 20.0, 'MB': 5.0}
+
+
+def metric(value, unit: str, better: str = 'lower') -> dict:
+    """一个可比较的指标；better 为 'lower' 或 'higher'"""
+    return {'value': round(value, 4) if isinstance(value, float) else value, 'unit': unit, 'better': better}
+
+
+def quote_command(args: list) -> str:
+    return subprocess.list2cmdline(args) if os.name == 'nt' else ' '.join(shlex.quote(a) for a in args)
+
+
+class Bench:
+    """一次基准测试运行的公共环境：隔离的数据目录、引擎配置与语料目录"""
+
+    def __init__(self, engine: str, speed: float, workdir: str):
+        self.engine = engine
+        self.speed = speed
+        self.workdir = workdir
+        self.corpus_dir = os.path.join(workdir, 'corpus')
+        if engine == 'fake':
+            os.environ['PYEXE_MAKER_PYINSTALLER'] = quote_command([sys.executable, FAKE_PYINSTALLER])
+            os.environ['FAKE_PYINSTALLER_SPEED'] = str(speed)
+        else:
+            os.environ.pop('PYEXE_MAKER_PYINSTALLER', None)
+        self.toolchain = ToolchainService(use_disk_cache=False, auto_install=False)
+
+    def fresh_home(self, name: str) -> str:
+        """为一个场景准备全新的数据目录（缓存、增量目录、历史互不影响）"""
+        home = os.path.join(self.workdir, 'home', name)
+        shutil.rmtree(home, ignore_errors=True)
+        os.makedirs(home)
+        os.environ['PYEXE_MAKER_HOME'] = home
+        return home
+
+    def use_trace(self, kind: str):
+        os.environ['FAKE_PYINSTALLER_TRACE'] = os.path.join(HERE, 'traces', TRACES[kind])
+
+    def build(self, scripts: list, parallelism: int = 1, use_cache: bool = False, incremental: bool = True):
+        """通过 headless.run_batch（即 ConvertRunnable）构建，返回 (结果列表, 墙钟时间, 历史记录)"""
+        history = BuildHistory()
+        jobs = load_manifest({
+            'defaults': {'convert_mode': 'console', 'output_dir': os.path.join(self.workdir, 'dist')},
+            'scripts': scripts,
+        })
+        started = time.perf_counter()
+        results = run_batch(jobs, parallelism=parallelism, use_cache=use_cache, incremental=incremental,
+                            toolchain=self.toolchain, history=history)
+        wall = time.perf_counter() - started
+        records = [history.builds(job['script_path'], limit=1)[-1] for job in jobs]
+        history.close()
+        return results, wall, records
+
+
+def peak_mb(records: list):
+    values = [r['peak_rss_kb'] for r in records if r['peak_rss_kb'] is not None]
+    return max(values) / 1024 if values else None
+
+
+def scenario_cold_warm(bench: Bench, args) -> dict:
+    """冷构建（--clean）、增量构建与缓存命中"""
+    metrics = {}
+    for kind in ('tiny', 'heavy'):
+        bench.fresh_home(f'cold_warm_{kind}')
+        bench.use_trace(kind)
+        script = getattr(corpus, f'{kind}_script')(bench.corpus_dir)
+        _, cold, cold_records = bench.build([script])
+        _, warm, warm_records = bench.build([script])
+        # 第一次启用缓存的构建写入缓存，第二次命中
+        stored, _, _ = bench.build([script], use_cache=True)
+        hit_results, cached, _ = bench.build([script], use_cache=True)
+        metrics[f'{kind}_cold_s'] = metric(cold, 's')
+        metrics[f'{kind}_warm_s'] = metric(warm, 's')
+        metrics[f'{kind}_cached_s'] = metric(cached, 's')
+        metrics[f'{kind}_warm_speedup'] = metric(cold / warm if warm else 0.0, 'x', 'higher')
+        if peak_mb(cold_records) is not None:
+            metrics[f'{kind}_cold_peak_rss_mb'] = metric(peak_mb(cold_records), 'MB')
+        metrics[f'{kind}_cache_hit'] = metric(int(hit_results[0]['cached']), 'bool', 'higher')
+        metrics[f'{kind}_success'] = metric(int(stored[0]['success']), 'bool', 'higher')
+    return metrics
+
+
+def scenario_throughput(bench: Bench, args) -> dict:
+    """同一目录下 N 个脚本在不同并行度下的完整构建吞吐量"""
+    metrics = {}
+    bench.use_trace('many')
+    scripts = corpus.many_scripts(bench.corpus_dir, args.scripts)
+    for parallelism in args.parallelism:
+        bench.fresh_home(f'throughput_{parallelism}')
+        results, wall, records = bench.build(scripts, parallelism=parallelism, incremental=False)
+        cpu = [r['cpu_s'] for r in records if r['cpu_s'] is not None]
+        metrics[f'p{parallelism}_wall_s'] = metric(wall, 's')
+        metrics[f'p{parallelism}_scripts_per_min'] = metric(len(scripts) / wall * 60, 'scripts/min', 'higher')
+        metrics[f'p{parallelism}_succeeded'] = metric(sum(r['success'] for r in results), 'scripts', 'higher')
+        if cpu:
+            metrics[f'p{parallelism}_cpu_s_per_build'] = metric(sum(cpu) / len(cpu), 's')
+        if peak_mb(records) is not None:
+            metrics[f'p{parallelism}_max_peak_rss_mb'] = metric(peak_mb(records), 'MB')
+    return metrics
+
+
+def scenario_pipeline(bench: Bench, args) -> dict:
+    """调度器 + 日志通道：大量任务与输出时的吞吐、积压与事件循环延迟"""
+    if bench.engine != 'fake':
+        return {}
+    from PyQt5.QtCore import QCoreApplication, QThreadPool, QTimer
+    from converters import ConvertRunnable
+    from scheduler import BuildScheduler
+    from log_pipeline import LogPipeline
+    from log_views import LogStore
+    from build_events import EventBus
+
+    bench.fresh_home('pipeline')
+    bench.use_trace('many')
+    os.environ['FAKE_PYINSTALLER_REPEAT'] = str(args.repeat)
+    scripts = corpus.many_scripts(bench.corpus_dir, args.scripts)
+    app = QCoreApplication.instance() or QCoreApplication([])
+
+    pool = QThreadPool()
+    scheduler = BuildScheduler(pool, max_jobs=max(args.parallelism))
+    pipeline = LogPipeline()
+    events = EventBus()
+    events.subscribe(pipeline)
+    store = LogStore()
+    state = {'done': 0, 'max_queued': 0, 'lags': [], 'last_tick': None}
+
+    def drain():
+        now = time.perf_counter()
+        if state['last_tick'] is not None:
+            state['lags'].append(max(0.0, now - state['last_tick'] - 0.05))
+        state['last_tick'] = now
+        state['max_queued'] = max(state['max_queued'], pipeline.queued)
+        pipeline.drain(sink=lambda chunk: store.extend(
+            [(event.task, event.message, event.level) for event in chunk]))
+        if state['done'] == len(scripts) and not pipeline.queued:
+            app.quit()
+
+    def finished():
+        state['done'] += 1
+
+    timer = QTimer()
+    timer.setInterval(50)
+    timer.timeout.connect(drain)
+
+    started = time.perf_counter()
+    for script in scripts:
+        runnable = ConvertRunnable(script, "命令行模式", os.path.join(bench.workdir, 'dist'), None, None,
+                                   None, '', None, None, toolchain=bench.toolchain, events=events)
+        runnable.signals.finished.connect(finished)
+        scheduler.submit(runnable)
+    timer.start()
+    app.exec_()
+    wall = time.perf_counter() - started
+    timer.stop()
+    pool.waitForDone()
+    os.environ.pop('FAKE_PYINSTALLER_REPEAT', None)
+
+    lags = sorted(state['lags']) or [0.0]
+    lines = len(store)
+    store.close()
+    return {
+        'jobs': metric(len(scripts), 'jobs', 'higher'),
+        'wall_s': metric(wall, 's'),
+        'log_lines': metric(lines, 'lines', 'higher'),
+        'lines_per_s': metric(lines / wall, 'lines/s', 'higher'),
+        'dropped_lines': metric(pipeline.dropped, 'lines'),
+        'max_queued_lines': metric(state['max_queued'], 'lines'),
+        'timer_lag_p95_ms': metric(lags[int(len(lags) * 0.95)] * 1000, 'ms'),
+        'timer_lag_max_ms': metric(lags[-1] * 1000, 'ms'),
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list:
+    """返回退化超过 threshold（比例）的指标描述"""
+    regressions = []
+    for scenario, metrics in current['scenarios'].items():
+        for name, entry in metrics.items():
+            old = baseline.get('scenarios', {}).get(scenario, {}).get(name)
+            if not old or not old['value'] or entry['value'] is None:
+                continue
+            ratio = entry['value'] / old['value']
+            worse = ratio > 1 + threshold if entry['better'] == 'lower' else ratio < 1 - threshold
+            if abs(entry['value'] - old['value']) < NOISE_FLOOR.get(entry['unit'], 0):
+                worse = False
+            marker = "  <-- 退化" if worse else ""
+            print(f"{scenario}.{name}: {old['value']} -> {entry['value']} {entry['unit']} ({ratio:.2f}x){marker}")
+            if worse:
+                regressions.append(f"{scenario}.{name}")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="PythonEXE Maker 转换引擎基准测试")
+    parser.add_argument('--engine', choices=('fake', 'real'), default='fake', help="PyInstaller 替身或真实 PyInstaller")
+    parser.add_argument('--speed', type=float, default=0.05,
+                        help="fake 引擎的回放时间倍率（默认 0.05 即 20 倍速，1 为录制时的真实速度）")
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS), help="要运行的场景，逗号分隔")
+    parser.add_argument('--scripts', type=int, default=16, help="throughput / pipeline 场景的脚本数")
+    parser.add_argument('--parallelism', default='1,2,4', help="throughput 场景的并行度列表")
+    parser.add_argument('--repeat', type=int, default=50, help="pipeline 场景中 Analysis 日志的重复倍数")
+    parser.add_argument('-o', '--output', help="结果 JSON 文件（默认输出到标准输出）")
+    parser.add_argument('--compare', help="与之前的结果 JSON 对比")
+    parser.add_argument('--threshold', type=float, default=0.2, help="判定退化的相对变化阈值")
+    parser.add_argument('--keep', action='store_true', help="保留临时工作目录")
+    args = parser.parse_args(argv)
+    args.parallelism = [int(p) for p in args.parallelism.split(',') if p]
+
+    workdir = tempfile.mkdtemp(prefix='pyexe-bench-')
+    report = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'engine': args.engine,
+            'speed': args.speed if args.engine == 'fake' else None,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+        },
+        'scenarios': {},
+    }
+    try:
+        bench = Bench(args.engine, args.speed, workdir)
+        for name in args.scenarios.split(','):
+            started = time.perf_counter()
+            print(f"运行场景 {name} ...", file=sys.stderr)
+            report['scenarios'][name] = globals()[f'scenario_{name}'](bench, args)
+            print(f"场景 {name} 完成，用时 {time.perf_counter() - started:.1f}s", file=sys.stderr)
+    finally:
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+    elif not args.compare:
+        print(text)
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        if regressions:
+            print(f"发现 {len(regressions)} 项退化: {', '.join(regressions)}", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,16 @@
+import os
+import sys
+
+import pytest
+
+# 各模块以扁平方式相互导入（from converters import ...）
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'PythonEXE_Maker'))
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+
+@pytest.fixture(autouse=True)
+def app_home(tmp_path, monkeypatch):
+    """每个测试使用独立的数据目录，不读写用户的缓存与历史"""
+    home = tmp_path / 'home'
+    monkeypatch.setenv('PYEXE_MAKER_HOME', str(home))
+    return home
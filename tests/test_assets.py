@@ -0,0 +1,38 @@
+import assets
+from assets import AssetCache
+
+
+def make_cache(tmp_path, monkeypatch):
+    rendered = []
+
+    def render(exe_name, file_version, copyright_info):
+        rendered.append(exe_name)
+        return f"# {exe_name} {file_version} {copyright_info}\n"
+
+    monkeypatch.setattr(assets, 'render_version_info', render)
+    monkeypatch.setattr(assets, 'renderer_version', lambda: '6.0')
+    return AssetCache(cache_dir=str(tmp_path / 'assets')), rendered
+
+
+def test_version_file_reused(tmp_path, monkeypatch):
+    cache, rendered = make_cache(tmp_path, monkeypatch)
+    first = cache.version_file('app', '1.2.3.4', 'ACME', toolchain_id='py|6.0')
+    assert cache.version_file('app', '1.2.3.4', 'ACME', toolchain_id='py|6.0') == first
+    assert rendered == ['app']
+
+
+def test_version_file_key_includes_toolchain(tmp_path, monkeypatch):
+    cache, rendered = make_cache(tmp_path, monkeypatch)
+    first = cache.version_file('app', '1.2.3.4', 'ACME', toolchain_id='py|6.0')
+    assert cache.version_file('app', '1.2.3.4', 'ACME', toolchain_id='py|6.1') != first
+    monkeypatch.setattr(assets, 'renderer_version', lambda: '6.1')
+    assert cache.version_file('app', '1.2.3.4', 'ACME', toolchain_id='py|6.0') != first
+    assert len(rendered) == 3
+
+
+def test_prepare_batch_dedupes_exe_names(tmp_path, monkeypatch):
+    cache, rendered = make_cache(tmp_path, monkeypatch)
+    batch = cache.prepare_batch(['a', 'b', 'a'], file_version='1.0.0.0', toolchain_id='py|6.0')
+    assert rendered == ['a', 'b']
+    assert batch.version_file_for('a') and batch.version_file_for('b')
+    assert batch.version_file_for('c') == ''
@@ -0,0 +1,42 @@
+import sys
+import threading
+
+from async_engine import AsyncBuildEngine
+from supervisor import EXITED
+
+
+def test_slow_finish_callbacks_run_concurrently():
+    """收尾回调较慢时，各构建的收尾同时进行（线程数不少于并行数）"""
+    engine = AsyncBuildEngine(finish_workers=4)
+    barrier = threading.Barrier(4, timeout=10)
+    results = []
+    done = threading.Event()
+
+    def on_exit(result):
+        # 4 个收尾回调必须同时处于运行中才能通过屏障
+        barrier.wait()
+        results.append(result)
+        if len(results) == 4:
+            done.set()
+
+    try:
+        for _ in range(4):
+            engine.submit([sys.executable, '-c', 'print(1)'], lambda line: None, on_exit)
+        assert done.wait(15)
+        assert all(result.reason == EXITED and result.returncode == 0 for result in results)
+    finally:
+        engine.shutdown()
+
+
+def test_ensure_finish_workers_grows_pool():
+    engine = AsyncBuildEngine(finish_workers=2)
+    try:
+        engine.ensure_finish_workers(1)
+        assert engine.finish_workers == 2
+        engine.ensure_finish_workers(6)
+        assert engine.finish_workers == 6
+        done = threading.Event()
+        engine.submit([sys.executable, '-c', 'pass'], lambda line: None, lambda result: done.set())
+        assert done.wait(15)
+    finally:
+        engine.shutdown()
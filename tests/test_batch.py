@@ -0,0 +1,204 @@
+import json
+import os
+import sys
+import threading
+
+import pytest
+
+from batch import (
+    BuildBatch, DependencyError, QUEUED, RUNNING, SUCCEEDED, FAILED, CANCELLED, CACHED
+)
+from build_events import BuildEvent, EventBus, STATUS, RESULT
+from headless import ManifestError, load_manifest, run_batch
+
+FAKE_PYINSTALLER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                'benchmarks', 'fake_pyinstaller.py')
+
+
+def result(task, state):
+    return BuildEvent(task, RESULT, state, metrics={'state': state, 'success': state in (SUCCEEDED, CACHED)})
+
+
+@pytest.fixture
+def bus():
+    return EventBus()
+
+
+def test_states_follow_events(bus):
+    batch = BuildBatch(['a', 'b'], events=bus)
+    batch.attach()
+    assert batch.states == {'a': QUEUED, 'b': QUEUED}
+    bus.publish(BuildEvent('a', STATUS, "开始转换..."))
+    assert batch.states['a'] == RUNNING
+    bus.publish(result('a', CACHED))
+    assert not batch.complete
+    # 不属于本批次的事件被忽略
+    bus.publish(result('other', FAILED))
+    bus.publish(BuildEvent('b', RESULT, "失败", metrics={'success': False}))
+    assert batch.complete
+    assert batch.wait(0) == {QUEUED: 0, RUNNING: 0, SUCCEEDED: 0, FAILED: 1, CANCELLED: 0, CACHED: 1}
+    assert batch.future('a').result(0) == CACHED
+    assert batch.summary_text() == "成功 1/2（缓存 1），失败 1"
+
+
+def test_terminal_state_is_final_and_completion_reported_once(bus):
+    batch = BuildBatch(['a'], events=bus)
+    completions = []
+    batch.done.add_done_callback(completions.append)
+    batch.attach()
+    bus.publish(result('a', SUCCEEDED))
+    bus.publish(result('a', FAILED))
+    assert not batch.finish('a', CANCELLED)
+    assert batch.states['a'] == SUCCEEDED
+    assert batch.finished_count == 1
+    assert len(completions) == 1
+    # 完成后不再订阅事件总线
+    assert batch not in bus._subscribers
+
+
+def test_empty_batch_completes_on_attach(bus):
+    batch = BuildBatch(events=bus)
+    batch.attach()
+    assert batch.wait(0)[SUCCEEDED] == 0
+
+
+def test_dependants_submitted_after_dependencies_succeed(bus):
+    batch = BuildBatch(events=bus)
+    batch.add('lib')
+    batch.add('app', depends_on=['lib'])
+    batch.attach()
+    submitted = []
+    batch.when_ready('lib', lambda: submitted.append('lib'))
+    batch.when_ready('app', lambda: submitted.append('app'))
+    assert submitted == ['lib']
+    bus.publish(result('lib', SUCCEEDED))
+    assert submitted == ['lib', 'app']
+    bus.publish(result('app', SUCCEEDED))
+    assert batch.complete
+
+
+def test_failed_dependency_cancels_dependants_transitively(bus):
+    batch = BuildBatch(events=bus)
+    batch.add('a')
+    batch.add('b', depends_on=['a'])
+    batch.add('c', depends_on=['b', 'a'])
+    batch.attach()
+    submitted = []
+    for key in ('a', 'b', 'c'):
+        batch.when_ready(key, lambda key=key: submitted.append(key))
+    bus.publish(result('a', FAILED))
+    assert submitted == ['a']
+    assert batch.states == {'a': FAILED, 'b': CANCELLED, 'c': CANCELLED}
+    assert 'a' in batch.reasons['b']
+    assert batch.complete
+    assert batch.summary_text() == "成功 0/3，失败 1，取消 2"
+
+
+def test_concurrent_dependency_failures_publish_one_result(bus):
+    published = []
+    bus.subscribe(lambda event: published.append(event) if event.task == 'c' else None)
+    batch = BuildBatch(events=bus)
+    batch.add('a')
+    batch.add('b')
+    batch.add('c', depends_on=['a', 'b'])
+    batch.attach()
+    # 两个依赖在不同线程中同时失败
+    barrier = threading.Barrier(2)
+
+    def fail(key):
+        barrier.wait()
+        batch.skip('c', f"依赖 {key} 未成功构建，已跳过。")
+
+    threads = [threading.Thread(target=fail, args=(key,)) for key in ('a', 'b')]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert [event.kind for event in published] == [RESULT]
+    assert batch.states['c'] == CANCELLED
+    assert batch.counts[CANCELLED] == 1
+    assert batch.future('c').result(0) == CANCELLED
+
+@pytest.mark.parametrize('dependencies, message', [
+    ({'a': ['b'], 'b': ['a']}, "循环依赖"),
+    ({'a': ['a2'], 'a2': ['a3'], 'a3': ['a']}, "循环依赖"),
+    ({'a': ['missing']}, "不在本批次中"),
+])
+def test_invalid_dependencies(dependencies, message):
+    batch = BuildBatch()
+    for key in sorted(set(dependencies) - {'missing'}):
+        batch.add(key, dependencies.get(key, ()))
+    with pytest.raises(DependencyError, match=message):
+        batch.check_dependencies()
+
+
+def write_manifest(tmp_path, scripts):
+    tools = tmp_path / 'tools'
+    tools.mkdir(exist_ok=True)
+    for name in ('a.py', 'b.py', 'c.py'):
+        (tools / name).write_text("print('hi')\n", encoding='utf-8')
+    (tools / 'bad.py').write_text("import nonexistent_mod_xyz\n", encoding='utf-8')
+    manifest = tmp_path / 'manifest.json'
+    manifest.write_text(json.dumps({'defaults': {'convert_mode': 'console', 'output_dir': 'dist'},
+                                    'scripts': scripts}), encoding='utf-8')
+    return str(manifest)
+
+
+def test_manifest_resolves_depends_on(tmp_path):
+    jobs = load_manifest(write_manifest(tmp_path, [
+        'tools/a.py', {'path': 'tools/b.py', 'depends_on': 'tools/a.py'},
+    ]))
+    assert jobs[0]['depends_on'] == []
+    assert jobs[1]['depends_on'] == [str(tmp_path / 'tools' / 'a.py')]
+
+
+@pytest.mark.parametrize('scripts, message', [
+    ([{'path': 'tools/a.py', 'depends_on': 'tools/b.py'}, {'path': 'tools/b.py', 'depends_on': ['tools/a.py']}],
+     "循环依赖"),
+    ([{'path': 'tools/a.py', 'depends_on': 'tools/zz.py'}], "不在本批次中"),
+    (['tools/a.py', 'tools/./a.py'], "重复"),
+])
+def test_manifest_rejects_invalid_dependencies(tmp_path, scripts, message):
+    with pytest.raises(ManifestError, match=message):
+        load_manifest(write_manifest(tmp_path, scripts))
+
+
+def test_run_batch_final_states(tmp_path, monkeypatch):
+    monkeypatch.setenv('PYEXE_MAKER_PYINSTALLER', f'"{sys.executable}" "{FAKE_PYINSTALLER}"')
+    monkeypatch.setenv('FAKE_PYINSTALLER_SPEED', '0.01')
+    jobs = load_manifest(write_manifest(tmp_path, [
+        'tools/a.py',
+        {'path': 'tools/b.py', 'depends_on': 'tools/a.py'},
+        'tools/bad.py',
+        {'path': 'tools/c.py', 'depends_on': ['tools/bad.py']},
+    ]))
+    results = {os.path.basename(r['script']): r for r in run_batch(jobs, parallelism=2, use_cache=False)}
+    assert {name: r['state'] for name, r in results.items()} == {
+        'a.py': SUCCEEDED, 'b.py': SUCCEEDED, 'bad.py': FAILED, 'c.py': CANCELLED,
+    }
+    assert results['c.py']['error'] == "依赖 bad.py 未成功构建，已跳过。"
+    assert results['bad.py']['preflight_errors']
+
+
+def test_run_batch_releases_slot_when_convert_raises(tmp_path, monkeypatch):
+    from converters import ConvertRunnable
+    monkeypatch.setenv('PYEXE_MAKER_PYINSTALLER', f'"{sys.executable}" "{FAKE_PYINSTALLER}"')
+    monkeypatch.setenv('FAKE_PYINSTALLER_SPEED', '0.01')
+    original_run = ConvertRunnable.run
+
+    def run(self):
+        if os.path.basename(self.script_path) == 'a.py':
+            raise RuntimeError("boom")
+        original_run(self)
+
+    monkeypatch.setattr(ConvertRunnable, 'run', run)
+    jobs = load_manifest(write_manifest(tmp_path, ['tools/a.py', 'tools/b.py']))
+    # 只有一个名额：异常没有归还名额时第二个任务会永远等待
+    results = {}
+    worker = threading.Thread(target=lambda: results.update(
+        (os.path.basename(r['script']), r) for r in run_batch(jobs, parallelism=1, use_cache=False)))
+    worker.start()
+    worker.join(60)
+    assert not worker.is_alive()
+    assert (results['a.py']['state'], results['b.py']['state']) == (FAILED, SUCCEEDED)
+    assert "boom" in results['a.py']['error']
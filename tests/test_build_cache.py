@@ -0,0 +1,115 @@
+import os
+import time
+
+import pytest
+
+from build_cache import BuildCache
+
+
+@pytest.fixture
+def project(tmp_path):
+    root = tmp_path / 'project'
+    root.mkdir()
+    (root / 'app.py').write_text("import helper\nprint(helper.VALUE)\n", encoding='utf-8')
+    (root / 'helper.py').write_text("VALUE = 1\n", encoding='utf-8')
+    return root
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return BuildCache(cache_dir=str(tmp_path / 'cache'), max_bytes=10 * 1024)
+
+
+def key_of(cache, project, options=('--onefile',), toolchain_id='py|6.0', **kwargs):
+    return cache.compute_key(str(project / 'app.py'), list(options), toolchain_id=toolchain_id, **kwargs)
+
+
+def test_key_is_stable(cache, project):
+    assert key_of(cache, project) == key_of(cache, project)
+
+
+def test_key_ignores_distpath(cache, project):
+    assert (key_of(cache, project, ['--onefile', '--distpath', '/a'])
+            == key_of(cache, project, ['--onefile', '--distpath', '/b']))
+
+
+@pytest.mark.parametrize('change', ['script', 'local_import', 'options', 'toolchain', 'version_info'])
+def test_key_invalidation(cache, project, change):
+    before = key_of(cache, project)
+    kwargs = {}
+    if change == 'script':
+        (project / 'app.py').write_text("import helper\nprint(helper.VALUE, 2)\n", encoding='utf-8')
+    elif change == 'local_import':
+        (project / 'helper.py').write_text("VALUE = 2\n", encoding='utf-8')
+    elif change == 'options':
+        kwargs['options'] = ['--onedir']
+    elif change == 'toolchain':
+        kwargs['toolchain_id'] = 'py|6.1'
+    else:
+        kwargs['version_info'] = ('1.0.0.0', 'ACME')
+    assert key_of(cache, project, **kwargs) != before
+
+
+def make_artifact(tmp_path, name: str, size: int) -> str:
+    path = tmp_path / name
+    path.write_bytes(b'x' * size)
+    return str(path)
+
+
+def test_store_and_restore_file(cache, tmp_path):
+    cache.store('a' * 64, make_artifact(tmp_path, 'a.exe', 100))
+    dest = tmp_path / 'out' / 'a.exe'
+    assert cache.restore('a' * 64, str(dest))
+    assert dest.read_bytes() == b'x' * 100
+    assert not cache.restore('b' * 64, str(tmp_path / 'out' / 'b.exe'))
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_store_and_restore_directory_replaces_old_tree(cache, tmp_path):
+    artifact = tmp_path / 'dist' / 'app'
+    (artifact / '_internal').mkdir(parents=True)
+    (artifact / 'app.exe').write_bytes(b'new')
+    (artifact / '_internal' / 'lib.so').write_bytes(b'lib')
+    cache.store('c' * 64, str(artifact))
+    dest = tmp_path / 'out' / 'app'
+    dest.mkdir(parents=True)
+    (dest / 'stale.txt').write_text('old')
+    assert cache.restore('c' * 64, str(dest))
+    assert sorted(os.listdir(dest)) == ['_internal', 'app.exe']
+    assert (dest / '_internal' / 'lib.so').read_bytes() == b'lib'
+    # 不在目标目录旁留下临时文件
+    assert os.listdir(tmp_path / 'out') == ['app']
+
+
+def test_lru_eviction(cache, tmp_path):
+    keys = [c * 64 for c in 'abc']
+    for i, key in enumerate(keys[:2]):
+        cache.store(key, make_artifact(tmp_path, f'{i}.exe', 4 * 1024))
+        time.sleep(0.01)
+    # 使用过的 a 比 b 新，超出上限时先淘汰 b
+    assert cache.restore(keys[0], str(tmp_path / 'out' / '0.exe'))
+    time.sleep(0.01)
+    cache.store(keys[2], make_artifact(tmp_path, '2.exe', 4 * 1024))
+    assert set(cache._entries) == {keys[0], keys[2]}
+    assert not os.path.exists(cache._entry_dir(keys[1]))
+    # 索引持久化后仍然一致
+    assert set(BuildCache(cache_dir=cache.cache_dir, max_bytes=cache.max_bytes)._entries) == {keys[0], keys[2]}
+
+
+def test_pinned_entry_not_evicted(cache, tmp_path):
+    cache.store('a' * 64, make_artifact(tmp_path, 'a.exe', 8 * 1024))
+    cache._pins['a' * 64] = 1
+    cache.store('b' * 64, make_artifact(tmp_path, 'b.exe', 8 * 1024))
+    assert os.path.exists(os.path.join(cache._entry_dir('a' * 64), 'a.exe'))
+    del cache._pins['a' * 64]
+    cache.clear()
+    assert cache._entries == {}
+
+
+def test_store_same_key_twice_keeps_entry(cache, tmp_path):
+    artifact = make_artifact(tmp_path, 'a.exe', 100)
+    cache.store('a' * 64, artifact)
+    cache.store('a' * 64, artifact)
+    entry_dir = cache._entry_dir('a' * 64)
+    assert os.listdir(entry_dir) == ['a.exe']
+    assert [name for name in os.listdir(os.path.dirname(entry_dir)) if '.tmp-' in name] == []
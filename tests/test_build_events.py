@@ -0,0 +1,67 @@
+import pytest
+
+from build_events import (
+    BuildEvent, EventBus, EventMetrics, load_events, detect_level, STATUS, OUTPUT, PHASE, PROGRESS, RESULT,
+    LEVEL_INFO, LEVEL_WARNING, LEVEL_ERROR
+)
+
+
+def test_ndjson_round_trip(tmp_path):
+    events = [
+        BuildEvent('/src/a.py', STATUS, "开始转换...", ts=1.5),
+        BuildEvent('/src/a.py', OUTPUT, "123 WARNING: lib not found", LEVEL_WARNING, phase='analysis', ts=2.25),
+        BuildEvent('/src/a.py', PHASE, phase='pyz', metrics={'modules': 42}, ts=3.0),
+        BuildEvent('/src/a.py', RESULT, "失败  1.0s  x", LEVEL_ERROR,
+                   metrics={'state': 'failed', 'success': False, 'phases': {'analysis': 0.5}}, ts=4.125),
+    ]
+    path = tmp_path / 'events.ndjson'
+    path.write_text('\n'.join(event.to_json() for event in events) + '\n{not json\n', encoding='utf-8')
+    loaded = load_events(str(path))
+    assert [event.to_dict() for event in loaded] == [event.to_dict() for event in events]
+    assert [(e.task, e.kind, e.phase, e.level, e.message, e.metrics, e.ts) for e in loaded] == \
+        [(e.task, e.kind, e.phase, e.level, e.message, e.metrics, e.ts) for e in events]
+
+
+@pytest.mark.parametrize('line, level', [
+    ("1234 INFO: PyInstaller: 6.0", LEVEL_INFO),
+    ("1234 WARNING: Hidden import not found", LEVEL_WARNING),
+    ("ERROR: Script file does not exist", LEVEL_ERROR),
+])
+def test_detect_level(line, level):
+    assert detect_level(line) == level
+
+
+def test_bus_isolates_failing_subscribers():
+    bus = EventBus()
+    received = []
+
+    def broken(event):
+        raise RuntimeError("boom")
+
+    bus.subscribe(broken)
+    bus.subscribe(received.append)
+    bus.subscribe(received.append)
+    event = BuildEvent('a', STATUS, "x")
+    bus.publish(event)
+    assert received == [event]
+    bus.unsubscribe(received.append)
+    bus.publish(event)
+    assert received == [event]
+
+
+def test_event_metrics():
+    metrics = EventMetrics()
+    for event in (
+        BuildEvent('a', OUTPUT, "x"),
+        BuildEvent('a', OUTPUT, "WARNING: y", LEVEL_WARNING),
+        BuildEvent('a', STATUS, "boom", LEVEL_ERROR),
+        BuildEvent('a', PHASE, phase='pyz', metrics={'modules': 7}),
+        BuildEvent('a', PROGRESS, metrics={'percent': 60}),
+        BuildEvent('b', OUTPUT, "z"),
+    ):
+        metrics(event)
+    a = metrics.get('a')
+    assert a.to_dict() == {'output_lines': 2, 'warnings': 1, 'errors': 1, 'modules': 7}
+    assert (a.phase, a.percent) == ('pyz', 60)
+    assert metrics.totals() == {'output_lines': 3, 'warnings': 1, 'errors': 1}
+    assert metrics.get('missing').output_lines == 0
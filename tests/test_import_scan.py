@@ -0,0 +1,61 @@
+import sys
+import textwrap
+
+import pytest
+
+from import_scan import ImportScanner, scan_file
+
+
+def kinds(tmp_path, source: str) -> dict:
+    script = tmp_path / 'a.py'
+    script.write_text(textwrap.dedent(source), encoding='utf-8')
+    return {module: kind for _level, module, _names, kind, _lineno in scan_file(str(script))['imports']}
+
+
+def test_import_kinds(tmp_path):
+    assert kinds(tmp_path, """
+        import os
+        import sys
+        if sys.platform == 'win32':
+            import msvcrt
+        else:
+            import termios
+        try:
+            import ujson
+        except ImportError:
+            ujson = None
+        from typing import TYPE_CHECKING
+        if TYPE_CHECKING:
+            import numpy
+            if sys.version_info >= (3, 11):
+                import tomllib
+    """) == {'os': 'static', 'sys': 'static', 'msvcrt': 'optional', 'termios': 'optional',
+             'ujson': 'optional', 'typing': 'static', 'numpy': 'type_only', 'tomllib': 'type_only'}
+
+
+def test_dynamic_import_in_condition_is_seen(tmp_path):
+    script = tmp_path / 'a.py'
+    script.write_text("import importlib\nif importlib.import_module('json'):\n    pass\n", encoding='utf-8')
+    assert scan_file(str(script))['dynamic'] == [[2, 'json']]
+
+
+@pytest.fixture
+def scanner(tmp_path):
+    scanner = ImportScanner(cache_dir=str(tmp_path / 'scan_cache'), max_workers=1, use_disk_cache=False)
+    yield scanner
+    scanner.close()
+
+
+def test_platform_guard_not_reported_unresolved(tmp_path, scanner):
+    script = tmp_path / 'app.py'
+    script.write_text(textwrap.dedent("""
+        import sys
+        if sys.platform == 'win32':
+            import nonexistent_win_only_xyz
+        else:
+            import termios
+        import nonexistent_required_xyz
+    """), encoding='utf-8')
+    result = scanner.scan([str(script)], sys.executable)[str(script)]
+    assert result.unresolved == ['nonexistent_required_xyz']
+    assert result.optional_missing == ['nonexistent_win_only_xyz']
@@ -0,0 +1,62 @@
+import pytest
+
+import log_views
+from log_views import TaskLog, LogStore, LEVEL_INFO, LEVEL_WARNING, LEVEL_ERROR, PAGE_LINES
+
+
+@pytest.fixture
+def task_log(tmp_path):
+    log = TaskLog(str(tmp_path / 'task.log'), 10)
+    yield log
+    log.close()
+
+
+def test_ring_keeps_recent_lines_in_memory(task_log):
+    for i in range(25):
+        task_log.append(f"line {i}")
+    assert len(task_log) == 25
+    assert task_log.spilled == 15
+    assert len(task_log.ring) == 10
+    assert [task_log.line(i) for i in range(25)] == [f"line {i}" for i in range(25)]
+
+
+def test_spilled_newlines_do_not_shift_lines(task_log):
+    task_log.append("a\nb")
+    for i in range(20):
+        task_log.append(f"line {i}")
+    assert task_log.line(0) == "a b"
+    assert task_log.line(1) == "line 0"
+
+
+def test_partial_page_reloaded_after_more_lines_spill(task_log):
+    """最后一页读回后又有新行落盘，不能返回缓存中的短页"""
+    for i in range(110):
+        task_log.append(f"line {i}")
+    assert task_log.line(5) == "line 5"
+    for i in range(110, 400):
+        task_log.append(f"line {i}")
+    assert task_log.line(150) == "line 150"
+    assert task_log.line(PAGE_LINES + 10) == f"line {PAGE_LINES + 10}"
+    assert [task_log.line(i) for i in range(400)] == [f"line {i}" for i in range(400)]
+
+
+def test_page_cache_is_bounded(task_log, monkeypatch):
+    monkeypatch.setattr(log_views, 'MAX_CACHED_PAGES', 2)
+    for i in range(PAGE_LINES * 4 + 20):
+        task_log.append(f"line {i}")
+    for page in range(4):
+        assert task_log.line(page * PAGE_LINES) == f"line {page * PAGE_LINES}"
+    assert len(task_log._pages) == 2
+
+
+def test_store_tracks_tasks_and_levels():
+    store = LogStore(ring_capacity=3)
+    try:
+        store.extend([('a.py', f"a{i}", LEVEL_INFO) for i in range(5)])
+        store.extend([('b.py', "warn", LEVEL_WARNING), ('', "app", LEVEL_ERROR), ('a.py', "a5", LEVEL_INFO)])
+        assert len(store) == 8
+        assert [store.text(row) for row in range(len(store))] == ["a0", "a1", "a2", "a3", "a4", "warn", "app", "a5"]
+        assert list(store.line_level[5:7]) == [LEVEL_WARNING, LEVEL_ERROR]
+        assert store.task_keys == ['a.py', 'b.py', '']
+    finally:
+        store.close()
@@ -0,0 +1,54 @@
+import textwrap
+
+from preflight import PreflightChecker
+
+
+def check(tmp_path, source: str) -> list:
+    script = tmp_path / 'a.py'
+    script.write_text(textwrap.dedent(source), encoding='utf-8')
+    return PreflightChecker(max_workers=1).check([str(script)])[str(script)]
+
+
+def test_unconditional_missing_import_rejected(tmp_path):
+    errors = check(tmp_path, """
+        import os
+        import nonexistent_mod_xyz
+    """)
+    assert len(errors) == 1
+    assert 'nonexistent_mod_xyz' in errors[0]
+    assert '第 3 行' in errors[0]
+
+
+def test_platform_guard_not_rejected(tmp_path):
+    assert check(tmp_path, """
+        import sys
+        if sys.platform == 'win32':
+            import msvcrt
+        else:
+            import termios
+        if sys.version_info < (3, 8):
+            import nonexistent_backport_xyz
+    """) == []
+
+
+def test_try_import_error_not_rejected(tmp_path):
+    assert check(tmp_path, """
+        try:
+            import nonexistent_mod_xyz
+        except ImportError:
+            nonexistent_mod_xyz = None
+    """) == []
+
+
+def test_type_checking_not_rejected(tmp_path):
+    assert check(tmp_path, """
+        from typing import TYPE_CHECKING
+        if TYPE_CHECKING:
+            from nonexistent_types_xyz import Thing
+    """) == []
+
+
+def test_syntax_error_rejected(tmp_path):
+    errors = check(tmp_path, "def f(:\n    pass\n")
+    assert len(errors) == 1
+    assert '语法错误' in errors[0]
@@ -0,0 +1,17 @@
+from PyQt5.QtCore import QThreadPool
+
+from scheduler import BuildScheduler
+
+
+def test_set_max_jobs_grows_thread_pool():
+    pool = QThreadPool()
+    pool.setMaxThreadCount(1)
+    scheduler = BuildScheduler(pool, max_jobs=2)
+    assert pool.maxThreadCount() == 2
+    scheduler.set_max_jobs(6)
+    assert (scheduler.max_jobs, pool.maxThreadCount()) == (6, 6)
+    # 调小并行数时不收缩线程池（其他任务如预检也在使用它）
+    scheduler.set_max_jobs(3)
+    assert (scheduler.max_jobs, pool.maxThreadCount()) == (3, 6)
+    scheduler.set_max_jobs(0)
+    assert scheduler.max_jobs == 1
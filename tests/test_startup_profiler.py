@@ -0,0 +1,46 @@
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from startup_profiler import _has_child, profile_startup, summary_lines
+
+
+def test_unlaunchable_exe_does_not_crash(tmp_path):
+    exe = tmp_path / 'app.exe'
+    exe.write_bytes(b'not an executable')
+    profile = profile_startup(str(exe), runs=3, timeout=5, layout='onefile')
+    assert profile['failures'] == 3
+    assert profile['cold_ms'] is None
+    assert profile['warm_p50_ms'] is None and profile['warm_min_ms'] is None
+    assert any('失败' in line for line in summary_lines(profile))
+
+
+@pytest.mark.skipif(os.name == 'nt', reason="依赖 #! 脚本")
+def test_warm_statistics(tmp_path):
+    exe = tmp_path / 'app'
+    exe.write_text(f"#!{sys.executable}\n", encoding='utf-8')
+    exe.chmod(0o755)
+    profile = profile_startup(str(exe), runs=3, timeout=10, layout='onedir')
+    assert profile['failures'] == 0
+    assert len([ms for ms in profile['launches_ms'] if ms is not None]) == 3
+    assert profile['warm_min_ms'] <= profile['warm_p50_ms']
+
+
+@pytest.mark.skipif(not os.path.isdir('/proc'), reason="需要 /proc")
+def test_has_child():
+    leaf = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(30)'])
+    parent = subprocess.Popen([sys.executable, '-c',
+                               'import subprocess, sys; subprocess.run([sys.executable, "-c", "import time; time.sleep(5)"])'])
+    try:
+        assert not _has_child(leaf.pid)
+        deadline = time.monotonic() + 10
+        while not _has_child(parent.pid) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert _has_child(parent.pid)
+    finally:
+        for process in (leaf, parent):
+            process.kill()
+            process.wait()
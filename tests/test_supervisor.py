@@ -0,0 +1,85 @@
+import os
+import sys
+import time
+import errno
+import subprocess
+
+import pytest
+
+from supervisor import (
+    ProcessResult, RetryBudget, ProcessWatchdog, EXITED, CANCELLED, WALL_TIMEOUT, IDLE_TIMEOUT,
+    SPAWN_FAILED, FAILED, is_transient, new_session_kwargs, group_alive
+)
+
+
+@pytest.mark.parametrize('result, tail, expected', [
+    (ProcessResult(EXITED, 0), (), False),
+    (ProcessResult(EXITED, 1), (), False),
+    (ProcessResult(EXITED, 1), ("PermissionError: [WinError 32] being used by another process",), True),
+    (ProcessResult(EXITED, 1), ("OSError: Text file busy",), True),
+    (ProcessResult(EXITED, -9), (), True),
+    (ProcessResult(IDLE_TIMEOUT, -15, timeout=60), (), True),
+    (ProcessResult(WALL_TIMEOUT, -15, timeout=60), (), False),
+    (ProcessResult(CANCELLED, -15), (), False),
+    (ProcessResult(FAILED, error=ValueError("x")), (), False),
+    (ProcessResult(SPAWN_FAILED, error=OSError(errno.EAGAIN, "again")), (), True),
+    (ProcessResult(SPAWN_FAILED, error=FileNotFoundError(errno.ENOENT, "missing")), (), False),
+])
+def test_transient_classification(result, tail, expected):
+    assert is_transient(result, tail) is expected
+
+
+def test_describe():
+    assert ProcessResult(EXITED, 0).ok
+    assert "用户取消" in ProcessResult(CANCELLED).describe()
+    assert "120 秒" in ProcessResult(WALL_TIMEOUT, -15, timeout=120).describe()
+    assert "信号 9" in ProcessResult(EXITED, -9).describe()
+    assert "退出码为 2" in ProcessResult(EXITED, 2).describe()
+
+
+def test_retry_budget_scales_with_builds():
+    budget = RetryBudget(ratio=0.5, minimum=1)
+    assert budget.try_acquire()
+    assert not budget.try_acquire()
+    for _ in range(4):
+        budget.record_build()
+    # 上限 = 1 + 0.5 × 4 = 3
+    assert budget.try_acquire() and budget.try_acquire()
+    assert not budget.try_acquire()
+    assert budget.retries == 3
+
+
+@pytest.mark.skipif(os.name == 'nt', reason="POSIX 进程组")
+@pytest.mark.parametrize('wall, idle, reason', [(0.5, None, WALL_TIMEOUT), (None, 0.5, IDLE_TIMEOUT)])
+def test_watchdog_terminates_process_group(wall, idle, reason):
+    watchdog = ProcessWatchdog(interval_s=0.05)
+    # 父进程派生一个同组的子进程，二者都忽略输出、一直运行
+    code = ("import subprocess, sys, time; "
+            "subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(60)']); time.sleep(60)")
+    process = subprocess.Popen([sys.executable, '-c', code], **new_session_kwargs())
+    watch = watchdog.watch(process.pid, wall_timeout=wall, idle_timeout=idle)
+    try:
+        returncode = process.wait(timeout=10)
+        result = watch.result(returncode)
+        assert result.reason == reason
+        assert not result.ok
+        deadline = time.monotonic() + 5
+        while group_alive(process.pid) and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert not group_alive(process.pid)
+    finally:
+        watch.close()
+        if process.poll() is None:
+            process.kill()
+
+
+@pytest.mark.skipif(os.name == 'nt', reason="POSIX 进程组")
+def test_watchdog_cancel():
+    watchdog = ProcessWatchdog(interval_s=0.05)
+    process = subprocess.Popen([sys.executable, '-c', "import time; time.sleep(60)"], **new_session_kwargs())
+    watch = watchdog.watch(process.pid)
+    try:
+        watch.cancel()
+        assert watch.result(process.wait(timeout=10)).reason == CANCELLED
+    finally:
+        watch.close()
@@ -0,0 +1,62 @@
+import json
+import os
+import sys
+
+from app_paths import data_dir
+from toolchain import Toolchain, ToolchainService
+
+
+def make_service(monkeypatch, site_dir, versions):
+    monkeypatch.delenv('PYEXE_MAKER_PYINSTALLER', raising=False)
+    service = ToolchainService(interpreter=sys.executable, auto_install=False)
+    probes = []
+
+    def probe():
+        probes.append(1)
+        return Toolchain(sys.executable, '3.x', versions[-1], site_dirs=[str(site_dir)])
+
+    monkeypatch.setattr(service, '_probe', probe)
+    return service, probes
+
+
+def test_disk_cache_reused_across_sessions(tmp_path, monkeypatch):
+    site_dir = tmp_path / 'site-packages'
+    site_dir.mkdir()
+    first, probes = make_service(monkeypatch, site_dir, ['6.0'])
+    assert first.get().pyinstaller_version == '6.0'
+    second, probes = make_service(monkeypatch, site_dir, ['6.0'])
+    assert second.get().pyinstaller_version == '6.0'
+    assert probes == []
+
+
+def test_disk_cache_invalidated_when_site_packages_change(tmp_path, monkeypatch):
+    site_dir = tmp_path / 'site-packages'
+    site_dir.mkdir()
+    first, _ = make_service(monkeypatch, site_dir, ['6.0'])
+    fingerprint = first.get().fingerprint()
+    # pip install -U pyinstaller：替换 dist-info 会更新 site-packages 的 mtime
+    stat = os.stat(site_dir)
+    os.utime(site_dir, (stat.st_atime, stat.st_mtime + 10))
+    second, probes = make_service(monkeypatch, site_dir, ['6.1'])
+    toolchain = second.get()
+    assert probes == [1]
+    assert toolchain.pyinstaller_version == '6.1'
+    assert toolchain.fingerprint() != fingerprint
+
+
+def test_disk_cache_entries_with_stale_fields_are_reprobed(tmp_path, monkeypatch):
+    site_dir = tmp_path / 'site-packages'
+    site_dir.mkdir()
+    first, _ = make_service(monkeypatch, site_dir, ['6.0'])
+    first.get()
+    path = os.path.join(data_dir(), ToolchainService.CACHE_FILE)
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    # 旧版本的条目带有已移除的 pillow 字段
+    for entry in data.values():
+        entry['pillow'] = True
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    second, probes = make_service(monkeypatch, site_dir, ['6.0'])
+    assert second.get().pyinstaller_version == '6.0'
+    assert probes == [1]